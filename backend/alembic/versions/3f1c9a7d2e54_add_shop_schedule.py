@@ -0,0 +1,62 @@
+"""add shop schedule
+
+Revision ID: 3f1c9a7d2e54
+Revises: 70507f768c30
+Create Date: 2026-10-18 09:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2e54'
+down_revision: Union[str, Sequence[str], None] = '70507f768c30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shop_working_hours',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('open_time', sa.Time(), nullable=False),
+    sa.Column('close_time', sa.Time(), nullable=False),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shop_working_hours_shop_id'), 'shop_working_hours', ['shop_id'], unique=False)
+    op.create_table('shop_breaks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('end_time', sa.Time(), nullable=False),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shop_breaks_shop_id'), 'shop_breaks', ['shop_id'], unique=False)
+    op.create_table('shop_schedule_exceptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open_time', sa.Time(), nullable=True),
+    sa.Column('close_time', sa.Time(), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_shop_schedule_exceptions_shop_id'), 'shop_schedule_exceptions', ['shop_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_shop_schedule_exceptions_shop_id'), table_name='shop_schedule_exceptions')
+    op.drop_table('shop_schedule_exceptions')
+    op.drop_index(op.f('ix_shop_breaks_shop_id'), table_name='shop_breaks')
+    op.drop_table('shop_breaks')
+    op.drop_index(op.f('ix_shop_working_hours_shop_id'), table_name='shop_working_hours')
+    op.drop_table('shop_working_hours')
@@ -0,0 +1,41 @@
+"""add appointments keyset index
+
+Revision ID: b3e7d9f1a2c6
+Revises: c4d8f2a6b931
+Create Date: 2026-10-18 17:21:36.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7d9f1a2c6'
+down_revision: Union[str, Sequence[str], None] = 'c4d8f2a6b931'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appointments_shop_start_id',
+            'appointments',
+            ['shop_id', 'start_time', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_appointments_shop_start_id',
+            table_name='appointments',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
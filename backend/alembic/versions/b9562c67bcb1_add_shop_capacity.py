@@ -0,0 +1,28 @@
+"""add shop capacity
+
+Revision ID: b9562c67bcb1
+Revises: 3f1c9a7d2e54
+Create Date: 2026-10-18 10:03:17.502941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9562c67bcb1'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shops', sa.Column('capacity', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shops', 'capacity')
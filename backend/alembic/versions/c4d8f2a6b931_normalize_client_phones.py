@@ -0,0 +1,58 @@
+"""normalize client phones
+
+Revision ID: c4d8f2a6b931
+Revises: a7c3e9d1f5b2
+Create Date: 2026-10-18 15:58:44.209173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8f2a6b931'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e9d1f5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('clients', 'phone', existing_type=sa.String(length=20), nullable=True)
+    # Same rules as app.core.clients.normalize_phone. Placeholders such as
+    # 'unknown' (Telegram-only clients) become NULL; when normalizing makes
+    # two phones equal, the oldest client keeps the number and the others
+    # are left without one rather than merged.
+    op.execute(r"""
+        CREATE TEMPORARY TABLE client_phones ON COMMIT DROP AS
+        WITH normalized AS (
+            SELECT id, phone AS old_phone, regexp_replace(phone, '\D', '', 'g') AS digits FROM clients
+        ), fixed AS (
+            SELECT id, old_phone,
+                   CASE WHEN old_phone ~ '[^0-9 ()+.-]' OR digits = '' OR length(digits) > 15 THEN NULL
+                        WHEN length(digits) = 11 AND digits LIKE '8%' THEN '7' || substr(digits, 2)
+                        ELSE digits END AS phone
+            FROM normalized
+        )
+        SELECT id, old_phone,
+               CASE WHEN row_number() OVER (PARTITION BY phone ORDER BY id) = 1 THEN phone END AS phone
+        FROM fixed
+    """)
+    # Cleared first: the unique index is checked row by row
+    op.execute("""
+        UPDATE clients SET phone = NULL FROM client_phones
+        WHERE clients.id = client_phones.id AND client_phones.phone IS DISTINCT FROM client_phones.old_phone
+    """)
+    op.execute("""
+        UPDATE clients SET phone = client_phones.phone FROM client_phones
+        WHERE clients.id = client_phones.id AND client_phones.phone IS DISTINCT FROM client_phones.old_phone
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Unique placeholders that upgrade() turns back into NULL
+    op.execute("UPDATE clients SET phone = 'unknown-' || id WHERE phone IS NULL")
+    op.alter_column('clients', 'phone', existing_type=sa.String(length=20), nullable=False)
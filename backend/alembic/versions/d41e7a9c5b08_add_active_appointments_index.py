@@ -0,0 +1,47 @@
+"""add active appointments index
+
+Revision ID: d41e7a9c5b08
+Revises: b9562c67bcb1
+Create Date: 2026-10-18 11:12:44.180326
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41e7a9c5b08'
+down_revision: Union[str, Sequence[str], None] = 'b9562c67bcb1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A new enum value cannot be referenced in the transaction that adds it,
+    # and CONCURRENTLY cannot run inside a transaction at all
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE appointmentstatus ADD VALUE IF NOT EXISTS 'WAITLIST'")
+        op.create_index(
+            'ix_appointments_shop_start_active',
+            'appointments',
+            ['shop_id', 'start_time'],
+            unique=False,
+            postgresql_include=['end_time'],
+            postgresql_where=sa.text("status NOT IN ('CANCELLED', 'WAITLIST')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_appointments_shop_start_active',
+            table_name='appointments',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
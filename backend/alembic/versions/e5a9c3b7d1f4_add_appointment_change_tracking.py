@@ -0,0 +1,60 @@
+"""add appointment change tracking
+
+Revision ID: e5a9c3b7d1f4
+Revises: b3e7d9f1a2c6
+Create Date: 2026-10-18 18:40:12.730561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3b7d1f4'
+down_revision: Union[str, Sequence[str], None] = 'b3e7d9f1a2c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = sa.text("CAST(CAST(pg_current_xact_id() AS text) AS bigint)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointments', sa.Column(
+        'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False
+    ))
+    op.add_column('appointments', sa.Column(
+        'change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False
+    ))
+    op.add_column('outbox_events', sa.Column(
+        'change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False
+    ))
+    # Every writer (ORM, bulk INSERTs, CSV import, raw UPDATEs) goes through it
+    op.execute("""
+        CREATE FUNCTION appointments_touch() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            NEW.change_xid := CAST(CAST(pg_current_xact_id() AS text) AS bigint);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER appointments_touch BEFORE INSERT OR UPDATE ON appointments
+        FOR EACH ROW EXECUTE FUNCTION appointments_touch()
+    """)
+    op.create_index(
+        'ix_appointments_shop_change', 'appointments', ['shop_id', 'change_xid', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_shop_change', table_name='appointments')
+    op.execute("DROP TRIGGER appointments_touch ON appointments")
+    op.execute("DROP FUNCTION appointments_touch()")
+    op.drop_column('outbox_events', 'change_xid')
+    op.drop_column('appointments', 'change_xid')
+    op.drop_column('appointments', 'updated_at')
@@ -0,0 +1,72 @@
+"""add appointments no overlap
+
+Revision ID: e8a3f05c2d17
+Revises: d41e7a9c5b08
+Create Date: 2026-10-18 12:26:09.734512
+
+"""
+import heapq
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a3f05c2d17'
+down_revision: Union[str, Sequence[str], None] = 'd41e7a9c5b08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _assign_bays(conn) -> None:
+    """Spreads existing active appointments over bays so none overlap on one bay."""
+    rows = conn.execute(sa.text(
+        "SELECT id, shop_id, start_time, end_time FROM appointments "
+        "WHERE status NOT IN ('CANCELLED', 'WAITLIST') "
+        "ORDER BY shop_id, start_time, id"
+    )).all()
+
+    updates = []
+    shop_id = None
+    for row in rows:
+        if row.shop_id != shop_id:
+            shop_id = row.shop_id
+            busy_until = []  # heap of (end_time, bay)
+            free_bays = []   # heap of released bay numbers
+            next_bay = 1
+        while busy_until and busy_until[0][0] <= row.start_time:
+            heapq.heappush(free_bays, heapq.heappop(busy_until)[1])
+        if free_bays:
+            bay = heapq.heappop(free_bays)
+        else:
+            bay = next_bay
+            next_bay += 1
+        heapq.heappush(busy_until, (row.end_time, bay))
+        if bay != 1:
+            updates.append({"id": row.id, "bay": bay})
+
+    if updates:
+        conn.execute(sa.text("UPDATE appointments SET bay = :bay WHERE id = :id"), updates)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('appointments', sa.Column('bay', sa.Integer(), server_default='1', nullable=False))
+    _assign_bays(op.get_bind())
+    op.create_exclude_constraint(
+        'appointments_no_overlap',
+        'appointments',
+        ('shop_id', '='),
+        ('bay', '='),
+        (sa.text("tstzrange(start_time, end_time, '[)')"), '&&'),
+        using='gist',
+        where=sa.text("status NOT IN ('CANCELLED', 'WAITLIST')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('appointments_no_overlap', 'appointments', type_='exclude')
+    op.drop_column('appointments', 'bay')
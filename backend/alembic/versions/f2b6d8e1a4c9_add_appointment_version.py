@@ -0,0 +1,28 @@
+"""add appointment version
+
+Revision ID: f2b6d8e1a4c9
+Revises: e8a3f05c2d17
+Create Date: 2026-10-18 14:41:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8e1a4c9'
+down_revision: Union[str, Sequence[str], None] = 'e8a3f05c2d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointments', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('appointments', 'version')
@@ -0,0 +1,51 @@
+"""add client search indexes
+
+Revision ID: f7b1d5e9c3a8
+Revises: e5a9c3b7d1f4
+Create Date: 2026-10-18 19:52:08.114379
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b1d5e9c3a8'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c3b7d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm ships with the standard contrib modules (postgres images included)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for column in ('full_name', 'vehicle_info'):
+            op.create_index(
+                f'ix_clients_{column}_trgm',
+                'clients',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.create_index(
+            'ix_clients_phone_pattern',
+            'clients',
+            ['phone'],
+            unique=False,
+            postgresql_ops={'phone': 'text_pattern_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ('ix_clients_phone_pattern', 'ix_clients_vehicle_info_trgm', 'ix_clients_full_name_trgm'):
+            op.drop_index(name, table_name='clients', postgresql_concurrently=True, if_exists=True)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import shops, services, appointments, slots, webhook, ws, login, clients
+from app.api.endpoints import shops, services, appointments, slots, webhook, ws, login, clients, imports, exports
 
 api_router = APIRouter()
 
@@ -13,3 +13,5 @@ api_router.include_router(webhook.router, tags=["telegram"])
 api_router.include_router(ws.router, tags=["websocket"])
 api_router.include_router(clients.router, prefix="/clients", tags=["clients"])
 
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
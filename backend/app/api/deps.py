@@ -1,11 +1,12 @@
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, Optional
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.config import settings
+from app.core.security import verify_webapp_init_data
 from app.db.session import get_db
 from app.models.models import User
 
@@ -54,3 +55,18 @@ def require_role(allowed_roles: list[UserRole]):
             )
         return current_user
     return role_checker
+
+async def get_webapp_user_id(
+    x_telegram_init_data: Annotated[Optional[str], Header()] = None
+) -> int:
+    """
+    Telegram id of the WebApp customer, from the initData the WebApp sends
+    in the X-Telegram-Init-Data header.
+    """
+    user = verify_webapp_init_data(x_telegram_init_data) if x_telegram_init_data else None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Telegram WebApp data"
+        )
+    return user["id"]
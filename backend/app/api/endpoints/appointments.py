@@ -1,18 +1,41 @@
-from typing import List
-from datetime import datetime, timedelta
+import base64
 import json
-from fastapi import APIRouter, Depends, HTTPException, status
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
 
 from app.db.session import get_db
 from app.api import deps
 from app.models.models import Appointment, AppointmentStatus, Client, Service, User, UserRole
-from app.services.redis_service import RedisService 
-from pydantic import BaseModel, root_validator
+from app.services.slot_cache import SlotCache
+from app.services.service_catalog import ServiceCatalog
+from app.services.outbox import OutboxRelay, add_event
+from app.services.idempotency import (
+    IdempotencyInProgressError, IdempotencyKeyReusedError, IdempotencyStore, request_fingerprint
+)
+from app.core.slots import INACTIVE_STATUSES, alternative_slots, booking_conflict_query
+from app.core.booking import (
+    SlotTakenError, StaleVersionError, assign_bays, booking_guard, busy_bays, insert_appointment,
+    insert_appointments, move_appointment, shop_capacity
+)
+from app.core.changes import format_cursor, parse_cursor, snapshot_horizon
+from app.core.clients import ResolvedClient, normalize_phone, upsert_client
+from app.core.schedule import get_shop_schedule
+from pydantic import BaseModel, Field, root_validator
 
 router = APIRouter()
 
+# Upper bound on the expanded occurrences of one bulk request
+MAX_BULK_APPOINTMENTS = 500
+MAX_PAGE_SIZE = 500
+# Widest calendar window: a month view with its leading and trailing weeks
+MAX_CALENDAR_DAYS = 93
+
 class AppointmentCreate(BaseModel):
     service_id: int
     start_time: datetime
@@ -21,6 +44,26 @@ class AppointmentCreate(BaseModel):
     client_phone: str
     client_telegram_id: int = None
 
+class AppointmentBulkCreate(BaseModel):
+    service_id: int
+    client_name: str
+    client_phone: str
+    client_telegram_id: int = None
+    start_times: List[datetime] = Field(min_length=1)
+    # Every start is repeated repeat_count times, repeat_every_days apart
+    repeat_every_days: int = Field(7, ge=1)
+    repeat_count: int = Field(1, ge=1)
+
+class BulkItemResult(BaseModel):
+    start_time: datetime
+    status: str
+    appointment_id: int = None
+
+class AppointmentBulkResult(BaseModel):
+    created: int
+    conflicts: int
+    results: List[BulkItemResult]
+
 class AppointmentRead(BaseModel):
     id: int
     shop_id: int
@@ -29,16 +72,93 @@ class AppointmentRead(BaseModel):
     start_time: datetime
     end_time: datetime
     status: str
+    version: int
     
     class Config:
         from_attributes = True
 
+class CalendarEntry(AppointmentRead):
+    bay: int
+    client_name: str
+    client_phone: Optional[str]
+    service_name: str
+    service_duration_minutes: int
+    service_price: float
+
+class AppointmentChange(CalendarEntry):
+    # Tombstone: cancelled, gone from the calendar
+    deleted: bool
+
+class AppointmentChanges(BaseModel):
+    changes: List[AppointmentChange]
+    # Pass as ``since`` to get the changes after these
+    cursor: str
+    has_more: bool
+
 class AppointmentStatusUpdate(BaseModel):
     status: AppointmentStatus
+    # Version the client last saw; a stale one gets a 409 with the current state
+    version: int = None
 
 class AppointmentUpdate(BaseModel):
     service_id: int = None
     start_time: datetime = None
+    version: int = None
+
+async def _raise_slot_taken(
+    db: AsyncSession,
+    shop_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    duration: int,
+    exclude_appointment_id: int = None
+):
+    """
+    Raises the 409 of a rejected booking with the nearest free starts of that day.
+    """
+    result = await db.execute(booking_conflict_query(shop_id, start_time, end_time, exclude_appointment_id))
+    schedule = await get_shop_schedule(shop_id, db)
+    alternatives = alternative_slots(result.all(), start_time, duration, schedule)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "Slot already taken",
+            "alternatives": [slot.isoformat() for slot in alternatives]
+        }
+    )
+
+async def _resolve_client(
+    db: AsyncSession,
+    full_name: str,
+    phone: str,
+    telegram_id: Optional[int]
+) -> ResolvedClient:
+    normalized = normalize_phone(phone)
+    if normalized is None:
+        raise HTTPException(status_code=422, detail="Invalid client phone")
+    try:
+        return await upsert_client(db, full_name, normalized, telegram_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Phone and Telegram id belong to different clients"
+        )
+
+def _raise_stale(error: StaleVersionError):
+    """
+    Raises the 409 of an update based on an outdated version, with the
+    appointment as it is now so the client can redo the change on top of it.
+    """
+    if error.current is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "Appointment was changed by someone else",
+            "current": AppointmentRead.model_validate(error.current).model_dump(mode="json")
+        }
+    )
 
 @router.patch("/{id}", response_model=AppointmentRead)
 async def update_appointment(
@@ -54,37 +174,36 @@ async def update_appointment(
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
         
-    if appt.shop_id != current_user.shop_id:
+    # Read before the write: a rolled back conflict expires current_user too
+    shop_id = current_user.shop_id
+    if appt.shop_id != shop_id:
          raise HTTPException(status_code=403, detail="Not authorized to update this appointment")
 
-    if appt_update.service_id:
-        service = await db.get(Service, appt_update.service_id)
-        if not service:
-            raise HTTPException(status_code=404, detail="Service not found")
-        appt.service_id = appt_update.service_id
-        # Trigger recalculation of end_time if start_time or service changed
-        start = appt_update.start_time or appt.start_time
-        appt.end_time = start + timedelta(minutes=service.duration_minutes)
-        
-    if appt_update.start_time:
-        appt.start_time = appt_update.start_time
-        # Ensure end_time stays in sync with duration
-        service = await db.get(Service, appt.service_id)
-        appt.end_time = appt.start_time + timedelta(minutes=service.duration_minutes)
-
-    await db.commit()
-    await db.refresh(appt)
-    
-    # Broadcast update
-    redis = RedisService.get_redis()
-    message = {
-        "type": "APPOINTMENT_UPDATED",
-        "data": {
-            "id": appt.id,
-            "shop_id": appt.shop_id
-        }
-    }
-    await redis.publish("appointments_updates", json.dumps(message))
+    old_start_time = appt.start_time
+
+    service = await ServiceCatalog.get(db, appt_update.service_id or appt.service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    # Keep end_time in sync with the (possibly new) start and duration
+    duration = service.duration_minutes
+    start_time = appt_update.start_time or appt.start_time
+    end_time = start_time + timedelta(minutes=duration)
+    try:
+        async with booking_guard(db, shop_id, start_time, end_time):
+            await move_appointment(
+                db, appt, appt_update.version,
+                service_id=service.id, start_time=start_time, end_time=end_time
+            )
+            add_event(db, "APPOINTMENT_UPDATED", {"id": appt.id, "shop_id": shop_id})
+            await db.commit()
+    except StaleVersionError as e:
+        _raise_stale(e)
+    except SlotTakenError:
+        await _raise_slot_taken(db, shop_id, start_time, end_time, duration, id)
+
+    OutboxRelay.wake()
+    await SlotCache.invalidate(shop_id, old_start_time, appt.start_time)
     
     return appt
 
@@ -92,86 +211,190 @@ async def update_appointment(
 async def create_appointment(
     appt: AppointmentCreate, 
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.MANAGER]))
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.MANAGER])),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
 ):
-    # 0. Enforce Tenancy
-    shop_id = current_user.shop_id
+    """
+    Books a slot. With an ``Idempotency-Key`` header a retry of the same
+    request returns the stored response instead of booking again, and a
+    duplicate sent while the first is still running waits for its result.
+    """
+    if not idempotency_key:
+        return await _create_appointment(appt, db, current_user.shop_id)
+
+    # Keys are per user, so nobody can replay someone else's response
+    scope = f"appointments:{current_user.id}:{idempotency_key}"
+    try:
+        lease, stored = await IdempotencyStore.begin(
+            scope, request_fingerprint(appt.model_dump(mode="json"))
+        )
+    except IdempotencyKeyReusedError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    except IdempotencyInProgressError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
 
+    if stored is not None:
+        return JSONResponse(
+            status_code=stored["status_code"],
+            content=stored["body"],
+            headers={"Idempotent-Replayed": "true"}
+        )
+    if lease is None:
+        return await _create_appointment(appt, db, current_user.shop_id)
+
+    try:
+        new_appt = await _create_appointment(appt, db, current_user.shop_id)
+    except Exception:
+        # Nothing was booked (e.g. slot taken): let a retry run again
+        await IdempotencyStore.release(scope, lease)
+        raise
+
+    body = AppointmentRead.model_validate(new_appt).model_dump(mode="json")
+    await IdempotencyStore.complete(scope, lease, status.HTTP_200_OK, body)
+    return new_appt
+
+async def _create_appointment(appt: AppointmentCreate, db: AsyncSession, shop_id: int) -> Appointment:
     # 1. Get Service to calculate duration
-    service = await db.get(Service, appt.service_id)
+    service = await ServiceCatalog.get(db, appt.service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
         
     # Calculate end_time based on service duration
-    end_time = appt.start_time + timedelta(minutes=service.duration_minutes)
+    duration = service.duration_minutes
+    end_time = appt.start_time + timedelta(minutes=duration)
 
-    # 2. Race Condition Protection (Soft Lock)
-    redis = RedisService.get_redis()
-    lock_key = f"booking_lock:{shop_id}:{appt.start_time.isoformat()}"
-    
-    is_locked = await redis.set(lock_key, "1", nx=True, ex=10)
-    if not is_locked:
-         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="This slot is currently being booked by someone else. Please try again."
-        )
+    client = await _resolve_client(db, appt.client_name, appt.client_phone, appt.client_telegram_id)
 
+    # 2. Single INSERT; the exclusion constraint (or the optional range lock) settles races
     try:
-        stmt = select(Appointment).where(
-            and_(
-                Appointment.shop_id == shop_id,
-                Appointment.status != AppointmentStatus.CANCELLED,
-                Appointment.start_time < end_time,
-                Appointment.end_time > appt.start_time
+        async with booking_guard(db, shop_id, appt.start_time, end_time):
+            new_appt = await insert_appointment(
+                db,
+                shop_id=shop_id,
+                client_id=client.id,
+                service_id=appt.service_id,
+                start_time=appt.start_time,
+                end_time=end_time
             )
-        )
-        result = await db.execute(stmt)
-        if result.scalars().first():
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Slot already taken"
-            )
-
-        stmt = select(Client).where(Client.phone == appt.client_phone)
-        result = await db.execute(stmt)
-        client = result.scalar_one_or_none()
-        
-        if not client:
-            client = Client(
-                full_name=appt.client_name,
-                phone=appt.client_phone,
-                telegram_id=appt.client_telegram_id
-            )
-            db.add(client)
-            await db.flush()
-        
-        new_appt = Appointment(
-            shop_id=shop_id,
-            service_id=appt.service_id,
-            client_id=client.id,
-            start_time=appt.start_time,
-            end_time=end_time,
-            status=AppointmentStatus.NEW
-        )
-        
-        db.add(new_appt)
-        await db.commit()
-        await db.refresh(new_appt)
-        
-        message = {
-            "type": "NEW_APPOINTMENT",
-            "data": {
+            add_event(db, "NEW_APPOINTMENT", {
                 "id": new_appt.id,
                 "shop_id": new_appt.shop_id,
                 "start_time": new_appt.start_time.isoformat()
-            }
-        }
-        await redis.publish("appointments_updates", json.dumps(message))
-        
-        return new_appt
-        
-    finally:
-        await redis.delete(lock_key)
+            })
+            await db.commit()
+    except SlotTakenError:
+        await _raise_slot_taken(db, shop_id, appt.start_time, end_time, duration)
+
+    OutboxRelay.wake()
+    await SlotCache.invalidate(shop_id, new_appt.start_time)
+
+    return new_appt
+
+def expand_occurrences(
+    start_times: List[datetime],
+    every_days: int,
+    count: int
+) -> List[datetime]:
+    """
+    Expands the start times of a recurring booking, in chronological order.
+    Offset-aware starts are converted to naive UTC, like the stored times,
+    so a request may mix both.
+    """
+    step = timedelta(days=every_days)
+    starts = [
+        start.astimezone(timezone.utc).replace(tzinfo=None) if start.tzinfo else start
+        for start in start_times
+    ]
+    return sorted(start + step * n for start in starts for n in range(count))
+
+@router.post("/bulk", response_model=AppointmentBulkResult)
+async def create_appointments_bulk(
+    bulk: AppointmentBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """
+    Books one service for many slots at once, e.g. a fleet's weekly visits.
+
+    Every occurrence is checked against the calendar with one set-based query,
+    the accepted ones are written with one batched INSERT and a single event is
+    published. Occurrences without a free bay are reported as conflicts.
+    """
+    shop_id = current_user.shop_id
+
+    if len(bulk.start_times) * bulk.repeat_count > MAX_BULK_APPOINTMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_APPOINTMENTS} appointments per request"
+        )
+
+    service = await ServiceCatalog.get(db, bulk.service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    duration = timedelta(minutes=service.duration_minutes)
+
+    starts = expand_occurrences(bulk.start_times, bulk.repeat_every_days, bulk.repeat_count)
+    intervals = [(start, start + duration) for start in starts]
+
+    client = await _resolve_client(db, bulk.client_name, bulk.client_phone, bulk.client_telegram_id)
+
+    # One range lock over the whole batch, so the check and the insert are
+    # guarded against single bookings like every other booking write
+    span_start, span_end = intervals[0][0], max(end for _, end in intervals)
+    try:
+        async with booking_guard(db, shop_id, span_start, span_end):
+            taken = await busy_bays(db, shop_id, intervals)
+            bays = assign_bays(intervals, taken, await shop_capacity(db, shop_id))
+
+            rows = [
+                {
+                    "shop_id": shop_id,
+                    "client_id": client.id,
+                    "service_id": service.id,
+                    "start_time": start,
+                    "end_time": end,
+                    "status": AppointmentStatus.NEW,
+                    "bay": bay
+                }
+                for (start, end), bay in zip(intervals, bays)
+                if bay is not None
+            ]
+            ids = await insert_appointments(db, rows)
+            if ids:
+                add_event(db, "APPOINTMENTS_BULK_CREATED", {"shop_id": shop_id, "ids": ids, "count": len(ids)})
+            await db.commit()
+    except SlotTakenError:
+        # A concurrent booking got in between the check and the insert, or
+        # holds the range lock over part of the batch
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Calendar changed during the bulk booking, please retry"
+        )
+
+    new_ids = iter(ids)
+    results = [
+        BulkItemResult(start_time=start, status="created", appointment_id=next(new_ids))
+        if bay is not None
+        else BulkItemResult(start_time=start, status="conflict")
+        for start, bay in zip(starts, bays)
+    ]
+    created = [item for item in results if item.appointment_id is not None]
+
+    if created:
+        OutboxRelay.wake()
+        await SlotCache.invalidate(shop_id, *(item.start_time for item in created))
+
+    return AppointmentBulkResult(
+        created=len(created),
+        conflicts=len(results) - len(created),
+        results=results
+    )
 
 @router.patch("/{id}/status", response_model=AppointmentRead)
 async def update_appointment_status(
@@ -196,10 +419,33 @@ async def update_appointment_status(
          raise HTTPException(status_code=403, detail="Not authorized to update this appointment")
 
     old_status = appt.status
-    appt.status = status_update.status
-    
-    await db.commit()
-    await db.refresh(appt)
+    # Read before the write: a rolled back conflict expires appt
+    shop_id, start_time, end_time = appt.shop_id, appt.start_time, appt.end_time
+    if old_status in INACTIVE_STATUSES and status_update.status not in INACTIVE_STATUSES:
+        # Back in the calendar: needs a free bay again
+        guard = booking_guard(db, shop_id, start_time, end_time)
+    else:
+        guard = nullcontext()
+    try:
+        async with guard:
+            await move_appointment(db, appt, status_update.version, status=status_update.status)
+            add_event(db, "STATUS_UPDATE", {
+                "id": appt.id,
+                "shop_id": appt.shop_id,
+                "status": appt.status.value
+            })
+            await db.commit()
+    except StaleVersionError as e:
+        _raise_stale(e)
+    except SlotTakenError:
+        duration = int((end_time - start_time).total_seconds() // 60)
+        await _raise_slot_taken(db, shop_id, start_time, end_time, duration, id)
+
+    OutboxRelay.wake()
+
+    # Only transitions in or out of the calendar change availability
+    if (old_status in INACTIVE_STATUSES) != (appt.status in INACTIVE_STATUSES):
+        await SlotCache.invalidate(appt.shop_id, appt.start_time)
     
     if appt.status != old_status and appt.client.telegram_id:
         from app.services.notification_service import NotificationService
@@ -211,24 +457,170 @@ async def update_appointment_status(
                 new_status=appt.status.value
             )
         )
-        
-    redis = RedisService.get_redis()
-    message = {
-        "type": "STATUS_UPDATE",
-        "data": {
-            "id": appt.id,
-            "shop_id": appt.shop_id,
-            "status": appt.status.value
-        }
-    }
-    await redis.publish("appointments_updates", json.dumps(message))
     
     return appt
 
+def encode_cursor(appt: Appointment) -> str:
+    """Opaque position after ``appt`` in (start_time, id) order."""
+    raw = json.dumps([appt.start_time.isoformat(), appt.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        start_time, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(start_time), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
 @router.get("/", response_model=List[AppointmentRead])
-async def read_appointments(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Appointment).offset(skip).limit(limit))
-    return result.scalars().all()
+async def read_appointments(
+    response: Response,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status_filter: Optional[AppointmentStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Appointments of the user's shop starting in [date_from, date_to), ordered
+    by start time. Pages are keyset-paginated on (start_time, id) over
+    ix_appointments_shop_start_id, so every page costs the same however deep
+    it is: when more rows follow, the X-Next-Cursor header holds the
+    ``cursor`` of the next page.
+    """
+    stmt = select(Appointment).where(Appointment.shop_id == current_user.shop_id)
+    if date_from is not None:
+        stmt = stmt.where(Appointment.start_time >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Appointment.start_time < date_to)
+    if status_filter is not None:
+        stmt = stmt.where(Appointment.status == status_filter)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(Appointment.start_time, Appointment.id) > decode_cursor(cursor))
+    # One extra row tells whether there is a next page
+    stmt = stmt.order_by(Appointment.start_time, Appointment.id).limit(limit + 1)
+
+    appointments = (await db.execute(stmt)).scalars().all()
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(appointments[-1])
+    return appointments
+
+CALENDAR_COLUMNS = (
+    Appointment.id, Appointment.shop_id, Appointment.service_id, Appointment.client_id,
+    Appointment.start_time, Appointment.end_time, Appointment.status, Appointment.version, Appointment.bay,
+    Client.full_name.label("client_name"), Client.phone.label("client_phone"),
+    Service.name.label("service_name"), Service.duration_minutes.label("service_duration_minutes"),
+    Service.base_price.label("service_price"),
+)
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive query parameters are UTC, like the stored timestamps
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+@router.get("/calendar", response_model=List[CalendarEntry])
+async def read_calendar(
+    date_from: datetime,
+    date_to: datetime,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Appointments of the user's shop starting in [date_from, date_to) with
+    their client and service, for the dashboard's calendar and board. One
+    joined query of only the needed columns; the rows are dumped to JSON
+    directly, without ORM objects or per-row validation. X-Change-Cursor is
+    the ``since`` of GET /appointments/changes to keep the window current.
+    """
+    date_from, date_to = _as_utc(date_from), _as_utc(date_to)
+    if date_to <= date_from or date_to - date_from > timedelta(days=MAX_CALENDAR_DAYS):
+        raise HTTPException(
+            status_code=422,
+            detail=f"date_to must be after date_from, at most {MAX_CALENDAR_DAYS} days later"
+        )
+    stmt = (
+        select(*CALENDAR_COLUMNS)
+        .join(Client, Client.id == Appointment.client_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .where(
+            Appointment.shop_id == current_user.shop_id,
+            Appointment.start_time >= date_from,
+            Appointment.start_time < date_to
+        )
+        .order_by(Appointment.start_time, Appointment.id)
+    )
+    # Taken first, so the changes from the cursor on cover whatever the feed missed
+    horizon = await snapshot_horizon(db)
+    entries = _calendar_entries(await db.execute(stmt))
+    return _json_response(entries, {"X-Change-Cursor": format_cursor(horizon)})
+
+@router.get("/changes", response_model=AppointmentChanges)
+async def read_changes(
+    since: str,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Appointments of the user's shop created or changed after the ``since``
+    cursor (from the calendar feed's X-Change-Cursor header, the previous
+    response or a WebSocket event), as calendar entries in change order.
+    Cancelled appointments come as tombstones (``deleted``). Only finished
+    transactions are returned (see app.core.changes); an appointment
+    changed several times comes once, as it is now.
+    """
+    try:
+        since_position = parse_cursor(since)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+
+    horizon = await snapshot_horizon(db)
+    stmt = (
+        select(*CALENDAR_COLUMNS, Appointment.change_xid)
+        .join(Client, Client.id == Appointment.client_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .where(
+            Appointment.shop_id == current_user.shop_id,
+            tuple_(Appointment.change_xid, Appointment.id) > since_position,
+            Appointment.change_xid < horizon
+        )
+        .order_by(Appointment.change_xid, Appointment.id)
+        .limit(limit + 1)
+    )
+    entries = _calendar_entries(await db.execute(stmt))
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    positions = [(entry.pop("change_xid"), entry["id"]) for entry in entries]
+    for entry in entries:
+        entry["deleted"] = entry["status"] == AppointmentStatus.CANCELLED.value
+
+    if has_more:
+        cursor = positions[-1]
+    else:
+        # Everything before the horizon has been returned
+        cursor = max(since_position, (horizon, 0))
+    return _json_response({"changes": entries, "cursor": format_cursor(*cursor), "has_more": has_more})
+
+def _calendar_entries(result) -> List[dict]:
+    """Rows of CALENDAR_COLUMNS (and any extra columns) as JSON-ready dicts."""
+    keys = list(result.keys())
+    start, end, state = keys.index("start_time"), keys.index("end_time"), keys.index("status")
+    entries = []
+    for row in result.tuples():
+        row = list(row)
+        row[start], row[end], row[state] = row[start].isoformat(), row[end].isoformat(), row[state].value
+        entries.append(dict(zip(keys, row)))
+    return entries
+
+def _json_response(content, headers: dict = None) -> Response:
+    # Already JSON-ready: skips the response model's per-row validation
+    return Response(
+        content=json.dumps(content, ensure_ascii=False), media_type="application/json", headers=headers
+    )
 
 @router.get("/{id}", response_model=AppointmentRead)
 async def read_appointment(
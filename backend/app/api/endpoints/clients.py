@@ -1,20 +1,23 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.db.session import get_db
 from app.api import deps
+from app.core.clients import MIN_SEARCH_LENGTH, search_clients
 from app.models.models import Client, User, UserRole
 from pydantic import BaseModel
 
 router = APIRouter()
 
+STAFF_ROLES = [UserRole.ADMIN, UserRole.MANAGER, UserRole.STAFF]
+
 class ClientOut(BaseModel):
     id: int
-    telegram_id: int
+    telegram_id: int | None = None
     full_name: str
-    phone: str
+    phone: str | None = None
     vehicle_info: str | None = None
 
     class Config:
@@ -31,10 +34,25 @@ async def read_clients(
     Retrieve clients.
     """
     # Only allow staff/admin/manager to see clients
-    if current_user.role not in [UserRole.ADMIN, UserRole.MANAGER, UserRole.STAFF]:
+    if current_user.role not in STAFF_ROLES:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
     stmt = select(Client).offset(skip).limit(limit)
     result = await db.execute(stmt)
     clients = result.scalars().all()
     return clients
+
+@router.get("/search", response_model=List[ClientOut])
+async def search(
+    q: str = Query(..., min_length=MIN_SEARCH_LENGTH, max_length=100),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Search clients by name, vehicle or phone prefix, best matches first.
+    """
+    if current_user.role not in STAFF_ROLES:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return await search_clients(db, q, skip, limit)
@@ -0,0 +1,118 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+
+from app.api import deps
+from app.db.session import async_session_local
+from app.models.models import Appointment, AppointmentStatus, Client, Service, User, UserRole
+
+router = APIRouter()
+
+# Rows fetched from the server-side cursor, and written, per chunk
+EXPORT_BATCH_SIZE = 1000
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _csv_cell(value):
+    # Client names, phones and vehicles are free text: quote anything a
+    # spreadsheet would run as a formula
+    value = _plain(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+async def _export_rows(stmt: Select, export_format: ExportFormat) -> AsyncIterator[str]:
+    # Runs after the request's dependencies are closed: uses its own session
+    async with async_session_local() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        keys = list(result.keys())
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(keys)
+        async for partition in result.partitions():
+            if export_format == "csv":
+                writer.writerows([_csv_cell(value) for value in row] for row in partition)
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = "".join(
+                    json.dumps(dict(zip(keys, map(_plain, row))), ensure_ascii=False) + "\n"
+                    for row in partition
+                )
+            yield chunk
+        if export_format == "csv" and buffer.tell():
+            # Header of an empty export
+            yield buffer.getvalue()
+
+def _export(stmt: Select, name: str, export_format: ExportFormat) -> StreamingResponse:
+    return StreamingResponse(
+        _export_rows(stmt, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+@router.get("/appointments")
+async def export_appointments(
+    format: ExportFormat = "ndjson",
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[AppointmentStatus] = None,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """
+    Appointments of the user's shop starting in [date_from, date_to), with
+    client and service, as NDJSON or CSV. Rows are streamed from a
+    server-side cursor in chunks of EXPORT_BATCH_SIZE, so memory stays flat
+    whatever the number of rows.
+    """
+    stmt = (
+        select(
+            Appointment.id, Appointment.start_time, Appointment.end_time, Appointment.status, Appointment.bay,
+            Appointment.client_id, Client.full_name.label("client_name"), Client.phone.label("client_phone"),
+            Appointment.service_id, Service.name.label("service_name"), Service.base_price.label("service_price"),
+            Appointment.created_at
+        )
+        .join(Client, Client.id == Appointment.client_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .where(Appointment.shop_id == current_user.shop_id)
+        .order_by(Appointment.start_time, Appointment.id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(Appointment.start_time >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Appointment.start_time < date_to)
+    if status is not None:
+        stmt = stmt.where(Appointment.status == status)
+    return _export(stmt, "appointments", format)
+
+@router.get("/clients")
+async def export_clients(
+    format: ExportFormat = "ndjson",
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """All clients as NDJSON or CSV, streamed like the appointments export."""
+    stmt = select(
+        Client.id, Client.full_name, Client.phone, Client.telegram_id, Client.vehicle_info
+    ).order_by(Client.id)
+    return _export(stmt, "clients", format)
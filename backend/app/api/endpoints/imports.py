@@ -0,0 +1,94 @@
+import io
+import json
+import logging
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.booking import SlotTakenError
+from app.core.csv_import import CSVImportError, import_csv
+from app.db.session import get_db
+from app.models.models import User, UserRole
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Progress of an import stays readable this long after its last update
+PROGRESS_TTL_SECONDS = 3600
+
+class ImportResult(BaseModel):
+    kind: str
+    read: int
+    inserted: int
+    updated: int
+    skipped: int
+    conflicts: int = 0
+
+class ImportProgress(BaseModel):
+    stage: str
+    rows: int
+
+def _progress_key(import_id: str) -> str:
+    return f"import_progress:{import_id}"
+
+def _progress_reporter(import_id: Optional[str]):
+    if import_id is None:
+        return None
+
+    async def report(stage: str, rows: int) -> None:
+        logger.info(f"Import {import_id}: {stage} {rows}")
+        try:
+            await RedisService.get_redis().set(
+                _progress_key(import_id), json.dumps({"stage": stage, "rows": rows}), ex=PROGRESS_TTL_SECONDS
+            )
+        except Exception as e:
+            # Progress is best effort, the import goes on
+            logger.warning(f"Import progress not stored: {e}")
+
+    return report
+
+@router.post("/{kind}", response_model=ImportResult)
+async def import_file(
+    kind: Literal["clients", "services", "appointments"],
+    file: UploadFile = File(...),
+    import_id: Optional[str] = Query(None, max_length=64),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN]))
+):
+    """
+    Imports a CSV export (UTF-8, header row) in one transaction. The upload is
+    spooled to disk and streamed through COPY, so memory use does not depend
+    on the file size. Pass an ``import_id`` to follow the progress on
+    ``GET /imports/progress/{import_id}`` while the request runs.
+    """
+    report = _progress_reporter(import_id)
+    # Read and parsed in a worker thread by import_csv, not on the event loop
+    csv_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = await import_csv(db, kind, csv_file, current_user.shop_id, report)
+    except CSVImportError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=422, detail="File is not UTF-8 encoded")
+    except SlotTakenError:
+        raise HTTPException(status_code=409, detail="Schedule changed during the import, try again")
+    finally:
+        csv_file.detach()
+    if report:
+        await report("done", result["read"])
+    return result
+
+@router.get("/progress/{import_id}", response_model=ImportProgress)
+async def read_import_progress(
+    import_id: str,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN]))
+):
+    progress = await RedisService.get_redis().get(_progress_key(import_id))
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return json.loads(progress)
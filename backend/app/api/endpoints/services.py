@@ -1,11 +1,11 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.db.session import get_db
 from app.models.models import Service, User, UserRole
 from app.api import deps
+from app.services.service_catalog import ServiceCatalog
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -34,13 +34,13 @@ async def create_service(
     db.add(db_service)
     await db.commit()
     await db.refresh(db_service)
+    await ServiceCatalog.invalidate()
     return db_service
 
 @router.get("/", response_model=List[ServiceRead])
 async def read_services(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Service).offset(skip).limit(limit))
-    services = result.scalars().all()
-    return services
+    services = await ServiceCatalog.all(db)
+    return services[skip:skip + limit]
 
 @router.put("/{service_id}", response_model=ServiceRead)
 async def update_service(
@@ -59,6 +59,7 @@ async def update_service(
     
     await db.commit()
     await db.refresh(service)
+    await ServiceCatalog.invalidate()
     return service
 
 @router.delete("/{service_id}", response_model=ServiceRead)
@@ -73,4 +74,5 @@ async def delete_service(
     
     await db.delete(service)
     await db.commit()
+    await ServiceCatalog.invalidate()
     return service
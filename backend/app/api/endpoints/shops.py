@@ -1,18 +1,27 @@
-from typing import List
+from datetime import date, time
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
 
 from app.db.session import get_db
-from app.models.models import Shop, User, UserRole
+from app.models.models import Shop, ShopBreak, ShopScheduleException, ShopWorkingHours, User, UserRole
 from app.api import deps
-from pydantic import BaseModel
+from app.core.schedule import invalidate_shop_schedule
+from app.services.slot_cache import SlotCache
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
 class ShopCreate(BaseModel):
     name: str
     address: str
+    capacity: int = Field(1, ge=1, description="Number of bays served in parallel")
+
+class ShopUpdate(BaseModel):
+    name: Optional[str] = None
+    address: Optional[str] = None
+    capacity: Optional[int] = Field(None, ge=1)
 
 class ShopRead(ShopCreate):
     id: int
@@ -25,7 +34,7 @@ async def create_shop(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.require_role([UserRole.ADMIN]))
 ):
-    db_shop = Shop(name=shop.name, address=shop.address)
+    db_shop = Shop(name=shop.name, address=shop.address, capacity=shop.capacity)
     db.add(db_shop)
     await db.commit()
     await db.refresh(db_shop)
@@ -36,3 +45,107 @@ async def read_shops(skip: int = 0, limit: int = 100, db: AsyncSession = Depends
     result = await db.execute(select(Shop).offset(skip).limit(limit))
     shops = result.scalars().all()
     return shops
+
+@router.patch("/{shop_id}", response_model=ShopRead)
+async def update_shop(
+    shop_id: int,
+    shop_in: ShopUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN]))
+):
+    shop = await db.get(Shop, shop_id)
+    if not shop:
+        raise HTTPException(status_code=404, detail="Shop not found")
+
+    capacity_changed = shop_in.capacity is not None and shop_in.capacity != shop.capacity
+    for field, value in shop_in.model_dump(exclude_none=True).items():
+        setattr(shop, field, value)
+
+    await db.commit()
+    await db.refresh(shop)
+
+    if capacity_changed:
+        await invalidate_shop_schedule(shop_id)
+        await SlotCache.invalidate_shop(shop_id)
+    return shop
+
+class WorkingHoursItem(BaseModel):
+    weekday: int = Field(..., ge=0, le=6, description="0 = Monday")
+    open_time: time
+    close_time: time
+
+class BreakItem(BaseModel):
+    weekday: Optional[int] = Field(None, ge=0, le=6, description="Omit for every day")
+    start_time: time
+    end_time: time
+
+class ScheduleExceptionItem(BaseModel):
+    day: date
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+
+class ShopSchedule(BaseModel):
+    working_hours: List[WorkingHoursItem] = []
+    breaks: List[BreakItem] = []
+    exceptions: List[ScheduleExceptionItem] = []
+
+async def _read_schedule(shop_id: int, db: AsyncSession) -> ShopSchedule:
+    hours = await db.execute(
+        select(ShopWorkingHours)
+        .where(ShopWorkingHours.shop_id == shop_id)
+        .order_by(ShopWorkingHours.weekday, ShopWorkingHours.open_time)
+    )
+    breaks = await db.execute(
+        select(ShopBreak).where(ShopBreak.shop_id == shop_id).order_by(ShopBreak.start_time)
+    )
+    exceptions = await db.execute(
+        select(ShopScheduleException)
+        .where(ShopScheduleException.shop_id == shop_id)
+        .order_by(ShopScheduleException.day)
+    )
+    return ShopSchedule(
+        working_hours=[WorkingHoursItem.model_validate(h, from_attributes=True) for h in hours.scalars()],
+        breaks=[BreakItem.model_validate(b, from_attributes=True) for b in breaks.scalars()],
+        exceptions=[ScheduleExceptionItem.model_validate(e, from_attributes=True) for e in exceptions.scalars()],
+    )
+
+@router.get("/{shop_id}/schedule", response_model=ShopSchedule)
+async def read_shop_schedule(shop_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Weekly working hours, breaks and date exceptions of a shop.
+    No working hours means the default 09:00-18:00 every day.
+    """
+    return await _read_schedule(shop_id, db)
+
+@router.put("/{shop_id}/schedule", response_model=ShopSchedule)
+async def update_shop_schedule(
+    shop_id: int,
+    schedule: ShopSchedule,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.MANAGER]))
+):
+    """
+    Replaces the whole schedule of a shop.
+    """
+    if shop_id != current_user.shop_id:
+        raise HTTPException(status_code=403, detail="Not authorized to update this shop")
+
+    spans = [(h.open_time, h.close_time) for h in schedule.working_hours]
+    spans += [(b.start_time, b.end_time) for b in schedule.breaks]
+    spans += [(e.open_time, e.close_time) for e in schedule.exceptions if e.open_time and e.close_time]
+    if any(end <= start for start, end in spans):
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    await db.execute(delete(ShopWorkingHours).where(ShopWorkingHours.shop_id == shop_id))
+    await db.execute(delete(ShopBreak).where(ShopBreak.shop_id == shop_id))
+    await db.execute(delete(ShopScheduleException).where(ShopScheduleException.shop_id == shop_id))
+    db.add_all([ShopWorkingHours(shop_id=shop_id, **h.model_dump()) for h in schedule.working_hours])
+    db.add_all([ShopBreak(shop_id=shop_id, **b.model_dump()) for b in schedule.breaks])
+    db.add_all([ShopScheduleException(shop_id=shop_id, **e.model_dump()) for e in schedule.exceptions])
+    await db.commit()
+
+    # Recompile on next use and drop slots computed with the old hours
+    await invalidate_shop_schedule(shop_id)
+    await SlotCache.invalidate_shop(shop_id)
+
+    return await _read_schedule(shop_id, db)
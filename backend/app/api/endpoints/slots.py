@@ -1,13 +1,34 @@
-from datetime import date, datetime
-from typing import List
-from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api import deps
 from app.db.session import get_db
-from app.core.slots import get_available_slots
+from app.core.slots import (
+    NEXT_AVAILABLE_HORIZON_DAYS, get_available_slots_by_duration, get_available_slots_range,
+    free_bays, get_available_slots, get_cached_available_slots, get_next_available_slots, nearest_slots, slot_flight
+)
+from app.core.config import settings
+from app.services.slot_cache import SlotCache
+from app.services.slot_holds import HoldLimitError, SlotHeldError, SlotHolds
+from app.services.service_catalog import ServiceCatalog
 
 router = APIRouter()
 
+class SlotHoldCreate(BaseModel):
+    shop_id: int
+    service_id: int
+    start_time: datetime
+    # Set when rescheduling, so the appointment's own time counts as free
+    appointment_id: Optional[int] = None
+
+class SlotHoldRead(BaseModel):
+    # None when the hold store is unavailable: the booking still goes through
+    hold_id: Optional[str]
+    expires_at: datetime
+
 @router.get("/available", response_model=List[datetime])
 async def get_slots(
     shop_id: int,
@@ -18,4 +39,148 @@ async def get_slots(
     """
     Returns a list of available start times for a given shop and duration on a specific date.
     """
-    return await get_available_slots(shop_id, service_duration, target_date, db)
+    return await get_cached_available_slots(shop_id, service_duration, target_date, db)
+
+@router.get("/next", response_model=List[datetime])
+async def get_next_slots(
+    shop_id: int,
+    service_duration: int,
+    after: Optional[datetime] = Query(None, description="Search from this moment; now if omitted"),
+    limit: int = Query(1, description="Number of slots to return"),
+    horizon_days: int = Query(NEXT_AVAILABLE_HORIZON_DAYS, description="How many days ahead to search"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Returns the earliest available start times from a given moment, across days.
+    An empty list means nothing is free within the horizon.
+    """
+    try:
+        return await get_next_available_slots(
+            shop_id, service_duration, db, after=after, limit=limit, horizon_days=horizon_days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cache-stats")
+async def get_slot_cache_stats():
+    """
+    Returns hit/miss counters of the slot cache for this worker.
+    """
+    return SlotCache.stats()
+
+@router.get("/single-flight-stats")
+async def get_slot_single_flight_stats():
+    """
+    Returns how many concurrent slot queries were coalesced in this worker, per shop-day.
+    """
+    return slot_flight.stats()
+
+@router.get("/range", response_model=Dict[date, Union[List[datetime], int]])
+async def get_slots_range(
+    shop_id: int,
+    service_duration: int,
+    start_date: date = Query(..., description="First day of the range (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Last day of the range, inclusive (YYYY-MM-DD)"),
+    counts_only: bool = Query(False, description="Return only the number of free slots per day"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Returns available start times (or their counts) for every day in a date range.
+    """
+    try:
+        days = await get_available_slots_range(shop_id, service_duration, start_date, end_date, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if counts_only:
+        return {day: len(slots) for day, slots in days.items()}
+    return days
+
+@router.get("/by-duration", response_model=Dict[int, List[datetime]])
+async def get_slots_by_duration(
+    shop_id: int,
+    target_date: date = Query(..., description="Date to check for slots (YYYY-MM-DD)"),
+    durations: Optional[List[int]] = Query(None, description="Service durations in minutes; all services if omitted"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Returns available start times keyed by service duration for a specific date.
+    """
+    if not durations:
+        durations = sorted({s.duration_minutes for s in await ServiceCatalog.all(db)})
+    return await get_available_slots_by_duration(shop_id, durations, target_date, db)
+
+@router.post("/hold", response_model=SlotHoldRead)
+async def hold_slot(
+    hold: SlotHoldCreate,
+    db: AsyncSession = Depends(get_db),
+    telegram_id: int = Depends(deps.get_webapp_user_id)
+):
+    """
+    Holds a free slot for SLOT_HOLD_TTL_SECONDS while the customer confirms.
+    Held slots disappear from the available slots of everyone else; the
+    booking made with the hold id consumes it. Only WebApp customers can hold,
+    at most SLOT_HOLDS_PER_USER slots at a time.
+    """
+    service = await ServiceCatalog.get(db, hold.service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    start_time = hold.start_time.replace(tzinfo=None)
+    if hold.appointment_id:
+        available = await get_available_slots(
+            hold.shop_id,
+            service.duration_minutes,
+            start_time.date(),
+            db,
+            exclude_appointment_id=hold.appointment_id
+        )
+    else:
+        available = await get_cached_available_slots(
+            hold.shop_id, service.duration_minutes, start_time.date(), db
+        )
+    taken = start_time not in available
+    if not taken:
+        bays = await free_bays(
+            hold.shop_id, start_time, service.duration_minutes, db, hold.appointment_id
+        )
+        try:
+            hold_id = await SlotHolds.hold(
+                hold.shop_id,
+                start_time,
+                start_time + timedelta(minutes=service.duration_minutes),
+                telegram_id,
+                bays
+            )
+        except SlotHeldError:
+            taken = True
+        except HoldLimitError:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many slots held; release one or wait for it to expire"
+            )
+    if taken:
+        # A slot refused by the hold store is still in ``available``
+        others = [slot for slot in available if slot != start_time]
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Slot already taken",
+                "alternatives": [slot.isoformat() for slot in nearest_slots(others, start_time)]
+            }
+        )
+    return SlotHoldRead(
+        hold_id=hold_id,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.SLOT_HOLD_TTL_SECONDS)
+    )
+
+@router.delete("/hold")
+async def release_slot_hold(
+    shop_id: int,
+    hold_id: str,
+    telegram_id: int = Depends(deps.get_webapp_user_id)
+):
+    """
+    Releases one of the customer's holds early, e.g. when they pick another time.
+    """
+    return {"released": await SlotHolds.release(shop_id, hold_id, telegram_id)}
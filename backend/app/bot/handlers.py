@@ -1,17 +1,26 @@
 import json
 import logging
 from datetime import datetime, timedelta, timezone as tz
+from typing import List
 from aiogram import Router, F, html
 from aiogram.filters import CommandStart
 from aiogram.types import Message, WebAppInfo, InlineKeyboardMarkup, InlineKeyboardButton
 from sqlalchemy import select, and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
 from app.db.session import async_session_local
-from app.models.models import Client, Appointment, Service, AppointmentStatus
+from app.models.models import Client, Appointment, AppointmentStatus
 from app.bot.keyboards import get_main_keyboard, get_appointment_keyboard
-from app.core.slots import get_available_slots
-from app.services.redis_service import RedisService
+from app.core.slots import (
+    INACTIVE_STATUSES, get_available_slots, get_cached_available_slots, get_next_available_slots, nearest_slots
+)
+from app.core.clients import normalize_phone, upsert_client
+from app.core.booking import SlotTakenError, StaleVersionError, booking_guard, insert_appointment, move_appointment
+from app.services.slot_cache import SlotCache
+from app.services.slot_holds import SlotHolds
+from app.services.service_catalog import ServiceCatalog
+from app.services.outbox import OutboxRelay, add_event
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -129,6 +138,19 @@ def _waitlist_msg(service_name: str, date_str: str) -> str:
     )
 
 
+def _slot_taken_msg(alternatives: List[datetime]) -> str:
+    msg = (
+        "⏰ <b>Время занято</b>\n\n"
+        "Это время уже занято.\n"
+    )
+    if len(alternatives) == 1:
+        msg += f"Ближайшее свободное время: <b>{alternatives[0].strftime('%d.%m.%Y  %H:%M')}</b>\n"
+    elif alternatives:
+        times = ", ".join(slot.strftime('%H:%M') for slot in alternatives)
+        msg += f"Свободно {alternatives[0].strftime('%d.%m.%Y')}: <b>{times}</b>\n"
+    return msg + "Пожалуйста, выберите другое."
+
+
 # ──────────────────────────────────────────────
 #  Handlers
 # ──────────────────────────────────────────────
@@ -157,29 +179,32 @@ async def command_start_handler(message: Message) -> None:
 @router.message(F.contact)
 async def contact_handler(message: Message):
     contact = message.contact
-    phone = contact.phone_number.replace("+", "")
+    phone = normalize_phone(contact.phone_number)
+    if phone is None:
+        return
 
     async with async_session_local() as db:
-        stmt = select(Client).where(Client.phone == phone)
-        result = await db.execute(stmt)
-        client = result.scalar_one_or_none()
-
-        if client:
-            client.telegram_id = message.from_user.id
+        try:
+            client = await upsert_client(db, message.from_user.full_name, phone, message.from_user.id)
             await db.commit()
+        except IntegrityError:
+            # The number is on a client record other than this Telegram user's
+            await db.rollback()
+            await message.answer(
+                "⚠️ <b>Номер уже привязан к другой карточке клиента</b>\n\n"
+                "Обратитесь к администратору автосервиса.",
+                parse_mode="HTML",
+                reply_markup=get_main_keyboard()
+            )
+            return
+
+        if not client.created:
             await message.answer(
                 _contact_linked_msg(client.full_name, phone),
                 parse_mode="HTML",
                 reply_markup=get_main_keyboard()
             )
         else:
-            new_client = Client(
-                full_name=message.from_user.full_name,
-                phone=phone,
-                telegram_id=message.from_user.id
-            )
-            db.add(new_client)
-            await db.commit()
             await message.answer(
                 _contact_new_msg(),
                 parse_mode="HTML",
@@ -258,26 +283,28 @@ async def cancel_appointment_handler(callback_query: Message):
     async with async_session_local() as db:
         appt = await db.get(Appointment, appt_id)
         if appt:
-            appt.status = AppointmentStatus.CANCELLED
+            was_active = appt.status not in INACTIVE_STATUSES
+            try:
+                await move_appointment(db, appt, status=AppointmentStatus.CANCELLED)
+            except StaleVersionError:
+                await callback_query.answer("Запись изменилась, попробуйте ещё раз.")
+                return
+            # Broadcast update to dashboard
+            add_event(db, "STATUS_UPDATE", {
+                "id": appt.id,
+                "shop_id": appt.shop_id,
+                "status": "cancelled"
+            })
             await db.commit()
+            OutboxRelay.wake()
+            if was_active:
+                await SlotCache.invalidate(appt.shop_id, appt.start_time)
             await callback_query.message.edit_text(
                 f"❌ <b>Запись #{appt_id} отменена</b>\n\n"
                 f"<i>Вы можете создать новую запись\n"
                 f"в любое время.</i>",
                 parse_mode="HTML"
             )
-
-            # Broadcast update to dashboard
-            redis = RedisService.get_redis()
-            msg = {
-                "type": "STATUS_UPDATE",
-                "data": {
-                    "id": appt.id,
-                    "shop_id": appt.shop_id,
-                    "status": "cancelled"
-                }
-            }
-            await redis.publish("appointments_updates", json.dumps(msg))
         else:
             await callback_query.answer("Запись не найдена.")
 
@@ -300,6 +327,7 @@ async def web_app_data_handler(message: Message):
         date_str = data.get("date")
         appointment_id = data.get("appointment_id")
         is_waitlist = data.get("is_waitlist", False)
+        hold_id = data.get("hold_id")
 
         if not service_id or not date_str:
             await message.answer(
@@ -308,11 +336,15 @@ async def web_app_data_handler(message: Message):
             )
             return
 
+        # Only the customer's own hold may free its slot for this booking
+        if hold_id and not await SlotHolds.owns(hold_id, message.from_user.id):
+            hold_id = None
+
         start_time = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
         start_time_naive = start_time.replace(tzinfo=None)
 
         async with async_session_local() as db:
-            service = await db.get(Service, service_id)
+            service = await ServiceCatalog.get(db, int(service_id))
             if not service:
                 await message.answer(
                     "⚠️ <b>Ошибка</b>\n\nУслуга не найдена.",
@@ -332,41 +364,47 @@ async def web_app_data_handler(message: Message):
                     return
 
             if not is_waitlist:
-                available_slots = await get_available_slots(
-                    shop_id=1,
-                    service_duration_minutes=service.duration_minutes,
-                    date=start_time_naive.date(),
-                    db=db,
-                    exclude_appointment_id=int(appointment_id) if appointment_id else None
-                )
+                if appointment_id:
+                    available_slots = await get_available_slots(
+                        shop_id=1,
+                        service_duration_minutes=service.duration_minutes,
+                        date=start_time_naive.date(),
+                        db=db,
+                        exclude_appointment_id=int(appointment_id),
+                        ignore_hold_id=hold_id
+                    )
+                else:
+                    available_slots = await get_cached_available_slots(
+                        shop_id=1,
+                        service_duration_minutes=service.duration_minutes,
+                        date=start_time_naive.date(),
+                        db=db,
+                        ignore_hold_id=hold_id
+                    )
 
                 if not any(slot == start_time_naive for slot in available_slots):
-                    await message.answer(
-                        "⏰ <b>Время занято</b>\n\n"
-                        "Это время уже занято.\n"
-                        "Пожалуйста, выберите другое.",
-                        parse_mode="HTML"
-                    )
+                    # Suggest the nearest free times of that day, already at hand
+                    alternatives = nearest_slots(available_slots, start_time_naive)
+                    if not alternatives:
+                        alternatives = await get_next_available_slots(
+                            shop_id=1,
+                            service_duration_minutes=service.duration_minutes,
+                            db=db,
+                            after=start_time_naive
+                        )
+                    await message.answer(_slot_taken_msg(alternatives), parse_mode="HTML")
                     return
 
             if not appointment_id:
-                # Create new client or find existing
-                stmt = select(Client).where(Client.telegram_id == message.from_user.id)
-                result = await db.execute(stmt)
-                client = result.scalar_one_or_none()
-
-                if not client:
-                    client = Client(
-                        telegram_id=message.from_user.id,
-                        full_name=message.from_user.full_name,
-                        phone="unknown"
-                    )
-                    db.add(client)
-                    await db.flush()
+                # Find or create the client of this Telegram user
+                client = await upsert_client(
+                    db, message.from_user.full_name, telegram_id=message.from_user.id
+                )
             else:
                 client = await db.get(Client, existing_appt.client_id)
 
-            end_time = start_time_naive + timedelta(minutes=service.duration_minutes)
+            duration = service.duration_minutes
+            end_time = start_time_naive + timedelta(minutes=duration)
 
             # Mark as UTC-aware so asyncpg doesn't convert from local timezone
             start_time_utc = start_time_naive.replace(tzinfo=tz.utc)
@@ -376,26 +414,70 @@ async def web_app_data_handler(message: Message):
                 AppointmentStatus.CONFIRMED if appointment_id else AppointmentStatus.NEW
             )
 
-            if appointment_id:
-                existing_appt.service_id = service_id
-                existing_appt.start_time = start_time_utc
-                existing_appt.end_time = end_time_utc
-                existing_appt.status = status
-                appt = existing_appt
-            else:
-                new_appt = Appointment(
+            old_start_time = existing_appt.start_time if existing_appt else None
+
+            # Single INSERT/UPDATE; the exclusion constraint (or the optional range lock) settles races
+            try:
+                async with booking_guard(db, 1, start_time_utc, end_time_utc, status):
+                    if appointment_id:
+                        appt = await move_appointment(
+                            db,
+                            existing_appt,
+                            service_id=service_id,
+                            start_time=start_time_utc,
+                            end_time=end_time_utc,
+                            status=status
+                        )
+                    else:
+                        appt = await insert_appointment(
+                            db,
+                            shop_id=1,
+                            client_id=client.id,
+                            service_id=service_id,
+                            start_time=start_time_utc,
+                            end_time=end_time_utc,
+                            status=status
+                        )
+                    event_type = "WAITLIST_ADD" if is_waitlist else (
+                        "APPOINTMENT_UPDATED" if appointment_id else "NEW_APPOINTMENT"
+                    )
+                    add_event(db, event_type, {
+                        "id": appt.id,
+                        "shop_id": appt.shop_id,
+                        "start_time": appt.start_time.isoformat(),
+                        "status": appt.status.value
+                    })
+                    await db.commit()
+                OutboxRelay.wake()
+            except StaleVersionError:
+                # Staff changed the appointment while the customer was rescheduling
+                await message.answer(
+                    "⚠️ <b>Запись изменилась</b>\n\nОткройте её заново и повторите перенос.",
+                    parse_mode="HTML"
+                )
+                return
+            except SlotTakenError:
+                available_slots = await get_available_slots(
                     shop_id=1,
-                    client_id=client.id,
-                    service_id=service_id,
-                    start_time=start_time_utc,
-                    end_time=end_time_utc,
-                    status=status
+                    service_duration_minutes=duration,
+                    date=start_time_naive.date(),
+                    db=db,
+                    exclude_appointment_id=int(appointment_id) if appointment_id else None,
+                    ignore_hold_id=hold_id
+                )
+                await message.answer(
+                    _slot_taken_msg(nearest_slots(available_slots, start_time_naive)),
+                    parse_mode="HTML"
                 )
-                db.add(new_appt)
-                appt = new_appt
+                return
 
-            await db.commit()
-            await db.refresh(appt)
+            # The hold has become the booking
+            if hold_id:
+                await SlotHolds.release(1, hold_id, message.from_user.id)
+
+            # A new waitlist entry does not occupy the calendar
+            if appointment_id or not is_waitlist:
+                await SlotCache.invalidate(appt.shop_id, old_start_time, appt.start_time)
 
             if is_waitlist:
                 msg = _waitlist_msg(
@@ -411,24 +493,6 @@ async def web_app_data_handler(message: Message):
 
             await message.answer(msg, parse_mode="HTML")
 
-            try:
-                redis = RedisService.get_redis()
-                event_type = "WAITLIST_ADD" if is_waitlist else (
-                    "APPOINTMENT_UPDATED" if appointment_id else "NEW_APPOINTMENT"
-                )
-                broadcast_message = {
-                    "type": event_type,
-                    "data": {
-                        "id": appt.id,
-                        "shop_id": appt.shop_id,
-                        "start_time": appt.start_time.isoformat(),
-                        "status": appt.status.value
-                    }
-                }
-                await redis.publish("appointments_updates", json.dumps(broadcast_message))
-            except Exception as e:
-                logger.error(f"Failed to publish to Redis: {e}")
-
     except Exception as e:
         logger.error(f"Exception in web_app_data_handler: {e}")
         await message.answer(
@@ -498,9 +562,8 @@ async def any_message(message: Message):
     from aiogram.utils.chat_action import ChatActionSender
 
     async with async_session_local() as db:
-        # 1. Fetch all services for AI context
-        result = await db.execute(select(Service))
-        services = result.scalars().all()
+        # 1. Services for AI context (cached catalog)
+        services = await ServiceCatalog.all(db)
 
         # 2. Show "typing" indicator
         async with ChatActionSender.typing(bot=message.bot, chat_id=message.chat.id):
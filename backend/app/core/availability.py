@@ -0,0 +1,161 @@
+"""
+Availability engine working on integer minute intervals and minute bitmaps.
+
+All times are expressed as minutes from the start of the day (00:00), so the
+hot path never touches datetime arithmetic. Intervals are half-open
+``(start, end)`` tuples. A day is also represented as a bitmap (a Python int)
+where bit ``m`` stands for minute ``m``; masks combine with plain ``&``/``|``.
+"""
+import math
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+Interval = Tuple[int, int]
+
+SLOT_STEP_MINUTES = 30
+DAY_MINUTES = 24 * 60
+
+
+def to_minute_interval(start: datetime, end: datetime, day_start: datetime) -> Interval:
+    """
+    Converts a datetime range into minute offsets from ``day_start``.
+
+    With a naive ``day_start`` timezone info is dropped (wall-clock comparison,
+    as before); an aware ``day_start`` compares aware values exactly. The start
+    is floored and the end ceiled, so an interval with seconds still blocks
+    every minute it touches.
+    """
+    if day_start.tzinfo is None or start.tzinfo is None:
+        start, end, day_start = start.replace(tzinfo=None), end.replace(tzinfo=None), day_start.replace(tzinfo=None)
+    start_offset = (start - day_start).total_seconds() / 60
+    end_offset = (end - day_start).total_seconds() / 60
+    return math.floor(start_offset), math.ceil(end_offset)
+
+
+def saturated_intervals(intervals: Iterable[Interval], capacity: int = 1) -> List[Interval]:
+    """
+    Returns the sorted, disjoint intervals during which at least ``capacity``
+    of the given intervals overlap, using one sweep over start/end events.
+
+    With capacity 1 this is the union of the intervals. Ends sort before
+    starts at the same minute, so back-to-back bookings never stack.
+    """
+    events: List[Tuple[int, int]] = []
+    for start, end in intervals:
+        if end > start:
+            events.append((start, 1))
+            events.append((end, -1))
+    events.sort()
+
+    saturated: List[Interval] = []
+    count = 0
+    opened = None
+    for minute, delta in events:
+        count += delta
+        if opened is None and count >= capacity:
+            opened = minute
+        elif opened is not None and count < capacity:
+            if minute > opened:
+                if saturated and saturated[-1][1] == opened:
+                    saturated[-1] = (saturated[-1][0], minute)
+                else:
+                    saturated.append((opened, minute))
+            opened = None
+    return saturated
+
+
+def peak_overlap(intervals: Iterable[Interval], window_start: int, window_end: int) -> int:
+    """
+    Largest number of the given intervals overlapping at any minute of
+    ``[window_start, window_end)``.
+    """
+    events: List[Tuple[int, int]] = []
+    for start, end in intervals:
+        start, end = max(start, window_start), min(end, window_end)
+        if end > start:
+            events.append((start, 1))
+            events.append((end, -1))
+    events.sort()
+
+    peak = count = 0
+    for _, delta in events:
+        count += delta
+        peak = max(peak, count)
+    return peak
+
+
+def interval_mask(start: int, end: int) -> int:
+    """
+    Bitmap with the minutes of ``[start, end)`` set, clipped to the day.
+    """
+    start = max(start, 0)
+    end = min(end, DAY_MINUTES)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def intervals_mask(intervals: Iterable[Interval]) -> int:
+    mask = 0
+    for start, end in intervals:
+        mask |= interval_mask(start, end)
+    return mask
+
+
+def fitting_starts_mask(free: int, duration: int) -> int:
+    """
+    Bitmap of minutes ``c`` such that every minute of ``[c, c + duration)`` is
+    free. Uses log2(duration) shift-and steps instead of one per minute.
+    """
+    fit = free
+    span = 1
+    while span < duration:
+        shift = min(span, duration - span)
+        fit &= fit >> shift
+        span += shift
+    return fit
+
+
+@lru_cache(maxsize=None)
+def grid_mask(origin: int = 0, step: int = SLOT_STEP_MINUTES) -> int:
+    """
+    Bitmap of the candidate start minutes ``origin + k * step`` (k >= 0).
+    """
+    mask = 0
+    for minute in range(origin, DAY_MINUTES, step):
+        mask |= 1 << minute
+    return mask
+
+
+def mask_minutes(mask: int) -> List[int]:
+    """
+    Returns the set bits of ``mask`` in ascending order.
+    """
+    minutes: List[int] = []
+    while mask:
+        low = mask & -mask
+        minutes.append(low.bit_length() - 1)
+        mask ^= low
+    return minutes
+
+
+def starts_in_mask(
+    free: int,
+    duration: int,
+    not_before: int = 0,
+    origin: int = 0,
+    step: int = SLOT_STEP_MINUTES,
+) -> List[int]:
+    """
+    Returns every grid start at or after ``not_before`` whose slot of
+    ``duration`` lies entirely inside the ``free`` bitmap.
+
+    The free bitmap does not depend on the duration, so it can be computed
+    once and reused for any number of service durations.
+    """
+    candidates = fitting_starts_mask(free, duration) & grid_mask(origin, step)
+    if not_before > 0:
+        candidates &= ~((1 << not_before) - 1)
+    return mask_minutes(candidates)
+
@@ -0,0 +1,324 @@
+"""
+Booking writes guarded by the appointments_no_overlap exclusion constraint.
+
+Every active appointment occupies one bay of its shop and Postgres rejects
+two active appointments overlapping on the same bay. The bay is picked inside
+the write itself (the lowest bay free for the whole interval), so a booking is
+one INSERT and a reschedule one UPDATE: no lock and no separate overlap check.
+A write that finds no free bay affects no row; a concurrent write that slips
+in between is rejected by the constraint. Both surface as SlotTakenError.
+
+The number of bays is read from shops.capacity by the write itself, never
+from the per-process schedule cache: a copy that missed a capacity cut
+would otherwise keep handing out the removed bays.
+"""
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime
+from typing import Any, AsyncContextManager, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import ARRAY, DateTime, Integer, Select, bindparam, cast, func, insert, literal, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.models import Appointment, AppointmentStatus, Shop
+from app.services.range_lock import RangeLock, RangeLockedError
+from app.core.slots import INACTIVE_STATUSES, active_status_filter
+
+# SQLSTATE of exclusion_violation
+EXCLUSION_VIOLATION = "23P01"
+
+class StaleVersionError(Exception):
+    """
+    The appointment changed since the caller read it. ``current`` is the
+    appointment with its current state loaded, or None if it is gone.
+    """
+    def __init__(self, current: Optional[Appointment]):
+        super().__init__()
+        self.current = current
+
+class SlotTakenError(Exception):
+    """No bay of the shop is free for the requested interval."""
+
+def _is_overlap_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "sqlstate", None) == EXCLUSION_VIOLATION
+
+def _tstzrange(start, end):
+    return func.tstzrange(start, end, "[)")
+
+@asynccontextmanager
+async def _range_locked(db: AsyncSession, shop_id: int, start_time: datetime, end_time: datetime):
+    capacity = await shop_capacity(db, shop_id)
+    try:
+        async with RangeLock.hold(
+            shop_id, start_time, end_time, settings.BOOKING_LOCK_TTL_SECONDS, limit=capacity
+        ):
+            yield
+    except RangeLockedError as e:
+        raise SlotTakenError() from e
+
+def booking_guard(
+    db: AsyncSession,
+    shop_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    status: AppointmentStatus = AppointmentStatus.NEW
+) -> AsyncContextManager:
+    """
+    Wraps a booking write and its commit. With BOOKING_RANGE_LOCK enabled,
+    a booking overlapping as many in flight as the shop has bays gets
+    SlotTakenError; otherwise the exclusion constraint alone settles races
+    and this is a no-op.
+    """
+    if not settings.BOOKING_RANGE_LOCK or status in INACTIVE_STATUSES:
+        return nullcontext()
+    return _range_locked(db, shop_id, start_time, end_time)
+
+def _capacity(shop_id: int):
+    return select(func.coalesce(Shop.capacity, 1)).where(Shop.id == shop_id).scalar_subquery()
+
+async def shop_capacity(db: AsyncSession, shop_id: int) -> int:
+    """Current number of bays, for writes that plan bays before inserting."""
+    return await db.scalar(select(_capacity(shop_id))) or 1
+
+def free_bay_query(
+    shop_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> Select:
+    """
+    The lowest bay in 1..capacity with no active appointment overlapping
+    [start_time, end_time); no row if every bay is busy. The capacity is
+    read from the shop row by the same statement.
+    """
+    bay = func.generate_series(1, _capacity(shop_id)).table_valued("bay").render_derived(name="bays").c.bay
+    other = aliased(Appointment)
+    start = cast(literal(start_time), DateTime(timezone=True))
+    end = cast(literal(end_time), DateTime(timezone=True))
+    busy = select(other.id).where(
+        other.shop_id == shop_id,
+        other.bay == bay,
+        active_status_filter(other),
+        _tstzrange(other.start_time, other.end_time).op("&&")(_tstzrange(start, end))
+    )
+    if exclude_appointment_id:
+        busy = busy.where(other.id != exclude_appointment_id)
+    return select(bay).where(~busy.exists()).order_by(bay).limit(1)
+
+async def insert_appointment(
+    db: AsyncSession,
+    shop_id: int,
+    client_id: int,
+    service_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    status: AppointmentStatus = AppointmentStatus.NEW
+) -> Appointment:
+    """
+    Books an appointment with a single INSERT ... SELECT and returns it.
+    Waitlist entries do not take a bay and are inserted as they are.
+
+    Raises SlotTakenError if no bay is free. A constraint violation aborts the
+    transaction, so the session is rolled back then and loaded objects expire.
+    """
+    if status in INACTIVE_STATUSES:
+        appt = Appointment(
+            shop_id=shop_id,
+            client_id=client_id,
+            service_id=service_id,
+            start_time=start_time,
+            end_time=end_time,
+            status=status
+        )
+        db.add(appt)
+        await db.flush()
+        return appt
+
+    bay = free_bay_query(shop_id, start_time, end_time).subquery()
+    row = select(
+        literal(shop_id),
+        literal(client_id),
+        literal(service_id),
+        cast(literal(start_time), DateTime(timezone=True)),
+        cast(literal(end_time), DateTime(timezone=True)),
+        cast(literal(status), Appointment.__table__.c.status.type),
+        cast(literal(datetime.utcnow()), DateTime(timezone=True)),
+        bay.c.bay
+    )
+    stmt = (
+        insert(Appointment)
+        .from_select(
+            ["shop_id", "client_id", "service_id", "start_time", "end_time", "status", "created_at", "bay"],
+            row
+        )
+        .returning(Appointment)
+    )
+    try:
+        # The whole row comes back from RETURNING: no SELECT after the insert
+        appt = await db.scalar(select(Appointment).from_statement(stmt))
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_overlap_violation(e):
+            raise SlotTakenError() from e
+        raise
+    if appt is None:
+        raise SlotTakenError()
+    return appt
+
+def _apply_row(appt: Appointment, row: Any) -> None:
+    # Loads the RETURNING columns into the object without another SELECT,
+    # leaving its loaded relationships alone
+    for attr in sa_inspect(Appointment).column_attrs:
+        set_committed_value(appt, attr.key, row._mapping[attr.columns[0]])
+
+async def move_appointment(
+    db: AsyncSession,
+    appt: Appointment,
+    expected_version: Optional[int] = None,
+    **values: Any
+) -> Appointment:
+    """
+    Applies ``values`` (start_time, end_time, service_id, status...) to an
+    appointment with a single conditional UPDATE ... RETURNING: it only
+    matches while the row still has ``expected_version`` (the loaded version
+    by default), bumps the version, and moves the appointment to a free bay
+    when it newly needs one. The returned row is loaded into ``appt``.
+
+    Raises StaleVersionError if someone else updated the appointment first
+    and SlotTakenError if no bay is free, rolling the session back after a
+    constraint violation as insert_appointment does.
+    """
+    if expected_version is None:
+        expected_version = appt.version
+    start_time = values.get("start_time", appt.start_time)
+    end_time = values.get("end_time", appt.end_time)
+    status = values.get("status", appt.status)
+
+    stmt = update(Appointment).where(
+        Appointment.id == appt.id,
+        Appointment.version == expected_version
+    )
+    needs_bay = status not in INACTIVE_STATUSES and (
+        appt.status in INACTIVE_STATUSES or start_time != appt.start_time or end_time != appt.end_time
+    )
+    if needs_bay:
+        bay = free_bay_query(
+            appt.shop_id, start_time, end_time, exclude_appointment_id=appt.id
+        ).scalar_subquery()
+        stmt = stmt.where(bay.is_not(None)).values(bay=bay)
+    stmt = (
+        stmt.values(version=Appointment.version + 1, **values)
+        .returning(*Appointment.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+
+    try:
+        result = await db.execute(stmt)
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_overlap_violation(e):
+            raise SlotTakenError() from e
+        raise
+    row = result.first()
+    if row is None:
+        # Either the version moved on or no bay was free; only a miss pays for this
+        current = await db.execute(
+            select(*Appointment.__table__.columns).where(Appointment.id == appt.id)
+        )
+        current_row = current.first()
+        if current_row is None or current_row.version != expected_version:
+            if current_row is not None:
+                _apply_row(appt, current_row)
+            raise StaleVersionError(appt if current_row is not None else None)
+        raise SlotTakenError()
+    _apply_row(appt, row)
+    return appt
+
+def _array_param(name: str, values: List[Any], item_type) -> Any:
+    # Typed explicitly: unnest() alone gives the server no element type
+    return cast(bindparam(name, values, type_=ARRAY(item_type)), ARRAY(item_type))
+
+async def busy_bays(
+    db: AsyncSession,
+    shop_id: int,
+    intervals: Sequence[Tuple[datetime, datetime]]
+) -> Dict[int, Set[int]]:
+    """
+    Bays taken by active appointments during each interval, keyed by the
+    interval's position. One set-based query for any number of intervals:
+    the candidates are unnested and joined on range overlap.
+    """
+    if not intervals:
+        return {}
+    timestamptz = DateTime(timezone=True)
+    candidates = select(
+        func.unnest(_array_param("positions", list(range(len(intervals))), Integer)).label("position"),
+        func.unnest(_array_param("starts", [start for start, _ in intervals], timestamptz)).label("start_time"),
+        func.unnest(_array_param("ends", [end for _, end in intervals], timestamptz)).label("end_time")
+    ).subquery("candidates")
+    stmt = (
+        select(candidates.c.position, Appointment.bay)
+        .join(
+            Appointment,
+            _tstzrange(Appointment.start_time, Appointment.end_time).op("&&")(
+                _tstzrange(candidates.c.start_time, candidates.c.end_time)
+            )
+        )
+        .where(Appointment.shop_id == shop_id, active_status_filter())
+    )
+    result = await db.execute(stmt)
+    taken: Dict[int, Set[int]] = {}
+    for position, bay in result.all():
+        taken.setdefault(position, set()).add(bay)
+    return taken
+
+def assign_bays(
+    intervals: Sequence[Tuple[datetime, datetime]],
+    taken: Dict[int, Set[int]],
+    capacity: int
+) -> List[Optional[int]]:
+    """
+    Picks the lowest free bay for each interval, in order, given the bays
+    already taken by existing appointments (see busy_bays) and the bays given
+    to earlier intervals of the same batch. None where no bay is free.
+    ``capacity`` should come from shop_capacity.
+    """
+    accepted: Dict[int, List[Tuple[datetime, datetime]]] = {}
+    bays: List[Optional[int]] = []
+    for position, (start, end) in enumerate(intervals):
+        chosen = None
+        for bay in range(1, capacity + 1):
+            if bay in taken.get(position, ()):
+                continue
+            if any(s < end and e > start for s, e in accepted.get(bay, ())):
+                continue
+            chosen = bay
+            break
+        if chosen is not None:
+            accepted.setdefault(chosen, []).append((start, end))
+        bays.append(chosen)
+    return bays
+
+async def insert_appointments(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Inserts already-planned appointments (bay included) in one batched
+    INSERT ... RETURNING and returns their ids in the order of ``rows``.
+
+    Raises SlotTakenError, rolling the session back, if a concurrent booking
+    took one of the bays in the meantime.
+    """
+    if not rows:
+        return []
+    stmt = insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True)
+    try:
+        result = await db.execute(stmt, rows)
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_overlap_violation(e):
+            raise SlotTakenError() from e
+        raise
+    return list(result.scalars().all())
@@ -0,0 +1,48 @@
+"""
+Change cursors for the appointments delta sync.
+
+The appointments_touch trigger stamps every inserted or updated appointment
+with the 64-bit id of the writing transaction (change_xid). A cursor
+``"<xid>.<id>"`` is a position in (change_xid, id) order; the changes of one
+transaction are contiguous in that order.
+
+A sequence value would not do: it is taken when a row is written, not when
+it commits, so a reader could move past a value whose transaction commits
+later and never see that change. Instead readers stop at the horizon, the
+oldest transaction still running: everything below it has committed (or
+rolled back) and no new change can appear there.
+"""
+from typing import Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def format_cursor(xid: int, id: int = 0) -> str:
+    """
+    Cursor after the change of appointment ``id`` in transaction ``xid``;
+    with id 0, the cursor right before everything the transaction changed.
+    """
+    return f"{xid}.{id}"
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    """Raises ValueError for anything format_cursor did not produce."""
+    xid, id = cursor.split(".")
+    xid, id = int(xid), int(id)
+    if xid < 0 or id < 0:
+        raise ValueError(cursor)
+    return xid, id
+
+async def snapshot_horizon(db: AsyncSession) -> int:
+    """
+    Oldest transaction still running: changes below it are final.
+
+    Any long transaction in the database, whatever it touches, holds the
+    horizon back, and delta sync returns nothing committed after it started
+    until it ends. Dashboards then lag by as long as the longest transaction
+    still open. The CSV import (app.core.csv_import) is one such transaction:
+    a large appointments import freezes delta sync for its whole run, seconds
+    to minutes for 100,000 rows, and the dashboards catch up in one go once
+    it commits or rolls back.
+    """
+    result = await db.execute(text("SELECT CAST(CAST(pg_snapshot_xmin(pg_current_snapshot()) AS text) AS bigint)"))
+    return result.scalar_one()
@@ -0,0 +1,146 @@
+"""
+Client resolution by phone or Telegram id in one statement, and search.
+
+Phones are stored normalized (digits only, see normalize_phone) under a
+unique index, so finding or creating a client is a single INSERT ... ON
+CONFLICT ... RETURNING: no read-then-insert round trips and no duplicates
+when two bookings for a new client race.
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Select, exists, false, func, literal, literal_column, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Client
+
+# E.164 allows at most 15 digits
+MAX_PHONE_DIGITS = 15
+NOT_A_PHONE = re.compile(r"[^0-9 ()+.\-]")
+# Trigrams need three characters for the GIN indexes to narrow anything down
+MIN_SEARCH_LENGTH = 3
+
+class ResolvedClient(NamedTuple):
+    id: int
+    full_name: str
+    created: bool
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Digits only, with the Russian trunk prefix 8 turned into the country
+    code (8 999 ... and +7 999 ... are the same number). None for anything
+    that is not a phone number: no digits, too many, or other characters
+    than digits, spaces, ``+``, ``-``, ``.`` and brackets (e.g. "unknown").
+    """
+    if phone is None or NOT_A_PHONE.search(phone):
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    if not digits or len(digits) > MAX_PHONE_DIGITS:
+        return None
+    return digits
+
+async def upsert_client(
+    db: AsyncSession,
+    full_name: str,
+    phone: Optional[str] = None,
+    telegram_id: Optional[int] = None
+) -> ResolvedClient:
+    """
+    Returns the client with ``phone`` (already normalized) or, without a phone,
+    the one with ``telegram_id``, creating it if needed. An existing client
+    keeps its name.
+
+    With both a phone and a Telegram id (a shared contact), the Telegram id is
+    linked to the phone's client; a Telegram-only client (booked before
+    sharing the contact) gets the phone instead when no one else has it.
+    Raises IntegrityError if the phone and the Telegram id already belong to
+    two different clients.
+    """
+    returned = (Client.id, Client.full_name, literal_column("xmax = 0").label("created"))
+    stmt = insert(Client).values(full_name=full_name, phone=phone, telegram_id=telegram_id)
+    if phone is None:
+        # No-op update so RETURNING also yields an existing row
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Client.telegram_id],
+            set_={"telegram_id": stmt.excluded.telegram_id}
+        ).returning(*returned)
+        row = (await db.execute(stmt)).one()
+        return ResolvedClient(*row)
+
+    if telegram_id is None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Client.phone],
+            set_={"phone": stmt.excluded.phone}
+        ).returning(*returned)
+        row = (await db.execute(stmt)).one()
+        return ResolvedClient(*row)
+
+    claimed = (
+        update(Client)
+        .where(
+            Client.telegram_id == telegram_id,
+            Client.phone.is_(None),
+            ~exists().where(Client.phone == phone)
+        )
+        .values(phone=phone)
+        .returning(Client.id, Client.full_name, false().label("created"))
+        .cte("claimed")
+    )
+    linked = insert(Client).from_select(
+        ["full_name", "phone", "telegram_id"],
+        select(literal(full_name), literal(phone), literal(telegram_id)).where(~exists(claimed.select()))
+    )
+    linked = linked.on_conflict_do_update(
+        index_elements=[Client.phone],
+        set_={"telegram_id": linked.excluded.telegram_id}
+    ).returning(*returned).cte("linked")
+    stmt = union_all(select(claimed), select(linked))
+    row = (await db.execute(stmt)).one()
+    return ResolvedClient(*row)
+
+def _like_pattern(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def search_clients_query(query: str) -> Select:
+    """
+    Clients matching ``query``, best first.
+
+    A query made of phone characters looks up normalized phones by prefix
+    (ix_clients_phone_pattern), in phone order; a leading 8 also matches the
+    7 it is normalized to. Anything else matches names and vehicles by
+    substring or by word similarity over the pg_trgm GIN indexes, ranked by
+    word_similarity.
+    """
+    query = query.strip()
+    digits = re.sub(r"\D", "", query)
+    if not NOT_A_PHONE.search(query) and len(digits) >= MIN_SEARCH_LENGTH:
+        prefixes = {digits}
+        if digits.startswith("8"):
+            prefixes.add("7" + digits[1:])
+        return (
+            select(Client)
+            .where(or_(*(Client.phone.like(f"{prefix}%") for prefix in sorted(prefixes))))
+            .order_by(Client.phone, Client.id)
+        )
+
+    pattern = f"%{_like_pattern(query)}%"
+    rank = func.greatest(
+        func.word_similarity(query, Client.full_name),
+        func.word_similarity(query, Client.vehicle_info)
+    )
+    return (
+        select(Client)
+        .where(or_(
+            Client.full_name.ilike(pattern, escape="\\"),
+            Client.vehicle_info.ilike(pattern, escape="\\"),
+            literal(query).op("<%")(Client.full_name)
+        ))
+        .order_by(rank.desc(), Client.id)
+    )
+
+async def search_clients(db: AsyncSession, query: str, skip: int = 0, limit: int = 20) -> List[Client]:
+    result = await db.execute(search_clients_query(query).offset(skip).limit(limit))
+    return list(result.scalars().all())
@@ -13,8 +13,29 @@ class Settings(BaseSettings):
     
     REDIS_HOST: str
     REDIS_PORT: int = 6379
+    SLOT_CACHE_TTL_SECONDS: int = 300
+    SCHEDULE_CACHE_TTL_SECONDS: int = 300
+    SERVICE_CATALOG_TTL_SECONDS: int = 300
+    # Serialize overlapping bookings through Redis; only needed on databases
+    # without the appointments_no_overlap constraint (no btree_gist)
+    BOOKING_RANGE_LOCK: bool = False
+    BOOKING_LOCK_TTL_SECONDS: int = 10
+    SLOT_HOLD_TTL_SECONDS: int = 300
+    # Live slot holds one Telegram user may keep at once
+    SLOT_HOLDS_PER_USER: int = 2
+    # Dashboard events are relayed from the outbox table in batches
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_SECONDS: float = 1.0
+    # Idempotency-Key responses are replayed for this long
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # How long a key stays claimed by a request that never finishes
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+    # How long a duplicate waits for the first request before giving up
+    IDEMPOTENCY_WAIT_SECONDS: int = 10
     
     TELEGRAM_BOT_TOKEN: str = "YOUR_BOT_TOKEN_HERE" # Placeholder, should be in .env
+    # WebApp initData signed longer ago than this is refused
+    WEBAPP_INIT_DATA_MAX_AGE_SECONDS: int = 86400
 
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -0,0 +1,322 @@
+"""
+Bulk CSV import of clients, services and historical appointments.
+
+Rows are parsed in batches of IMPORT_BATCH_SIZE, in a worker thread so the
+file reads and CSV parsing never block the event loop, and copied with
+asyncpg's binary COPY into a temporary staging table, then merged into the
+real tables with a few set-wise statements, all in one transaction. Memory
+stays bounded by the batch size whatever the file size. Expected columns:
+
+* clients: ``full_name, phone[, vehicle_info]``, upserted by normalized phone;
+* services: ``name, duration_minutes, base_price``, upserted by name;
+* appointments: ``phone, service, start_time[, end_time][, status]`` for one
+  shop; client and service must exist (import them first). Rows already
+  imported (same client and start) are skipped, active ones get a free bay
+  as in the bulk booking endpoint and are reported as conflicts otherwise.
+
+Rows that cannot be parsed or resolved are counted as skipped. The import's
+transaction holds back the delta sync horizon while it runs (see
+app.core.changes.snapshot_horizon).
+"""
+import asyncio
+import csv
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.booking import assign_bays, busy_bays, insert_appointments, shop_capacity
+from app.core.clients import normalize_phone
+from app.core.slots import INACTIVE_STATUSES
+from app.models.models import AppointmentStatus
+from app.services.outbox import OutboxRelay, add_event
+from app.services.service_catalog import ServiceCatalog
+from app.services.slot_cache import SlotCache
+
+IMPORT_BATCH_SIZE = 5000
+# Active appointments are given bays this many at a time
+BAY_CHUNK_SIZE = 1000
+
+IMPORT_KINDS = ("clients", "services", "appointments")
+
+# stage, rows processed so far
+ProgressCallback = Callable[[str, int], Awaitable[None]]
+
+class CSVImportError(ValueError):
+    """The CSV is not in the expected format."""
+
+STAGING = {
+    "clients": (
+        "CREATE TEMPORARY TABLE import_clients "
+        "(line integer, full_name text, phone text, vehicle_info text) ON COMMIT DROP",
+        ["line", "full_name", "phone", "vehicle_info"]
+    ),
+    "services": (
+        "CREATE TEMPORARY TABLE import_services "
+        "(line integer, name text, duration_minutes integer, base_price double precision) ON COMMIT DROP",
+        ["line", "name", "duration_minutes", "base_price"]
+    ),
+    "appointments": (
+        "CREATE TEMPORARY TABLE import_appointments "
+        "(line integer, phone text, service text, start_time timestamptz, end_time timestamptz, "
+        "status text) ON COMMIT DROP",
+        ["line", "phone", "service", "start_time", "end_time", "status"]
+    ),
+}
+
+REQUIRED_COLUMNS = {
+    "clients": {"full_name", "phone"},
+    "services": {"name", "duration_minutes", "base_price"},
+    "appointments": {"phone", "service", "start_time"},
+}
+
+def _text(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return value or None
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    value = _text(value)
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # Naive times are UTC, as everywhere else in the API
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def parse_row(kind: str, line: int, row: Dict[str, str]) -> Optional[Tuple]:
+    """
+    The staging record of one CSV row, or None if the row is unusable.
+    """
+    try:
+        if kind == "clients":
+            full_name, phone = _text(row.get("full_name")), normalize_phone(row.get("phone"))
+            if not full_name or not phone:
+                return None
+            return (line, full_name, phone, _text(row.get("vehicle_info")))
+        if kind == "services":
+            name = _text(row.get("name"))
+            duration = int(row["duration_minutes"])
+            if not name or duration <= 0:
+                return None
+            return (line, name, duration, float(row["base_price"]))
+        phone, service = normalize_phone(row.get("phone")), _text(row.get("service"))
+        start_time, end_time = _timestamp(row.get("start_time")), _timestamp(row.get("end_time"))
+        if not phone or not service or start_time is None:
+            return None
+        if end_time is not None and end_time <= start_time:
+            return None
+        status = _text(row.get("status"))
+        if status is None:
+            # CRM history: what already happened is done
+            status = AppointmentStatus.DONE if start_time < datetime.now(timezone.utc) else AppointmentStatus.NEW
+        return (line, phone, service, start_time, end_time, AppointmentStatus(status.upper()).value)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _batches(kind: str, rows: Iterable[Dict[str, str]]) -> Iterable[Tuple[List[Tuple], int]]:
+    """Staging records in batches, with the number of CSV rows each covers."""
+    batch: List[Tuple] = []
+    read = 0
+    for line, row in enumerate(rows, start=2):
+        read += 1
+        record = parse_row(kind, line, row)
+        if record is not None:
+            batch.append(record)
+        if read == IMPORT_BATCH_SIZE:
+            yield batch, read
+            batch, read = [], 0
+    if read:
+        yield batch, read
+
+async def _stage(
+    db: AsyncSession,
+    kind: str,
+    csv_file: TextIO,
+    progress: Optional[ProgressCallback]
+) -> Tuple[int, int]:
+    """
+    Streams the CSV into the staging table. Returns (rows read, rows staged).
+    """
+    reader = csv.DictReader(csv_file)
+    fieldnames = await asyncio.to_thread(getattr, reader, "fieldnames")
+    missing = REQUIRED_COLUMNS[kind] - set(fieldnames or ())
+    if missing:
+        raise CSVImportError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    create, columns = STAGING[kind]
+    await db.execute(text(create))
+    connection = await db.connection()
+    # asyncpg connection of the session's transaction, for COPY
+    raw = (await connection.get_raw_connection()).driver_connection
+
+    read = staged = 0
+    batches = iter(_batches(kind, reader))
+    while True:
+        # Reading and parsing are blocking: one batch at a time off the loop
+        parsed = await asyncio.to_thread(next, batches, None)
+        if parsed is None:
+            break
+        batch, batch_read = parsed
+        if batch:
+            await raw.copy_records_to_table(f"import_{kind}", records=batch, columns=columns)
+        read += batch_read
+        staged += len(batch)
+        if progress:
+            await progress("staging", read)
+    return read, staged
+
+async def _merge_clients(db: AsyncSession) -> Dict[str, int]:
+    result = await db.execute(text("""
+        WITH src AS (
+            SELECT DISTINCT ON (phone) full_name, phone, vehicle_info
+            FROM import_clients ORDER BY phone, line DESC
+        ), upserted AS (
+            INSERT INTO clients (full_name, phone, vehicle_info)
+            SELECT full_name, phone, vehicle_info FROM src
+            ON CONFLICT (phone) DO UPDATE SET
+                full_name = EXCLUDED.full_name,
+                vehicle_info = COALESCE(EXCLUDED.vehicle_info, clients.vehicle_info)
+            RETURNING xmax = 0 AS created
+        )
+        SELECT count(*) FILTER (WHERE created), count(*) FILTER (WHERE NOT created) FROM upserted
+    """))
+    inserted, updated = result.one()
+    return {"inserted": inserted, "updated": updated}
+
+async def _merge_services(db: AsyncSession) -> Dict[str, int]:
+    # services.name is not unique: update every match, insert the rest
+    result = await db.execute(text("""
+        WITH src AS (
+            SELECT DISTINCT ON (name) name, duration_minutes, base_price
+            FROM import_services ORDER BY name, line DESC
+        ), updated AS (
+            UPDATE services SET duration_minutes = src.duration_minutes, base_price = src.base_price
+            FROM src WHERE services.name = src.name
+            RETURNING services.name
+        ), inserted AS (
+            INSERT INTO services (name, duration_minutes, base_price)
+            SELECT name, duration_minutes, base_price FROM src
+            WHERE NOT EXISTS (SELECT 1 FROM services WHERE services.name = src.name)
+            RETURNING id
+        )
+        SELECT (SELECT count(*) FROM inserted), (SELECT count(DISTINCT name) FROM updated)
+    """))
+    inserted, updated = result.one()
+    return {"inserted": inserted, "updated": updated}
+
+async def _merge_appointments(
+    db: AsyncSession,
+    shop_id: int,
+    progress: Optional[ProgressCallback]
+) -> Dict[str, int]:
+    inactive = [status.value for status in INACTIVE_STATUSES]
+    # Resolve clients and services, drop rows imported before or repeated
+    await db.execute(text("""
+        CREATE TEMPORARY TABLE import_appointments_resolved ON COMMIT DROP AS
+        SELECT DISTINCT ON (c.id, i.start_time)
+               i.line, c.id AS client_id, s.id AS service_id, i.start_time,
+               COALESCE(i.end_time, i.start_time + s.duration_minutes * interval '1 minute') AS end_time,
+               i.status
+        FROM import_appointments i
+        JOIN clients c ON c.phone = i.phone
+        JOIN LATERAL (
+            SELECT id, duration_minutes FROM services WHERE services.name = i.service ORDER BY id LIMIT 1
+        ) s ON true
+        WHERE NOT EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.shop_id = :shop_id AND a.client_id = c.id AND a.start_time = i.start_time
+        )
+        ORDER BY c.id, i.start_time, i.line DESC
+    """), {"shop_id": shop_id})
+    # The bay assignment below walks the table by line, one chunk at a time;
+    # temporary tables are never analyzed automatically
+    await db.execute(text("CREATE INDEX ON import_appointments_resolved (line)"))
+    await db.execute(text("ANALYZE import_appointments_resolved"))
+
+    # Cancelled and waitlisted rows occupy no bay
+    result = await db.execute(text("""
+        INSERT INTO appointments (shop_id, client_id, service_id, start_time, end_time, status, created_at, bay)
+        SELECT :shop_id, client_id, service_id, start_time, end_time,
+               CAST(status AS appointmentstatus), now(), 1
+        FROM import_appointments_resolved WHERE status = ANY(:inactive)
+    """), {"shop_id": shop_id, "inactive": inactive})
+    inserted = result.rowcount
+    conflicts = 0
+
+    capacity = await shop_capacity(db, shop_id)
+    last_line = 0
+    while True:
+        chunk = (await db.execute(text("""
+            SELECT line, client_id, service_id, start_time, end_time, status
+            FROM import_appointments_resolved
+            WHERE line > :last_line AND status <> ALL(:inactive)
+            ORDER BY line LIMIT :limit
+        """), {"last_line": last_line, "inactive": inactive, "limit": BAY_CHUNK_SIZE})).all()
+        if not chunk:
+            break
+        last_line = chunk[-1].line
+
+        intervals = [(row.start_time, row.end_time) for row in chunk]
+        bays = assign_bays(intervals, await busy_bays(db, shop_id, intervals), capacity)
+        rows = [
+            {
+                "shop_id": shop_id,
+                "client_id": row.client_id,
+                "service_id": row.service_id,
+                "start_time": row.start_time,
+                "end_time": row.end_time,
+                "status": AppointmentStatus(row.status),
+                "bay": bay
+            }
+            for row, bay in zip(chunk, bays)
+            if bay is not None
+        ]
+        inserted += len(await insert_appointments(db, rows))
+        conflicts += len(chunk) - len(rows)
+        if progress:
+            await progress("appointments", inserted)
+
+    return {"inserted": inserted, "updated": 0, "conflicts": conflicts}
+
+async def import_csv(
+    db: AsyncSession,
+    kind: str,
+    csv_file: TextIO,
+    shop_id: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Imports one CSV file and commits. ``shop_id`` is required for
+    appointments. Returns the row counts: read, inserted, updated, skipped
+    (unusable or unresolved rows, duplicates) and, for appointments,
+    conflicts (no free bay).
+
+    Raises CSVImportError for an unknown kind or missing columns, and
+    SlotTakenError if a concurrent booking took a bay during the import.
+    """
+    if kind not in IMPORT_KINDS:
+        raise CSVImportError(f"Unknown import kind: {kind}")
+    if kind == "appointments" and shop_id is None:
+        raise CSVImportError("Appointments are imported into a shop")
+
+    read, staged = await _stage(db, kind, csv_file, progress)
+    if progress:
+        await progress("merging", read)
+    if kind == "clients":
+        counts = await _merge_clients(db)
+    elif kind == "services":
+        counts = await _merge_services(db)
+    else:
+        counts = await _merge_appointments(db, shop_id, progress)
+        if counts["inserted"]:
+            add_event(db, "APPOINTMENTS_IMPORTED", {"shop_id": shop_id, "count": counts["inserted"]})
+    await db.commit()
+
+    if kind == "services":
+        await ServiceCatalog.invalidate()
+    elif kind == "appointments" and counts["inserted"]:
+        await SlotCache.invalidate_shop(shop_id)
+        OutboxRelay.wake()
+
+    merged = counts["inserted"] + counts["updated"] + counts.get("conflicts", 0)
+    return {"kind": kind, "read": read, "skipped": read - merged, **counts}
@@ -0,0 +1,174 @@
+"""
+Per-shop working schedule (and bay capacity) compiled into per-day minute bitmaps.
+
+Weekly hours, breaks and date exceptions are turned into one bitmap per
+weekday plus one per exception date, so the slot engine only needs a dict
+lookup and a bitwise AND per day. Compiled schedules are cached per process
+with the schedule version (a Redis counter) they were read at. Schedule edits
+bump the version and publish it; every API worker and the bot process listen
+(see listen_shop_schedules()) and drop the shop's older copy. The TTL bounds
+staleness should a broadcast be missed.
+"""
+import asyncio
+import logging
+import time as clock
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.core.availability import interval_mask
+from app.core.config import settings
+from app.models.models import Shop, ShopBreak, ShopScheduleException, ShopWorkingHours
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "shop_schedule:version"
+CHANNEL = "shop_schedule"
+
+# Used for every weekday of a shop that has no working hours configured
+DEFAULT_OPEN = time(9, 0)
+DEFAULT_CLOSE = time(18, 0)
+
+def _minute(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+def _span_mask(open_time: time, close_time: time) -> int:
+    return interval_mask(_minute(open_time), _minute(close_time))
+
+class CompiledSchedule:
+    __slots__ = ("weekly", "exceptions", "capacity")
+
+    def __init__(self, weekly: List[int], exceptions: Dict[date, int], capacity: int = 1):
+        self.weekly = weekly
+        self.exceptions = exceptions
+        # Number of bays: how many cars can be served at the same time
+        self.capacity = capacity
+
+    def day_mask(self, day: date) -> int:
+        """Bitmap of the minutes the shop is open on ``day``."""
+        mask = self.exceptions.get(day)
+        if mask is None:
+            mask = self.weekly[day.weekday()]
+        return mask
+
+def compile_schedule(
+    hours: Iterable[ShopWorkingHours],
+    breaks: Iterable[ShopBreak],
+    exceptions: Iterable[ShopScheduleException],
+    capacity: int = 1
+) -> CompiledSchedule:
+    """
+    Builds the bitmaps. Breaks are cut out of both the weekly hours and the
+    exception dates falling on that weekday.
+    """
+    weekly = [0] * 7
+    hours = list(hours)
+    if hours:
+        for h in hours:
+            weekly[h.weekday] |= _span_mask(h.open_time, h.close_time)
+    else:
+        weekly = [_span_mask(DEFAULT_OPEN, DEFAULT_CLOSE)] * 7
+
+    break_masks = [0] * 7
+    for b in breaks:
+        mask = _span_mask(b.start_time, b.end_time)
+        for weekday in (range(7) if b.weekday is None else (b.weekday,)):
+            break_masks[weekday] |= mask
+
+    weekly = [open_mask & ~break_masks[weekday] for weekday, open_mask in enumerate(weekly)]
+
+    compiled_exceptions: Dict[date, int] = {}
+    for e in exceptions:
+        mask = 0
+        if e.open_time is not None and e.close_time is not None:
+            mask = _span_mask(e.open_time, e.close_time) & ~break_masks[e.day.weekday()]
+        compiled_exceptions[e.day] = compiled_exceptions.get(e.day, 0) | mask
+
+    return CompiledSchedule(weekly, compiled_exceptions, capacity)
+
+DEFAULT_SCHEDULE = compile_schedule([], [], [])
+
+# shop id -> (version, loaded at, schedule)
+_compiled: Dict[int, Tuple[int, float, CompiledSchedule]] = {}
+
+async def get_shop_schedule(shop_id: int, db: AsyncSession) -> CompiledSchedule:
+    """
+    Returns the compiled schedule of a shop, loading it on first use.
+    """
+    cached = _compiled.get(shop_id)
+    if cached and clock.monotonic() - cached[1] < settings.SCHEDULE_CACHE_TTL_SECONDS:
+        return cached[2]
+
+    # The version is read first: an edit racing with the SELECTs then
+    # announces a newer version and this copy is dropped again
+    try:
+        version = int(await RedisService.get_redis().get(VERSION_KEY) or 0)
+    except Exception as e:
+        logger.warning(f"Shop schedule version read failed: {e}")
+        version = 0
+    capacity = await db.scalar(select(Shop.capacity).where(Shop.id == shop_id))
+    hours = await db.execute(select(ShopWorkingHours).where(ShopWorkingHours.shop_id == shop_id))
+    breaks = await db.execute(select(ShopBreak).where(ShopBreak.shop_id == shop_id))
+    exceptions = await db.execute(
+        select(ShopScheduleException).where(ShopScheduleException.shop_id == shop_id)
+    )
+    schedule = compile_schedule(
+        hours.scalars().all(),
+        breaks.scalars().all(),
+        exceptions.scalars().all(),
+        capacity or 1
+    )
+    _compiled[shop_id] = (version, clock.monotonic(), schedule)
+    return schedule
+
+def drop_shop_schedule(shop_id: Optional[int] = None, older_than: Optional[int] = None) -> None:
+    """
+    Forgets the compiled schedule of one shop (or of every shop), only if it
+    predates version ``older_than`` when given.
+    """
+    shop_ids = list(_compiled) if shop_id is None else [shop_id]
+    for id in shop_ids:
+        cached = _compiled.get(id)
+        if cached and (older_than is None or cached[0] < older_than):
+            del _compiled[id]
+
+async def invalidate_shop_schedule(shop_id: int) -> None:
+    """
+    Called after a committed schedule or capacity edit: drops the local copy
+    and announces the new version to the other processes.
+    """
+    drop_shop_schedule(shop_id)
+    try:
+        redis = RedisService.get_redis()
+        version = await redis.incr(VERSION_KEY)
+        await redis.publish(CHANNEL, f"{shop_id}:{version}")
+    except Exception as e:
+        logger.error(f"Shop schedule invalidation failed: {e}")
+
+async def listen_shop_schedules() -> None:
+    """
+    Drops a shop's compiled schedule whenever another process announces a
+    newer version of it. Runs until cancelled, resubscribing after Redis errors.
+    """
+    while True:
+        pubsub = None
+        try:
+            pubsub = RedisService.get_redis().pubsub()
+            await pubsub.subscribe(CHANNEL)
+            # Edits made while we were not subscribed: the shop is unknown,
+            # so every copy read before them goes
+            drop_shop_schedule(older_than=int(await RedisService.get_redis().get(VERSION_KEY) or 0))
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    shop_id, version = message["data"].split(":")
+                    drop_shop_schedule(int(shop_id), int(version))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Shop schedule listener failed: {e}")
+            await asyncio.sleep(1)
+        finally:
+            if pubsub is not None:
+                await pubsub.aclose()
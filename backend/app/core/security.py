@@ -1,5 +1,10 @@
+import hashlib
+import hmac
+import json
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
+from urllib.parse import parse_qsl
 from jose import jwt
 import bcrypt
 from app.core.config import settings
@@ -19,3 +24,27 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def verify_webapp_init_data(init_data: str) -> Optional[dict]:
+    """
+    Checks the signature of Telegram WebApp initData (the query string the
+    WebApp receives from Telegram) with the bot token, and returns its
+    ``user`` object, or None if it is forged, malformed or too old.
+    """
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received_hash = fields.pop("hash", "")
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", settings.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256).digest()
+    expected_hash = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected_hash, received_hash):
+        return None
+    try:
+        auth_date = int(fields["auth_date"])
+        user = json.loads(fields["user"])
+    except (KeyError, ValueError):
+        return None
+    if time.time() - auth_date > settings.WEBAPP_INIT_DATA_MAX_AGE_SECONDS:
+        return None
+    if not isinstance(user, dict) or not isinstance(user.get("id"), int):
+        return None
+    return user
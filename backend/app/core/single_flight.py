@@ -0,0 +1,69 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Per-key coalescing counters kept for metrics (oldest keys are dropped)
+MAX_TRACKED_KEYS = 1024
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight call.
+
+    The first caller (the leader) runs the work in its own task; callers that
+    arrive while it is running await the same result. If the leader is
+    cancelled (e.g. the client disconnected) the waiters retry, and one of
+    them becomes the new leader. Only calls overlapping in time are shared,
+    nothing is cached once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiting: Dict[Hashable, int] = defaultdict(int)
+        self._coalesced: Dict[Hashable, int] = {}
+        self.calls_total = 0
+        self.coalesced_total = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            task = self._calls.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._calls[key] = task
+                task.add_done_callback(lambda t, k=key: self._forget(k, t))
+                self.calls_total += 1
+                return await task
+
+            self._waiting[key] += 1
+            self._count_coalesced(key)
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if task.cancelled():
+                    # The leader went away, run the call again
+                    continue
+                raise
+            finally:
+                self._waiting[key] -= 1
+                if not self._waiting[key]:
+                    del self._waiting[key]
+
+    def _count_coalesced(self, key: Hashable) -> None:
+        if key not in self._coalesced and len(self._coalesced) >= MAX_TRACKED_KEYS:
+            del self._coalesced[next(iter(self._coalesced))]
+        self._coalesced[key] = self._coalesced.get(key, 0) + 1
+        self.coalesced_total += 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls_total": self.calls_total,
+            "coalesced_total": self.coalesced_total,
+            "in_flight": len(self._calls),
+            "waiting": {str(key): count for key, count in self._waiting.items()},
+            "coalesced": {str(key): count for key, count in self._coalesced.items()},
+        }
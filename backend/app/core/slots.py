@@ -1,79 +1,443 @@
+from bisect import bisect_left
 from datetime import datetime, timedelta, time
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import Select, bindparam, select, and_
 
 from app.models.models import Appointment, Shop, AppointmentStatus
 from app.db.session import get_db
+from app.services.slot_cache import SlotCache
+from app.services.slot_holds import SlotHolds
+from app.core.single_flight import SingleFlight
+from app.core.schedule import DEFAULT_CLOSE, DEFAULT_OPEN, CompiledSchedule, get_shop_schedule
+from app.core.availability import (
+    SLOT_STEP_MINUTES, Interval, intervals_mask, peak_overlap, saturated_intervals, starts_in_mask,
+    to_minute_interval
+)
 
-# Configuration for working hours (could be moved to DB/Config)
-WORK_START = time(9, 0)
-WORK_END = time(18, 0)
+# Default working hours, used for shops without a configured schedule
+WORK_START = DEFAULT_OPEN
+WORK_END = DEFAULT_CLOSE
 
-async def get_available_slots(
-    shop_id: int,
-    service_duration_minutes: int,
+MAX_RANGE_DAYS = 60
+
+# next-available search: first window size and the hard search horizon
+NEXT_AVAILABLE_FIRST_WINDOW_DAYS = 2
+NEXT_AVAILABLE_HORIZON_DAYS = 90
+MAX_NEXT_AVAILABLE = 50
+
+# How many alternatives a rejected booking suggests
+ALTERNATIVE_SLOTS = 3
+
+# Appointments in these statuses do not occupy the calendar
+INACTIVE_STATUSES = (AppointmentStatus.CANCELLED, AppointmentStatus.WAITLIST)
+
+# Coalesces concurrent identical day queries within this worker
+slot_flight = SingleFlight()
+
+def _not_before(date: datetime.date, now: datetime, open_mask: int) -> int:
+    """
+    Earliest allowed start minute for the day: past slots are hidden today.
+    """
+    if date != now.date():
+        return 0
+    # Start from the latest of (opening time) or (now + buffer)
+    # Round up to the next 30 min interval for clean UI
+    opening = (open_mask & -open_mask).bit_length() - 1 if open_mask else 0
+    minute_of_day = max(opening, now.hour * 60 + now.minute)
+    return minute_of_day - minute_of_day % SLOT_STEP_MINUTES + SLOT_STEP_MINUTES
+
+def _minute_intervals(date: datetime.date, intervals: Iterable[Tuple[datetime, datetime]]) -> List[Interval]:
+    day_start = datetime.combine(date, time.min)
+    return [to_minute_interval(start, end, day_start) for start, end in intervals]
+
+def _free_mask(date: datetime.date, busy: Iterable[Interval], schedule: CompiledSchedule) -> int:
+    """
+    Bitmap of the free minutes of one day: opening hours minus the minutes
+    where every bay is occupied by the given minute intervals.
+    """
+    return schedule.day_mask(date) & ~intervals_mask(saturated_intervals(busy, schedule.capacity))
+
+def _day_free_mask(
     date: datetime.date,
-    db: AsyncSession,
-    exclude_appointment_id: Optional[int] = None
+    intervals: Iterable[Tuple[datetime, datetime]],
+    schedule: CompiledSchedule
+) -> int:
+    """Same as _free_mask, for (start, end) datetimes."""
+    return _free_mask(date, _minute_intervals(date, intervals), schedule)
+
+def nearest_slots(
+    slots: Sequence[datetime],
+    requested: datetime,
+    k: int = ALTERNATIVE_SLOTS
 ) -> List[datetime]:
     """
-    Generates available time slots for a specific date and service duration.
+    The ``k`` slots closest to ``requested`` (ties go to the earlier one), in
+    chronological order. ``slots`` must be sorted.
+    """
+    right = bisect_left(slots, requested)
+    left = right - 1
+    picked: List[datetime] = []
+    while len(picked) < k and (left >= 0 or right < len(slots)):
+        if right >= len(slots) or (left >= 0 and requested - slots[left] <= slots[right] - requested):
+            picked.append(slots[left])
+            left -= 1
+        else:
+            picked.append(slots[right])
+            right += 1
+    return sorted(picked)
+
+def alternative_slots(
+    intervals: Iterable[Tuple[datetime, datetime]],
+    requested_start: datetime,
+    duration: int,
+    schedule: CompiledSchedule,
+    k: int = ALTERNATIVE_SLOTS
+) -> List[datetime]:
+    """
+    Nearest free starts on the day of a rejected booking, computed from the
+    busy intervals already loaded for its conflict check.
+    """
+    requested = requested_start.replace(tzinfo=None)
+    day = requested.date()
+    free = _day_free_mask(day, intervals, schedule)
+    not_before = _not_before(day, datetime.now(), schedule.day_mask(day))
+    return nearest_slots(_to_datetimes(day, starts_in_mask(free, duration, not_before)), requested, k)
+
+def _to_datetimes(date: datetime.date, starts: Iterable[int]) -> List[datetime]:
+    day_start = datetime.combine(date, time.min)
+    return [day_start + timedelta(minutes=m) for m in starts]
+
+def active_status_filter(entity=Appointment):
+    """
+    Excludes inactive appointments. The statuses are rendered as literals so
+    the planner can match the partial index ix_appointments_shop_start_active.
+    """
+    return entity.status.notin_(
+        bindparam(
+            "inactive_statuses",
+            list(INACTIVE_STATUSES),
+            expanding=True,
+            literal_execute=True,
+            type_=Appointment.__table__.c.status.type
+        )
+    )
+
+def busy_intervals_query(
+    shop_id: int,
+    window_from: datetime,
+    window_to: datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> Select:
+    """
+    (start_time, end_time) of the active appointments starting in the window,
+    ordered by start. Only the two columns are loaded, no ORM entities.
     """
-    
-    # 1. Define working window for the day
-    start_datetime = datetime.combine(date, WORK_START)
-    end_datetime = datetime.combine(date, WORK_END)
-    
-    # 2. Fetch existing appointments for the shop on that day
     filters = [
         Appointment.shop_id == shop_id,
-        Appointment.start_time >= start_datetime,
-        Appointment.start_time < end_datetime,
-        Appointment.status != AppointmentStatus.CANCELLED,
-        Appointment.status != AppointmentStatus.WAITLIST
+        Appointment.start_time >= window_from,
+        Appointment.start_time < window_to,
+        active_status_filter()
     ]
     if exclude_appointment_id:
         filters.append(Appointment.id != exclude_appointment_id)
+    return (
+        select(Appointment.start_time, Appointment.end_time)
+        .where(and_(*filters))
+        .order_by(Appointment.start_time)
+    )
 
-    stmt = select(Appointment).where(and_(*filters)).order_by(Appointment.start_time)
-    
+def booking_conflict_query(
+    shop_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_appointment_id: Optional[int] = None
+) -> Select:
+    """
+    (start_time, end_time) of the active appointments overlapping the whole
+    day of a booking: enough for its conflict check and for suggesting
+    alternatives on that day without another query.
+    """
+    day_start = datetime.combine(start_time.replace(tzinfo=None).date(), time.min)
+    window_to = max(day_start + timedelta(days=1), end_time.replace(tzinfo=None))
+    filters = [
+        Appointment.shop_id == shop_id,
+        # Appointments are shorter than a day; bounds the index range scan
+        Appointment.start_time >= day_start - timedelta(days=1),
+        Appointment.start_time < window_to,
+        Appointment.end_time > day_start,
+        active_status_filter()
+    ]
+    if exclude_appointment_id:
+        filters.append(Appointment.id != exclude_appointment_id)
+    return (
+        select(Appointment.start_time, Appointment.end_time)
+        .where(and_(*filters))
+        .order_by(Appointment.start_time)
+    )
+
+async def _fetch_day(
+    shop_id: int,
+    date: datetime.date,
+    db: AsyncSession,
+    exclude_appointment_id: Optional[int] = None
+) -> Tuple[CompiledSchedule, List[Tuple[datetime, datetime]]]:
+    """
+    Returns the shop's schedule and the day's busy (start, end) intervals.
+    """
+    if exclude_appointment_id:
+        return await _query_day(shop_id, date, db, exclude_appointment_id)
+    # Concurrent callers for the same shop-day share one query
+    return await slot_flight.do(
+        (shop_id, date),
+        lambda: _query_day(shop_id, date, db)
+    )
+
+async def _query_day(
+    shop_id: int,
+    date: datetime.date,
+    db: AsyncSession,
+    exclude_appointment_id: Optional[int] = None
+) -> Tuple[CompiledSchedule, List[Tuple[datetime, datetime]]]:
+    schedule = await get_shop_schedule(shop_id, db)
+
+    day_start = datetime.combine(date, time.min)
+    stmt = busy_intervals_query(shop_id, day_start, day_start + timedelta(days=1), exclude_appointment_id)
     result = await db.execute(stmt)
-    appointments = result.scalars().all()
-    
-    # 3. Generate slots
-    slots = []
-    
-    # If today, don't show past slots
+    return schedule, result.all()
+
+async def _day_masks(
+    shop_id: int,
+    date: datetime.date,
+    db: AsyncSession,
+    exclude_appointment_id: Optional[int] = None,
+    ignore_hold_id: Optional[str] = None
+) -> Tuple[int, int]:
+    """
+    Returns (open mask, free mask) of the shop for one day. Live slot holds
+    count as busy, except the caller's own ``ignore_hold_id``.
+    """
+    schedule, busy = await _fetch_day(shop_id, date, db, exclude_appointment_id)
+    holds = await SlotHolds.held(shop_id, date, ignore_hold_id)
+    return schedule.day_mask(date), _day_free_mask(date, [*busy, *holds], schedule)
+
+async def get_available_slots(
+    shop_id: int,
+    service_duration_minutes: int,
+    date: datetime.date,
+    db: AsyncSession,
+    exclude_appointment_id: Optional[int] = None,
+    ignore_hold_id: Optional[str] = None
+) -> List[datetime]:
+    """
+    Generates available time slots for a specific date and service duration.
+    """
+    open_mask, free = await _day_masks(shop_id, date, db, exclude_appointment_id, ignore_hold_id)
+    not_before = _not_before(date, datetime.now(), open_mask)
+    return _to_datetimes(date, starts_in_mask(free, service_duration_minutes, not_before))
+
+async def _query_cacheable_day(
+    shop_id: int,
+    date: datetime.date,
+    db: AsyncSession
+) -> Tuple[Optional[str], CompiledSchedule, List[Tuple[datetime, datetime]]]:
+    # The generation is read before the query: a booking committed before
+    # the query ends invalidates after it, so the stale result is not cached
+    generation = await SlotCache.generation(shop_id, date)
+    schedule, busy = await _query_day(shop_id, date, db)
+    return generation, schedule, busy
+
+async def _cached_day(
+    shop_id: int,
+    date: datetime.date,
+    service_duration_minutes: int,
+    db: AsyncSession
+) -> Tuple[List[int], List[Interval]]:
+    """
+    The day's free starts for the duration and its booked minute intervals,
+    from the slot cache or, on a miss, from the database (then cached).
+    """
+    cached = await SlotCache.get(shop_id, date, service_duration_minutes)
+    if cached is not None:
+        return cached
+    generation, schedule, busy = await slot_flight.do(
+        (shop_id, date, "cache"),
+        lambda: _query_cacheable_day(shop_id, date, db)
+    )
+    busy = _minute_intervals(date, busy)
+    starts = starts_in_mask(_free_mask(date, busy, schedule), service_duration_minutes)
+    await SlotCache.set(shop_id, date, service_duration_minutes, starts, busy, generation)
+    return starts, busy
+
+async def get_cached_available_slots(
+    shop_id: int,
+    service_duration_minutes: int,
+    date: datetime.date,
+    db: AsyncSession,
+    ignore_hold_id: Optional[str] = None
+) -> List[datetime]:
+    """
+    Same as get_available_slots, served from the Redis slot cache when possible.
+
+    The cache holds the whole day's starts; past slots are cut off on read so
+    today's entry stays valid as time goes by. Slot holds are too short-lived
+    to cache: they are stacked onto the cached bookings on read.
+    """
+    starts, busy = await _cached_day(shop_id, date, service_duration_minutes, db)
+
+    holds = await SlotHolds.held(shop_id, date, ignore_hold_id)
+    if holds:
+        schedule = await get_shop_schedule(shop_id, db)
+        free = _free_mask(date, [*busy, *_minute_intervals(date, holds)], schedule)
+        starts = starts_in_mask(free, service_duration_minutes)
+
     now = datetime.now()
-    if date == now.date():
-        # Start from the latest of (work start) or (now + buffer)
-        # Round up to the next 30 min interval for clean UI
-        start_search = max(start_datetime, now)
-        minutes_to_next_slot = 30 - (start_search.minute % 30)
-        current_time = (start_search + timedelta(minutes=minutes_to_next_slot)).replace(second=0, microsecond=0)
+    if date != now.date():
+        return _to_datetimes(date, starts)
+
+    schedule = await get_shop_schedule(shop_id, db)
+    not_before = _not_before(date, now, schedule.day_mask(date))
+    return _to_datetimes(date, (m for m in starts if m >= not_before))
+
+async def free_bays(
+    shop_id: int,
+    start_time: datetime,
+    service_duration_minutes: int,
+    db: AsyncSession,
+    exclude_appointment_id: Optional[int] = None
+) -> int:
+    """
+    Bays no booking takes at any point of a slot: how many slot holds may
+    overlap it. Served from the slot cache unless an appointment is excluded.
+    """
+    date = start_time.date()
+    if exclude_appointment_id:
+        _, busy = await _fetch_day(shop_id, date, db, exclude_appointment_id)
+        busy = _minute_intervals(date, busy)
     else:
-        current_time = start_datetime
-    
-    # Step size for slots
-    step_minutes = 30 
-    
-    while current_time + timedelta(minutes=service_duration_minutes) <= end_datetime:
-        slot_end = current_time + timedelta(minutes=service_duration_minutes)
-        is_free = True
-        
-        # Check collision with existing appointments
-        for appt in appointments:
-            appt_start = appt.start_time.replace(tzinfo=None)
-            appt_end = appt.end_time.replace(tzinfo=None)
-            
-            if current_time < appt_end and slot_end > appt_start:
-                is_free = False
-                break
-        
-        if is_free:
-            slots.append(current_time)
-            
-        current_time += timedelta(minutes=step_minutes)
-        
-    return slots
+        _, busy = await _cached_day(shop_id, date, service_duration_minutes, db)
+    schedule = await get_shop_schedule(shop_id, db)
+    start = start_time.hour * 60 + start_time.minute
+    return schedule.capacity - peak_overlap(busy, start, start + service_duration_minutes)
+
+async def get_available_slots_by_duration(
+    shop_id: int,
+    durations: Iterable[int],
+    date: datetime.date,
+    db: AsyncSession,
+    exclude_appointment_id: Optional[int] = None
+) -> Dict[int, List[datetime]]:
+    """
+    Generates available time slots for several service durations at once.
+    The day's free-minute bitmap is computed once and shared by every duration.
+    """
+    open_mask, free = await _day_masks(shop_id, date, db, exclude_appointment_id)
+    not_before = _not_before(date, datetime.now(), open_mask)
+    return {
+        duration: _to_datetimes(date, starts_in_mask(free, duration, not_before))
+        for duration in sorted(set(durations))
+    }
+
+async def get_available_slots_range(
+    shop_id: int,
+    service_duration_minutes: int,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    db: AsyncSession
+) -> Dict[datetime.date, List[datetime]]:
+    """
+    Generates available time slots for every day in [start_date, end_date]
+    using a single query for the whole range.
+    """
+    if end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Range must not exceed {MAX_RANGE_DAYS} days")
+
+    schedule = await get_shop_schedule(shop_id, db)
+    by_day = await _busy_by_day(shop_id, start_date, end_date, db)
+
+    now = datetime.now()
+    days: Dict[datetime.date, List[datetime]] = {}
+    day = start_date
+    while day <= end_date:
+        free = _day_free_mask(day, by_day.get(day, ()), schedule)
+        not_before = _not_before(day, now, schedule.day_mask(day))
+        days[day] = _to_datetimes(day, starts_in_mask(free, service_duration_minutes, not_before))
+        day += timedelta(days=1)
+    return days
+
+async def _busy_by_day(
+    shop_id: int,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    db: AsyncSession
+) -> Dict[datetime.date, List[Tuple[datetime, datetime]]]:
+    """
+    Busy (start, end) intervals of [start_date, end_date] bucketed by day,
+    loaded with a single query.
+    """
+    stmt = busy_intervals_query(
+        shop_id,
+        datetime.combine(start_date, time.min),
+        datetime.combine(end_date + timedelta(days=1), time.min)
+    )
+    result = await db.execute(stmt)
+
+    # Bucket rows by day in one pass; rows arrive ordered by start_time
+    by_day: Dict[datetime.date, List[Tuple[datetime, datetime]]] = {}
+    for start, end in result.all():
+        by_day.setdefault(start.replace(tzinfo=None).date(), []).append((start, end))
+    return by_day
+
+async def get_next_available_slots(
+    shop_id: int,
+    service_duration_minutes: int,
+    db: AsyncSession,
+    after: Optional[datetime] = None,
+    limit: int = 1,
+    horizon_days: int = NEXT_AVAILABLE_HORIZON_DAYS
+) -> List[datetime]:
+    """
+    Returns the first ``limit`` free start times at or after ``after`` (now by
+    default), searching at most ``horizon_days`` days ahead.
+
+    Busy intervals are loaded in windows that double in size (2, 4, 8... days),
+    so a soon slot costs one small query and a far one only a few queries.
+    """
+    if limit < 1 or limit > MAX_NEXT_AVAILABLE:
+        raise ValueError(f"limit must be between 1 and {MAX_NEXT_AVAILABLE}")
+    if horizon_days < 1 or horizon_days > NEXT_AVAILABLE_HORIZON_DAYS:
+        raise ValueError(f"horizon_days must be between 1 and {NEXT_AVAILABLE_HORIZON_DAYS}")
+
+    now = datetime.now()
+    after = max(after.replace(tzinfo=None), now) if after else now
+    schedule = await get_shop_schedule(shop_id, db)
+
+    found: List[datetime] = []
+    window_start = after.date()
+    horizon_end = window_start + timedelta(days=horizon_days - 1)
+    window_days = NEXT_AVAILABLE_FIRST_WINDOW_DAYS
+    while window_start <= horizon_end:
+        window_end = min(window_start + timedelta(days=window_days - 1), horizon_end)
+        by_day = await _busy_by_day(shop_id, window_start, window_end, db)
+
+        day = window_start
+        while day <= window_end:
+            open_mask = schedule.day_mask(day)
+            if open_mask:
+                free = _day_free_mask(day, by_day.get(day, ()), schedule)
+                not_before = _not_before(day, now, open_mask)
+                if day == after.date():
+                    # Ceil to the minute: a start must not precede ``after``
+                    after_minute = after.hour * 60 + after.minute + bool(after.second or after.microsecond)
+                    not_before = max(not_before, after_minute)
+                starts = starts_in_mask(free, service_duration_minutes, not_before)
+                found.extend(_to_datetimes(day, starts[:limit - len(found)]))
+                if len(found) >= limit:
+                    return found
+            day += timedelta(days=1)
+
+        window_start = window_end + timedelta(days=1)
+        window_days *= 2
+    return found
@@ -6,6 +6,9 @@ from app.api.api import api_router
 from contextlib import asynccontextmanager
 from app.bot.loader import dp, bot
 from app.bot.handlers import router as bot_router
+from app.services.service_catalog import ServiceCatalog
+from app.core.schedule import listen_shop_schedules
+from app.services.outbox import OutboxRelay
 
 import logging
 import sys
@@ -25,9 +28,15 @@ if sys.platform == 'win32':
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Lifespan startup initiated")
+    catalog_listener = asyncio.create_task(ServiceCatalog.listen())
+    schedule_listener = asyncio.create_task(listen_shop_schedules())
+    outbox_relay = asyncio.create_task(OutboxRelay.run())
     yield
     # Shutdown
     logger.info("Lifespan shutdown initiated")
+    catalog_listener.cancel()
+    schedule_listener.cancel()
+    outbox_relay.cancel()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -43,6 +52,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Change-Cursor"],
     )
 else:
     # Fallback/Dev defaults
@@ -52,6 +62,7 @@ else:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Change-Cursor"],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
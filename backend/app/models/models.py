@@ -1,11 +1,15 @@
-from datetime import datetime
+from datetime import datetime, date, time
 from typing import Optional, List
-from sqlalchemy import ForeignKey, DateTime, String, Integer, Float, BigInteger, Enum as SQLAlchemyEnum
+from sqlalchemy import ForeignKey, DateTime, Date, Time, String, Integer, Float, BigInteger, Index, FetchedValue, text, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, JSONB
 import enum
 
 from app.db.session import Base
 
+# 64-bit id of the current transaction; orders changes for delta sync
+CURRENT_XID = text("CAST(CAST(pg_current_xact_id() AS text) AS bigint)")
+
 class AppointmentStatus(str, enum.Enum):
     NEW = "NEW"
     CONFIRMED = "CONFIRMED"
@@ -20,9 +24,50 @@ class Shop(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255))
     address: Mapped[str] = mapped_column(String(500))
+    # Number of bays/lifts: appointments that may overlap in time
+    capacity: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
 
     appointments: Mapped[List["Appointment"]] = relationship(back_populates="shop")
     users: Mapped[List["User"]] = relationship(back_populates="shop")
+    working_hours: Mapped[List["ShopWorkingHours"]] = relationship(back_populates="shop")
+    breaks: Mapped[List["ShopBreak"]] = relationship(back_populates="shop")
+    schedule_exceptions: Mapped[List["ShopScheduleException"]] = relationship(back_populates="shop")
+
+class ShopWorkingHours(Base):
+    """Weekly opening hours. A weekday may have several rows; none means closed."""
+    __tablename__ = "shop_working_hours"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    shop_id: Mapped[int] = mapped_column(ForeignKey("shops.id"), index=True)
+    weekday: Mapped[int] = mapped_column(Integer)  # 0 = Monday
+    open_time: Mapped[time] = mapped_column(Time)
+    close_time: Mapped[time] = mapped_column(Time)
+
+    shop: Mapped["Shop"] = relationship(back_populates="working_hours")
+
+class ShopBreak(Base):
+    """Recurring break (e.g. lunch). weekday=None applies to every day."""
+    __tablename__ = "shop_breaks"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    shop_id: Mapped[int] = mapped_column(ForeignKey("shops.id"), index=True)
+    weekday: Mapped[Optional[int]] = mapped_column(Integer)
+    start_time: Mapped[time] = mapped_column(Time)
+    end_time: Mapped[time] = mapped_column(Time)
+
+    shop: Mapped["Shop"] = relationship(back_populates="breaks")
+
+class ShopScheduleException(Base):
+    """Date-specific override (holiday, short day). Null times mean closed all day."""
+    __tablename__ = "shop_schedule_exceptions"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    shop_id: Mapped[int] = mapped_column(ForeignKey("shops.id"), index=True)
+    day: Mapped[date] = mapped_column(Date)
+    open_time: Mapped[Optional[time]] = mapped_column(Time)
+    close_time: Mapped[Optional[time]] = mapped_column(Time)
+
+    shop: Mapped["Shop"] = relationship(back_populates="schedule_exceptions")
 
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
@@ -50,8 +95,24 @@ class User(Base):
 class Client(Base):
     __tablename__ = "clients"
 
+    __table_args__ = (
+        # Client search (app.core.clients.search_clients_query), needs pg_trgm
+        Index(
+            "ix_clients_full_name_trgm", "full_name",
+            postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_clients_vehicle_info_trgm", "vehicle_info",
+            postgresql_using="gin", postgresql_ops={"vehicle_info": "gin_trgm_ops"},
+        ),
+        # Phone prefix LIKE, whatever the database collation
+        Index("ix_clients_phone_pattern", "phone", postgresql_ops={"phone": "text_pattern_ops"}),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     telegram_id: Mapped[Optional[int]] = mapped_column(BigInteger, unique=True, index=True)
+    # Normalized by app.core.clients.normalize_phone; NULL for Telegram-only clients
+    phone: Mapped[Optional[str]] = mapped_column(String(20), unique=True, index=True)
     full_name: Mapped[str] = mapped_column(String(255))
     vehicle_info: Mapped[Optional[str]] = mapped_column(String(500))
 
@@ -69,6 +130,28 @@ class Service(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Serves the slot engine's day query as an index-only scan
+        Index(
+            "ix_appointments_shop_start_active",
+            "shop_id", "start_time",
+            postgresql_include=["end_time"],
+            postgresql_where=text("status NOT IN ('CANCELLED', 'WAITLIST')"),
+        ),
+        # Keyset pagination of a shop's appointments on (start_time, id)
+        Index("ix_appointments_shop_start_id", "shop_id", "start_time", "id"),
+        # Delta sync: a shop's changes in (change_xid, id) order
+        Index("ix_appointments_shop_change", "shop_id", "change_xid", "id"),
+        # No two active appointments may overlap on the same bay of a shop
+        ExcludeConstraint(
+            ("shop_id", "="),
+            ("bay", "="),
+            (text("tstzrange(start_time, end_time, '[)')"), "&&"),
+            name="appointments_no_overlap",
+            using="gist",
+            where=text("status NOT IN ('CANCELLED', 'WAITLIST')"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     shop_id: Mapped[int] = mapped_column(ForeignKey("shops.id"))
@@ -77,13 +160,39 @@ class Appointment(Base):
     
     start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
     end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # Bay (1..shop capacity) the car occupies; picked by app.core.booking
+    bay: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
     status: Mapped[AppointmentStatus] = mapped_column(
         SQLAlchemyEnum(AppointmentStatus), 
         default=AppointmentStatus.NEW,
         index=True
     )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    # Bumped by every update; writers send the version they read (see app.core.booking)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    # Both set by the appointments_touch trigger on every insert and update
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=text("now()"), server_onupdate=FetchedValue()
+    )
+    change_xid: Mapped[int] = mapped_column(BigInteger, server_default=CURRENT_XID, server_onupdate=FetchedValue())
+
+    # Fetch the trigger's values with RETURNING instead of expiring them
+    __mapper_args__ = {"eager_defaults": True}
 
     shop: Mapped["Shop"] = relationship(back_populates="appointments")
     client: Mapped["Client"] = relationship(back_populates="appointments")
     service: Mapped["Service"] = relationship(back_populates="appointments")
+
+class OutboxEvent(Base):
+    """
+    Event written in the same transaction as the change it announces and
+    published to Redis afterwards by app.services.outbox.OutboxRelay.
+    """
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    channel: Mapped[str] = mapped_column(String(100))
+    payload: Mapped[dict] = mapped_column(JSONB)
+    # Transaction of the event, published as its change cursor
+    change_xid: Mapped[int] = mapped_column(BigInteger, server_default=CURRENT_XID)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
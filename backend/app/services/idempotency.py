@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import json
+import logging
+import secrets
+import time as clock
+from typing import Any, Optional, Tuple
+
+from app.core.config import settings
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Deletes KEYS[1] only while it still holds the caller's pending marker, so a
+# failed request never drops a response stored (or a lease taken) by another.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+POLL_INTERVAL_SECONDS = 0.05
+
+_release_script = None
+
+class IdempotencyKeyReusedError(Exception):
+    """The key was already used for a request with a different payload."""
+
+class IdempotencyInProgressError(Exception):
+    """The first request with this key is still running after the wait."""
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request payload, to tell a retry from key reuse."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+class IdempotencyStore:
+    """
+    Responses of requests sent with an ``Idempotency-Key`` header.
+
+    The first request with a key claims it with SET NX (a pending marker that
+    expires after IDEMPOTENCY_LOCK_SECONDS, should the worker die) and stores
+    its serialized response for IDEMPOTENCY_TTL_SECONDS once done. Retries get
+    that response back without running the request again; duplicates arriving
+    while the first is still running poll until it finishes. Redis errors are
+    logged and the request simply runs unprotected.
+    """
+
+    @staticmethod
+    def _key(scope: str) -> str:
+        return f"idempotency:{scope}"
+
+    @classmethod
+    async def begin(cls, scope: str, fingerprint: str) -> Tuple[Optional[str], Optional[dict]]:
+        """
+        Claims ``scope`` or waits for the request that did.
+
+        Returns ``(lease, None)`` when the caller should run the request and
+        then call complete() or release() with the lease, and ``(None, stored)``
+        with the stored ``{"status_code", "body"}`` for a replay. ``(None, None)``
+        means Redis is unavailable.
+        """
+        key = cls._key(scope)
+        pending = json.dumps({"pending": secrets.token_hex(8), "fingerprint": fingerprint})
+        deadline = clock.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        try:
+            redis = RedisService.get_redis()
+            while True:
+                if await redis.set(key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+                    return pending, None
+                raw = await redis.get(key)
+                if raw is not None:
+                    stored = json.loads(raw)
+                    if stored["fingerprint"] != fingerprint:
+                        raise IdempotencyKeyReusedError()
+                    if "pending" not in stored:
+                        return None, stored
+                # Still running (or just released): wait and try again
+                if clock.monotonic() >= deadline:
+                    raise IdempotencyInProgressError()
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        except (IdempotencyKeyReusedError, IdempotencyInProgressError):
+            raise
+        except Exception as e:
+            logger.error(f"Idempotency check failed: {e}")
+            return None, None
+
+    @classmethod
+    async def complete(cls, scope: str, lease: str, status_code: int, body: Any) -> None:
+        """Stores the response of the request that holds ``lease``."""
+        fingerprint = json.loads(lease)["fingerprint"]
+        stored = {"fingerprint": fingerprint, "status_code": status_code, "body": body}
+        try:
+            redis = RedisService.get_redis()
+            await redis.set(cls._key(scope), json.dumps(stored), ex=settings.IDEMPOTENCY_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Idempotency store failed: {e}")
+
+    @classmethod
+    async def release(cls, scope: str, lease: str) -> None:
+        """Gives the key up after a failed request, so a retry runs it again."""
+        global _release_script
+        try:
+            redis = RedisService.get_redis()
+            if _release_script is None:
+                _release_script = redis.register_script(RELEASE_SCRIPT)
+            await _release_script(keys=[cls._key(scope)], args=[lease], client=redis)
+        except Exception as e:
+            logger.error(f"Idempotency release failed: {e}")
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.changes import format_cursor
+from app.core.config import settings
+from app.db.session import async_session_local
+from app.models.models import OutboxEvent
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENTS_CHANNEL = "appointments_updates"
+
+def add_event(
+    db: AsyncSession,
+    event_type: str,
+    data: Dict[str, Any],
+    channel: str = APPOINTMENTS_CHANNEL
+) -> None:
+    """
+    Queues ``{"type": event_type, "data": data}`` for ``channel``. Call it
+    before the commit of the change the event announces: both are stored
+    together or not at all.
+    """
+    db.add(OutboxEvent(channel=channel, payload={"type": event_type, "data": data}))
+
+class OutboxRelay:
+    """
+    Publishes outbox events to Redis.
+
+    Each batch locks the oldest events with FOR UPDATE SKIP LOCKED, publishes
+    them in one pipeline and deletes them in the same transaction, so several
+    relays (one per API worker plus the bot) can run side by side and an event
+    is only dropped once Redis took it. While Redis is down the events simply
+    stay in the table. Every message carries the change cursor of its
+    transaction (see app.core.changes). Delivery is at least once: a relay dying between the
+    publish and the commit sends its batch again.
+    """
+    published: int = 0
+    _wakeup: asyncio.Event = None
+
+    @classmethod
+    def wake(cls) -> None:
+        """Asks the relay of this process to run now, e.g. after a commit."""
+        if cls._wakeup is not None:
+            cls._wakeup.set()
+
+    @classmethod
+    async def relay_batch(cls, db: AsyncSession, limit: int = None) -> int:
+        """Publishes up to ``limit`` pending events; returns how many."""
+        stmt = (
+            select(OutboxEvent.id, OutboxEvent.channel, OutboxEvent.payload, OutboxEvent.change_xid)
+            .order_by(OutboxEvent.id)
+            .limit(limit or settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        events = (await db.execute(stmt)).all()
+        if not events:
+            await db.rollback()
+            return 0
+
+        try:
+            redis = RedisService.get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for event in events:
+                    # Clients at or before the cursor fetch the changes
+                    message = {**event.payload, "cursor": format_cursor(event.change_xid)}
+                    pipe.publish(event.channel, json.dumps(message))
+                await pipe.execute()
+        except Exception:
+            await db.rollback()
+            raise
+
+        await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([event.id for event in events])))
+        await db.commit()
+        cls.published += len(events)
+        return len(events)
+
+    @classmethod
+    async def run(cls) -> None:
+        """
+        Drains the outbox whenever woken and every OUTBOX_POLL_SECONDS (to
+        pick up events of other processes and retry after Redis errors).
+        Runs until cancelled.
+        """
+        cls._wakeup = asyncio.Event()
+        while True:
+            cls._wakeup.clear()
+            try:
+                async with async_session_local() as db:
+                    while await cls.relay_batch(db) >= settings.OUTBOX_BATCH_SIZE:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox relay failed: {e}")
+            try:
+                await asyncio.wait_for(cls._wakeup.wait(), settings.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
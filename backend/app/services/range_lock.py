@@ -0,0 +1,147 @@
+import secrets
+import time as clock
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Tuple
+
+from app.services.redis_service import RedisService
+
+# Removes finished or expired ranges, then adds ARGV[4] unless ARGV[6] live
+# ranges already overlap [ARGV[1], ARGV[2]). Scores are range ends, so only
+# ranges ending after the requested start need to be looked at.
+# KEYS[1] = ranges key; ARGV = start, end, now, member, expires_at, limit
+ACQUIRE_SCRIPT = """
+local start_ms = tonumber(ARGV[1])
+local end_ms = tonumber(ARGV[2])
+local now_ms = tonumber(ARGV[3])
+local limit = tonumber(ARGV[6])
+local overlapping = 0
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms)
+local held = redis.call('ZRANGEBYSCORE', KEYS[1], '(' .. start_ms, '+inf')
+for _, member in ipairs(held) do
+    local s, e, expires = string.match(member, '^(%d+):(%d+):(%d+):')
+    if tonumber(expires) <= now_ms then
+        redis.call('ZREM', KEYS[1], member)
+    elseif tonumber(s) < end_ms then
+        overlapping = overlapping + 1
+        if overlapping >= limit then
+            return 0
+        end
+    end
+end
+redis.call('ZADD', KEYS[1], end_ms, ARGV[4])
+local ttl = tonumber(ARGV[5]) - now_ms
+if redis.call('PTTL', KEYS[1]) < ttl then
+    redis.call('PEXPIRE', KEYS[1], ttl)
+end
+return 1
+"""
+
+_acquire_script = None
+
+def _ms(dt: datetime) -> int:
+    # Naive datetimes are UTC, as asyncpg stores them
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+def parse_range(member: str) -> Tuple[datetime, datetime, int]:
+    """(start, end, expires_ms) of a range member; start and end are UTC."""
+    start_ms, end_ms, expires_ms, _ = member.split(":", 3)
+    return (
+        datetime.fromtimestamp(int(start_ms) / 1000, tz=timezone.utc),
+        datetime.fromtimestamp(int(end_ms) / 1000, tz=timezone.utc),
+        int(expires_ms)
+    )
+
+async def acquire_range(
+    key: str,
+    start_time: datetime,
+    end_time: datetime,
+    ttl_seconds: int,
+    limit: int = 1,
+    token: Optional[str] = None
+) -> Optional[str]:
+    """
+    Adds [start_time, end_time) to the range set at ``key`` for ``ttl_seconds``
+    unless ``limit`` live ranges already overlap it. Returns the new member,
+    which ends with ``token`` (random unless given).
+    """
+    global _acquire_script
+    redis = RedisService.get_redis()
+    if _acquire_script is None:
+        # EVALSHA, falling back to EVAL once per Redis server
+        _acquire_script = redis.register_script(ACQUIRE_SCRIPT)
+    now_ms = int(clock.time() * 1000)
+    expires_ms = now_ms + ttl_seconds * 1000
+    member = f"{_ms(start_time)}:{_ms(end_time)}:{expires_ms}:{token or secrets.token_hex(8)}"
+    added = await _acquire_script(
+        keys=[key],
+        args=[_ms(start_time), _ms(end_time), now_ms, member, expires_ms, limit],
+        client=redis
+    )
+    return member if added else None
+
+class RangeLockedError(Exception):
+    """Another holder has a range overlapping the requested one."""
+
+class RangeLock:
+    """
+    Reserves time ranges of a shop in Redis.
+
+    Each shop has one sorted set of held ranges; a member is
+    ``"{start_ms}:{end_ms}:{expires_ms}:{token}"`` scored by its end. The
+    overlap check and the insert run as one Lua script, so acquiring costs a
+    single round trip, and ranges that merely share a start time no longer
+    collide unless they overlap. Every range expires on its own; a release
+    removes exactly the caller's member, never a newer holder's.
+    """
+    @staticmethod
+    def _key(shop_id: int) -> str:
+        return f"booking_ranges:{shop_id}"
+
+    @classmethod
+    async def acquire(
+        cls,
+        shop_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        ttl_seconds: int = 10,
+        limit: int = 1
+    ) -> Optional[str]:
+        """
+        Holds [start_time, end_time) for ``ttl_seconds``. Returns the lease to
+        pass to release(), or None if ``limit`` live ranges overlap (one per
+        bay of the shop).
+        """
+        return await acquire_range(cls._key(shop_id), start_time, end_time, ttl_seconds, limit)
+
+    @classmethod
+    async def release(cls, shop_id: int, lease: str) -> bool:
+        """
+        Drops a range held by acquire(). False if it had already expired.
+        """
+        redis = RedisService.get_redis()
+        return bool(await redis.zrem(cls._key(shop_id), lease))
+
+    @classmethod
+    @asynccontextmanager
+    async def hold(
+        cls,
+        shop_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        ttl_seconds: int = 10,
+        limit: int = 1
+    ) -> AsyncIterator[str]:
+        """
+        Holds the range for the duration of the block; raises RangeLockedError
+        if it overlaps ``limit`` live ranges.
+        """
+        lease = await cls.acquire(shop_id, start_time, end_time, ttl_seconds, limit)
+        if lease is None:
+            raise RangeLockedError()
+        try:
+            yield lease
+        finally:
+            await cls.release(shop_id, lease)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time as clock
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
+from app.models.models import Service
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "service_catalog:version"
+CHANNEL = "service_catalog"
+
+class CatalogService:
+    """Detached, read-only copy of a Service row."""
+    __slots__ = ("id", "name", "duration_minutes", "base_price")
+
+    def __init__(self, id: int, name: str, duration_minutes: int, base_price: float):
+        self.id = id
+        self.name = name
+        self.duration_minutes = duration_minutes
+        self.base_price = base_price
+
+class ServiceCatalog:
+    """
+    Per-process read-through cache of the service catalog.
+
+    The catalog is loaded whole on first use and kept with the catalog version
+    (a Redis counter) it was read at. Service writes bump the version and
+    publish it; every API worker and the bot process listen (see listen()) and
+    drop an older copy, so hot paths read services without a DB round trip.
+    The TTL bounds staleness should a broadcast be missed.
+    """
+    _catalog: Optional[Tuple[int, float, Dict[int, CatalogService]]] = None
+    _flight = SingleFlight()
+    loads: int = 0
+
+    @classmethod
+    async def _load(cls, db: AsyncSession) -> Dict[int, CatalogService]:
+        # The version is read first: a write racing with the SELECT then
+        # announces a newer version and this copy is dropped again
+        try:
+            version = int(await RedisService.get_redis().get(VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Service catalog version read failed: {e}")
+            version = 0
+        result = await db.execute(select(Service).order_by(Service.id))
+        services = {
+            s.id: CatalogService(s.id, s.name, s.duration_minutes, s.base_price)
+            for s in result.scalars().all()
+        }
+        cls._catalog = (version, clock.monotonic(), services)
+        cls.loads += 1
+        return services
+
+    @classmethod
+    async def _services(cls, db: AsyncSession) -> Dict[int, CatalogService]:
+        cached = cls._catalog
+        if cached and clock.monotonic() - cached[1] < settings.SERVICE_CATALOG_TTL_SECONDS:
+            return cached[2]
+        return await cls._flight.do("catalog", lambda: cls._load(db))
+
+    @classmethod
+    async def get(cls, db: AsyncSession, service_id: int) -> Optional[CatalogService]:
+        return (await cls._services(db)).get(service_id)
+
+    @classmethod
+    async def all(cls, db: AsyncSession) -> List[CatalogService]:
+        """Every service, ordered by id."""
+        return list((await cls._services(db)).values())
+
+    @classmethod
+    def drop(cls, older_than: Optional[int] = None) -> None:
+        """
+        Forgets the local copy (only if it predates version ``older_than``).
+        """
+        cached = cls._catalog
+        if cached and (older_than is None or cached[0] < older_than):
+            cls._catalog = None
+
+    @classmethod
+    async def invalidate(cls) -> None:
+        """
+        Called after a committed service write: drops the local copy and
+        announces the new catalog version to the other processes.
+        """
+        cls.drop()
+        try:
+            redis = RedisService.get_redis()
+            version = await redis.incr(VERSION_KEY)
+            await redis.publish(CHANNEL, str(version))
+        except Exception as e:
+            logger.error(f"Service catalog invalidation failed: {e}")
+
+    @classmethod
+    async def listen(cls) -> None:
+        """
+        Drops the local copy whenever another process announces a newer
+        catalog version. Runs until cancelled, resubscribing after Redis errors.
+        """
+        while True:
+            pubsub = None
+            try:
+                pubsub = RedisService.get_redis().pubsub()
+                await pubsub.subscribe(CHANNEL)
+                # Changes made while we were not subscribed
+                cls.drop(int(await RedisService.get_redis().get(VERSION_KEY) or 0))
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        cls.drop(int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Service catalog listener failed: {e}")
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    await pubsub.aclose()
@@ -0,0 +1,186 @@
+import json
+import logging
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Hash field with the day's booked (start, end) minute intervals
+BUSY_FIELD = "busy"
+
+# Generation counters outlive any query racing with an invalidation
+GENERATION_TTL_SECONDS = 86400
+
+# Writes the entry only if neither the shop-day nor the shop generation moved
+# since ARGV[1] was read. KEYS = hash, day generation, shop generation;
+# ARGV = generation, ttl, then the field/value pairs
+SET_SCRIPT = """
+local generation = (redis.call('GET', KEYS[2]) or '0') .. ':' .. (redis.call('GET', KEYS[3]) or '0')
+if generation ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_set_script = None
+
+Interval = Tuple[int, int]
+
+class SlotCache:
+    """
+    Redis cache of free slot starts (minutes from midnight).
+
+    Each shop-day is one hash keyed by service duration, so a write to that day
+    invalidates every duration with a single DEL. The hash also keeps the
+    day's booked intervals, which live slot holds are stacked onto without
+    going back to the database. Redis errors are logged and treated as a
+    miss, the database stays the source of truth.
+
+    Invalidations also bump a generation counter per shop-day (and per shop).
+    A reader takes the generation before its query and its write is dropped
+    if the generation moved, so a query that raced with a booking never
+    writes the pre-booking slots back after the invalidation.
+    """
+    hits: int = 0
+    misses: int = 0
+
+    @staticmethod
+    def _key(shop_id: int, day: date) -> str:
+        return f"slot_cache:{shop_id}:{day.isoformat()}"
+
+    @staticmethod
+    def _shop_generation_key(shop_id: int) -> str:
+        return f"slot_cache_gen:{shop_id}"
+
+    @classmethod
+    def _generation_keys(cls, shop_id: int, day: date) -> List[str]:
+        return [f"slot_cache_gen:{shop_id}:{day.isoformat()}", cls._shop_generation_key(shop_id)]
+
+    @classmethod
+    async def get(
+        cls,
+        shop_id: int,
+        day: date,
+        duration: int
+    ) -> Optional[Tuple[List[int], List[Interval]]]:
+        """(free starts, booked intervals) of the day, or None on a miss."""
+        try:
+            redis = RedisService.get_redis()
+            raw_starts, raw_busy = await redis.hmget(cls._key(shop_id, day), [str(duration), BUSY_FIELD])
+        except Exception as e:
+            logger.warning(f"Slot cache read failed: {e}")
+            raw_starts = raw_busy = None
+
+        if raw_starts is None or raw_busy is None:
+            cls.misses += 1
+            return None
+        cls.hits += 1
+        return json.loads(raw_starts), [tuple(interval) for interval in json.loads(raw_busy)]
+
+    @classmethod
+    async def generation(cls, shop_id: int, day: date) -> Optional[str]:
+        """
+        Current generation of a shop-day, to pass to set(); None if Redis
+        failed (set() then writes nothing).
+        """
+        try:
+            redis = RedisService.get_redis()
+            day_generation, shop_generation = await redis.mget(cls._generation_keys(shop_id, day))
+        except Exception as e:
+            logger.warning(f"Slot cache generation read failed: {e}")
+            return None
+        return f"{day_generation or 0}:{shop_generation or 0}"
+
+    @classmethod
+    async def set(
+        cls,
+        shop_id: int,
+        day: date,
+        duration: int,
+        starts: List[int],
+        busy: List[Interval],
+        generation: Optional[str]
+    ) -> bool:
+        """
+        Caches a day computed from a query made after generation() returned
+        ``generation``. False (nothing written) if the day was invalidated
+        since.
+        """
+        global _set_script
+        if generation is None:
+            return False
+        try:
+            redis = RedisService.get_redis()
+            if _set_script is None:
+                _set_script = redis.register_script(SET_SCRIPT)
+            written = await _set_script(
+                keys=[cls._key(shop_id, day), *cls._generation_keys(shop_id, day)],
+                args=[
+                    generation, settings.SLOT_CACHE_TTL_SECONDS,
+                    str(duration), json.dumps(starts), BUSY_FIELD, json.dumps(busy)
+                ],
+                client=redis
+            )
+            return bool(written)
+        except Exception as e:
+            logger.warning(f"Slot cache write failed: {e}")
+            return False
+
+    @classmethod
+    async def invalidate(cls, shop_id: int, *days: Union[date, datetime]) -> None:
+        """
+        Drops the cached slots of the given days. Datetimes are mapped to
+        their wall-clock date, the same way the slot engine buckets them.
+        """
+        days_to_drop = set()
+        for day in days:
+            if day is None:
+                continue
+            if isinstance(day, datetime):
+                day = day.replace(tzinfo=None).date()
+            days_to_drop.add(day)
+        if not days_to_drop:
+            return
+        try:
+            redis = RedisService.get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for day in days_to_drop:
+                    generation_key = cls._generation_keys(shop_id, day)[0]
+                    pipe.incr(generation_key)
+                    pipe.expire(generation_key, GENERATION_TTL_SECONDS)
+                pipe.delete(*(cls._key(shop_id, day) for day in days_to_drop))
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Slot cache invalidation failed: {e}")
+
+    @classmethod
+    async def invalidate_shop(cls, shop_id: int) -> None:
+        """
+        Drops every cached day of a shop, e.g. after its schedule changed.
+        """
+        try:
+            redis = RedisService.get_redis()
+            generation_key = cls._shop_generation_key(shop_id)
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, GENERATION_TTL_SECONDS)
+                await pipe.execute()
+            keys = [key async for key in redis.scan_iter(match=f"slot_cache:{shop_id}:*")]
+            if keys:
+                await redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Slot cache invalidation failed: {e}")
+
+    @classmethod
+    def stats(cls) -> dict:
+        total = cls.hits + cls.misses
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "hit_ratio": cls.hits / total if total else 0.0,
+        }
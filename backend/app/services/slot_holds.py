@@ -0,0 +1,168 @@
+import logging
+import secrets
+import time as clock
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.range_lock import acquire_range, parse_range
+from app.services.redis_service import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Adds ARGV[2] to the owner's live holds unless ARGV[4] are already live.
+# Scores are expiry times. KEYS[1] = owner's holds; ARGV = now, token,
+# expires_at, limit
+CLAIM_SCRIPT = """
+local now_ms = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[3]) - now_ms)
+return 1
+"""
+
+_claim_script = None
+
+class HoldLimitError(Exception):
+    """The customer already keeps SLOT_HOLDS_PER_USER live holds."""
+
+class SlotHeldError(Exception):
+    """Live holds already take every bay left free by the bookings."""
+
+class SlotHolds:
+    """
+    Short-lived holds on slots while a customer confirms in the WebApp.
+
+    Holds of a shop-day live in one Redis sorted set with the same range
+    members as RangeLock, so placing a hold is one atomic Lua call and every
+    hold expires on its own after SLOT_HOLD_TTL_SECONDS. The hold id handed to
+    the client is ``"{day}:{member}"``. Redis errors are logged and read as
+    "no holds" (or "no hold placed"): holds only smooth contention, the
+    exclusion constraint still guards the final booking.
+    """
+
+    @staticmethod
+    def _key(shop_id: int, day: date) -> str:
+        return f"slot_holds:{shop_id}:{day.isoformat()}"
+
+    @staticmethod
+    def _owner_key(owner: int) -> str:
+        return f"slot_holds:owner:{owner}"
+
+    @classmethod
+    async def _claim(cls, owner: int, token: str) -> bool:
+        global _claim_script
+        redis = RedisService.get_redis()
+        if _claim_script is None:
+            _claim_script = redis.register_script(CLAIM_SCRIPT)
+        now_ms = int(clock.time() * 1000)
+        claimed = await _claim_script(
+            keys=[cls._owner_key(owner)],
+            args=[now_ms, token, now_ms + settings.SLOT_HOLD_TTL_SECONDS * 1000, settings.SLOT_HOLDS_PER_USER],
+            client=redis
+        )
+        return bool(claimed)
+
+    @classmethod
+    async def hold(
+        cls,
+        shop_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        owner: int,
+        free_bays: int = 1
+    ) -> Optional[str]:
+        """
+        Holds [start_time, end_time) for the Telegram user ``owner``.
+        ``free_bays`` is the number of bays the bookings leave free over the
+        interval; live holds overlapping it may not exceed that.
+
+        Returns the hold id, or None if Redis failed and no hold was placed.
+        Raises SlotHeldError if the free bays are all held and HoldLimitError
+        if the owner has too many live holds.
+        """
+        if free_bays <= 0:
+            raise SlotHeldError()
+        day = start_time.replace(tzinfo=None).date()
+        token = secrets.token_hex(8)
+        try:
+            claimed = await cls._claim(owner, token)
+            member = claimed and await acquire_range(
+                cls._key(shop_id, day), start_time, end_time, settings.SLOT_HOLD_TTL_SECONDS, free_bays, token
+            )
+            if claimed and not member:
+                await RedisService.get_redis().zrem(cls._owner_key(owner), token)
+        except Exception as e:
+            logger.error(f"Slot hold failed: {e}")
+            return None
+        if not claimed:
+            raise HoldLimitError()
+        if not member:
+            raise SlotHeldError()
+        return f"{day.isoformat()}:{member}"
+
+    @classmethod
+    async def release(cls, shop_id: int, hold_id: str, owner: int) -> bool:
+        """
+        Drops a hold of ``owner``, e.g. once it has been turned into a booking.
+        False if it had already expired, belongs to someone else or the id is
+        malformed.
+        """
+        day, _, member = hold_id.partition(":")
+        try:
+            key = cls._key(shop_id, date.fromisoformat(day))
+        except ValueError:
+            return False
+        token = member.rpartition(":")[2]
+        try:
+            redis = RedisService.get_redis()
+            if not await redis.zrem(cls._owner_key(owner), token):
+                return False
+            return bool(await redis.zrem(key, member))
+        except Exception as e:
+            logger.error(f"Slot hold release failed: {e}")
+            return False
+
+    @classmethod
+    async def owns(cls, hold_id: str, owner: int) -> bool:
+        """
+        True if ``hold_id`` is a live hold of ``owner``. Callers check this
+        before letting a hold id from the client unblock its slot.
+        """
+        token = hold_id.rpartition(":")[2]
+        try:
+            expires_ms = await RedisService.get_redis().zscore(cls._owner_key(owner), token)
+        except Exception as e:
+            logger.warning(f"Slot hold read failed: {e}")
+            return False
+        return expires_ms is not None and expires_ms > clock.time() * 1000
+
+    @classmethod
+    async def held(
+        cls,
+        shop_id: int,
+        day: date,
+        ignore_hold_id: Optional[str] = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Live holds of a shop-day as UTC (start, end) pairs, minus ``ignore_hold_id``
+        (the caller's own hold).
+        """
+        try:
+            redis = RedisService.get_redis()
+            members = await redis.zrangebyscore(cls._key(shop_id, day), int(clock.time() * 1000), "+inf")
+        except Exception as e:
+            logger.warning(f"Slot hold read failed: {e}")
+            return []
+
+        ignored = ignore_hold_id.partition(":")[2] if ignore_hold_id else None
+        now_ms = int(clock.time() * 1000)
+        holds = []
+        for member in members:
+            start, end, expires_ms = parse_range(member)
+            if expires_ms > now_ms and member != ignored:
+                holds.append((start, end))
+        return holds
@@ -11,17 +11,32 @@ logger = logging.getLogger(__name__)
 from app.core.config import settings
 from app.bot.loader import bot, dp
 from app.bot.handlers import router as bot_router
+from app.services.service_catalog import ServiceCatalog
+from app.core.schedule import listen_shop_schedules
+from app.services.outbox import OutboxRelay
 
 async def main():
     logger.info("Starting bot standalone...")
     dp.include_router(bot_router)
+
+    # Keeps the bot's service catalog in step with edits made in the API
+    catalog_listener = asyncio.create_task(ServiceCatalog.listen())
+    # ... and its shop hours and capacity
+    schedule_listener = asyncio.create_task(listen_shop_schedules())
+    # Publishes the dashboard events of bot bookings
+    outbox_relay = asyncio.create_task(OutboxRelay.run())
     
     # Ensure webhook is deleted
     await bot.delete_webhook(drop_pending_updates=True)
     
     logger.info("Bot is polling...")
     logger.info(f"Starting bot with WEBAPP_URL: {settings.WEBAPP_URL}")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        catalog_listener.cancel()
+        schedule_listener.cancel()
+        outbox_relay.cancel()
 
 if __name__ == "__main__":
     asyncio.run(main())
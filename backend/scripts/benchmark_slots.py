@@ -0,0 +1,74 @@
+"""
+Benchmark of the slot engine on a dense synthetic day.
+
+Compares the capacity-aware sweep + bitmap engine with a straightforward
+per-candidate overlap count. No database needed:
+
+    python scripts/benchmark_slots.py [appointments] [capacity]
+"""
+import os
+import random
+import sys
+import timeit
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.core.availability import (
+    intervals_mask, interval_mask, saturated_intervals, starts_in_mask
+)
+
+OPEN, CLOSE = 8 * 60, 20 * 60
+DURATIONS = [30, 40, 45, 60, 90, 120, 180]
+
+
+def synthetic_day(appointments: int, seed: int = 7):
+    rng = random.Random(seed)
+    intervals = []
+    for _ in range(appointments):
+        start = rng.randrange(OPEN, CLOSE - 30, 15)
+        intervals.append((start, min(CLOSE, start + rng.choice(DURATIONS))))
+    intervals.sort()
+    return intervals
+
+
+def naive(intervals, capacity):
+    result = {}
+    for duration in DURATIONS:
+        slots = []
+        current = OPEN - OPEN % 30
+        while current + duration <= CLOSE:
+            # A slot is free if no minute of it has every bay taken
+            ok = True
+            for minute in range(current, current + duration):
+                if sum(1 for s, e in intervals if s <= minute < e) >= capacity:
+                    ok = False
+                    break
+            if ok:
+                slots.append(current)
+            current += 30
+        result[duration] = slots
+    return result
+
+
+def engine(intervals, capacity):
+    busy = intervals_mask(saturated_intervals(intervals, capacity))
+    free = interval_mask(OPEN, CLOSE) & ~busy
+    return {duration: starts_in_mask(free, duration) for duration in DURATIONS}
+
+
+def main():
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    intervals = synthetic_day(appointments)
+
+    assert naive(intervals, capacity) == engine(intervals, capacity)
+
+    print(f"{appointments} appointments, {capacity} bays, {len(DURATIONS)} durations")
+    for name, fn, number in (("naive", naive, 3), ("engine", engine, 2000)):
+        seconds = min(timeit.repeat(lambda: fn(intervals, capacity), number=number, repeat=3)) / number
+        print(f"{name:>8}: {seconds * 1e6:10.1f} us per day")
+
+
+if __name__ == "__main__":
+    main()
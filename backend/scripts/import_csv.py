@@ -0,0 +1,35 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from app.core.csv_import import IMPORT_KINDS, import_csv
+from app.db.session import async_session_local
+
+async def report(stage: str, rows: int):
+    print(f"{stage}: {rows} rows", flush=True)
+
+async def run(kind: str, csv_path: str, shop_id: int = None):
+    print(f"Importing {kind} from {csv_path}...")
+    async with async_session_local() as db:
+        with open(csv_path, mode="r", encoding="utf-8-sig", newline="") as f:
+            result = await import_csv(db, kind, f, shop_id, report)
+    print(
+        f"Done: {result['read']} read, {result['inserted']} inserted, "
+        f"{result['updated']} updated, {result['skipped']} skipped"
+        + (f", {result['conflicts']} without a free bay" if result.get("conflicts") else "")
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a CSV export through COPY")
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("file")
+    parser.add_argument("--shop-id", type=int, help="shop of imported appointments")
+    args = parser.parse_args()
+    if args.kind == "appointments" and args.shop_id is None:
+        parser.error("--shop-id is required for appointments")
+
+    asyncio.run(run(args.kind, args.file, args.shop_id))
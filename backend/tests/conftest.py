@@ -1,7 +1,10 @@
 import pytest
+import pytest_asyncio
 import asyncio
 from typing import AsyncGenerator, Generator
 from httpx import AsyncClient
+from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 from app.db.session import Base, get_db
@@ -13,7 +16,9 @@ settings.TELEGRAM_BOT_TOKEN = "123456789:AABBCCDDEEFFaabbccddeeff" # Valid forma
 from app.db.session import Base, get_db
 from app.main import app
 from app.models.models import User, Shop
+from app.core.schedule import DEFAULT_SCHEDULE
 from app.core.security import get_password_hash
+from app.services.redis_service import RedisService
 
 # Use an in-memory SQLite database for testing, or a separate test DB
 # For this example, we'll use the existing Postgres but with a different DB name if possible, 
@@ -40,6 +45,27 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     # But for integration tests, we want to actually hit the DB.
     pass
 
+# Real Redis behind RedisService; tests using it are skipped without a server
+@pytest_asyncio.fixture
+async def redis(monkeypatch) -> aioredis.Redis:
+    client = aioredis.from_url(
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}", decode_responses=True
+    )
+    monkeypatch.setattr(RedisService, "_pool", client)
+    try:
+        await client.ping()
+    except (ConnectionError, OSError):
+        pytest.skip("redis not available")
+    return client
+
+# Every shop on the default schedule, so mocked sessions only serve appointment rows
+@pytest.fixture
+def default_schedule(monkeypatch):
+    async def fake_schedule(shop_id, db):
+        return DEFAULT_SCHEDULE
+    for module in ("app.core.slots", "app.api.endpoints.appointments"):
+        monkeypatch.setattr(f"{module}.get_shop_schedule", fake_schedule)
+
 # Helper to create a user and get token
 @pytest.fixture
 async def normal_user_token(client: AsyncClient) -> str:
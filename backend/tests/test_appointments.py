@@ -44,3 +44,75 @@ async def test_create_appointment_authorized(client: AsyncClient):
     data = response.json()
     assert data["client_id"] # ID should be assigned
     assert data["shop_id"] == 2 # Admin user belongs to Shop ID 2 (from seed script)
+
+@pytest.mark.asyncio
+async def test_list_appointments_requires_auth(client: AsyncClient):
+    response = await client.get(f"{settings.API_V1_STR}/appointments/")
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_list_appointments_keyset_pages(client: AsyncClient, normal_user_token: str):
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+    url = f"{settings.API_V1_STR}/appointments/"
+    first = await client.get(url, params={"limit": 1}, headers=headers)
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page) <= 1
+    assert all(appt["shop_id"] == 2 for appt in page)  # only the admin's shop
+
+    cursor = first.headers.get("X-Next-Cursor")
+    if cursor:
+        second = await client.get(url, params={"limit": 1, "cursor": cursor}, headers=headers)
+        assert second.status_code == 200
+        previous, following = page[0], second.json()[0]
+        assert (following["start_time"], following["id"]) > (previous["start_time"], previous["id"])
+
+    invalid = await client.get(url, params={"cursor": "not-a-cursor"}, headers=headers)
+    assert invalid.status_code == 422
+
+@pytest.mark.asyncio
+async def test_calendar_feed_joins_client_and_service(client: AsyncClient, normal_user_token: str):
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+    url = f"{settings.API_V1_STR}/appointments/calendar"
+    response = await client.get(
+        url, params={"date_from": "2026-02-01T00:00:00Z", "date_to": "2026-03-01T00:00:00Z"}, headers=headers
+    )
+    assert response.status_code == 200
+    for entry in response.json():
+        assert entry["shop_id"] == 2
+        assert "2026-02-01" <= entry["start_time"] < "2026-03-01"
+        assert {"client_name", "client_phone", "service_name", "service_duration_minutes", "service_price"} <= set(entry)
+
+    too_wide = await client.get(
+        url, params={"date_from": "2026-01-01T00:00:00Z", "date_to": "2026-12-01T00:00:00Z"}, headers=headers
+    )
+    assert too_wide.status_code == 422
+
+    # A naive bound is UTC, whatever the other one carries
+    mixed = await client.get(
+        url, params={"date_from": "2026-02-01T00:00:00", "date_to": "2026-03-01T03:00:00+03:00"}, headers=headers
+    )
+    assert mixed.status_code == 200
+    assert mixed.json() == response.json()
+
+@pytest.mark.asyncio
+async def test_changes_since_feed_cursor(client: AsyncClient, normal_user_token: str):
+    headers = {"Authorization": f"Bearer {normal_user_token}"}
+    feed = await client.get(
+        f"{settings.API_V1_STR}/appointments/calendar",
+        params={"date_from": "2026-02-01T00:00:00Z", "date_to": "2026-03-01T00:00:00Z"},
+        headers=headers
+    )
+    cursor = feed.headers["X-Change-Cursor"]
+
+    url = f"{settings.API_V1_STR}/appointments/changes"
+    response = await client.get(url, params={"since": cursor}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert not data["has_more"]
+    assert all(change["shop_id"] == 2 for change in data["changes"])
+    # The cursor only moves forward
+    assert tuple(map(int, data["cursor"].split("."))) >= tuple(map(int, cursor.split(".")))
+
+    invalid = await client.get(url, params={"since": "not-a-cursor"}, headers=headers)
+    assert invalid.status_code == 422
@@ -1,6 +1,13 @@
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
 import pytest
 from httpx import AsyncClient
 from app.core.config import settings
+from app.core.security import verify_webapp_init_data
 
 @pytest.mark.asyncio
 async def test_login_access_token(client: AsyncClient):
@@ -30,3 +37,33 @@ async def test_login_wrong_password(client: AsyncClient):
         headers={"content-type": "application/x-www-form-urlencoded"}
     )
     assert response.status_code == 400
+
+
+def _init_data(auth_date=None, **fields):
+    fields = {"auth_date": str(auth_date or int(time.time())), "user": json.dumps({"id": 42}), **fields}
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", settings.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def test_webapp_init_data_signed_by_the_bot():
+    assert verify_webapp_init_data(_init_data(query_id="AAE"))["id"] == 42
+    assert verify_webapp_init_data(_init_data().replace("%3A+42", "%3A+43")) is None
+    assert verify_webapp_init_data(_init_data(auth_date=int(time.time()) - 2 * 86400)) is None
+    assert verify_webapp_init_data("user=%7B%22id%22%3A+42%7D") is None
+
+
+@pytest.mark.asyncio
+async def test_slot_hold_requires_webapp_data(client: AsyncClient):
+    response = await client.post(
+        f"{settings.API_V1_STR}/slots/hold",
+        json={"shop_id": 1, "service_id": 1, "start_time": "2099-03-02T10:00:00"}
+    )
+    assert response.status_code == 401
+    response = await client.delete(
+        f"{settings.API_V1_STR}/slots/hold",
+        params={"shop_id": 1, "hold_id": "2099-03-02:x"},
+        headers={"X-Telegram-Init-Data": "user=%7B%22id%22%3A+42%7D&hash=00"}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,83 @@
+import random
+from datetime import datetime, timedelta
+
+from app.core.availability import (
+    interval_mask, intervals_mask, peak_overlap, saturated_intervals, starts_in_mask, to_minute_interval
+)
+
+
+def _nested_loop_starts(intervals, window_start, window_end, duration, step=30):
+    # Reference implementation: the original O(slots x appointments) check
+    slots = []
+    current = window_start
+    while current + duration <= window_end:
+        if all(not (current < end and current + duration > start) for start, end in intervals):
+            slots.append(current)
+        current += step
+    return slots
+
+
+def _merge_intervals(intervals):
+    # Reference implementation: union of intervals sorted by start
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _free_starts(busy, window_start, window_end, duration, not_before=0):
+    free = interval_mask(window_start, window_end) & ~intervals_mask(busy)
+    return starts_in_mask(free, duration, not_before, window_start)
+
+
+def test_to_minute_interval_rounds_outwards():
+    day = datetime(2026, 2, 20)
+    start = day + timedelta(hours=10, seconds=30)
+    end = day + timedelta(hours=11, seconds=1)
+    assert to_minute_interval(start, end, day) == (600, 661)
+
+
+def test_starts_in_mask_not_before_snaps_to_grid():
+    assert _free_starts([], 540, 660, 60, not_before=570) == [570, 600]
+    assert _free_starts([], 540, 660, 60, not_before=575) == [600]
+
+
+def test_starts_in_mask_matches_nested_loop():
+    rng = random.Random(42)
+    for _ in range(500):
+        intervals = []
+        for _ in range(rng.randint(0, 15)):
+            start = rng.randint(480, 1100)
+            intervals.append((start, start + rng.choice([15, 30, 45, 60, 90, 180])))
+        intervals.sort()
+        duration = rng.choice([15, 30, 45, 60, 120, 240])
+
+        expected = _nested_loop_starts(intervals, 540, 1080, duration)
+        assert _free_starts(intervals, 540, 1080, duration) == expected
+
+
+def test_saturated_intervals_capacity_one_is_union():
+    intervals = [(0, 30), (20, 60), (60, 90), (120, 150)]
+    assert saturated_intervals(intervals, 1) == _merge_intervals(intervals)
+
+
+def test_saturated_intervals_counts_concurrent_bays():
+    intervals = [(0, 60), (30, 90), (45, 120), (90, 150)]
+    # Two bays: full while at least two cars overlap
+    assert saturated_intervals(intervals, 2) == [(30, 120)]
+    # Three bays: only 45-60 has three cars at once
+    assert saturated_intervals(intervals, 3) == [(45, 60)]
+    # Back-to-back bookings on one bay do not stack
+    assert saturated_intervals([(0, 60), (60, 120)], 2) == []
+
+
+def test_peak_overlap_within_window():
+    intervals = [(0, 60), (30, 90), (45, 120), (90, 150)]
+    assert peak_overlap(intervals, 0, 30) == 1
+    assert peak_overlap(intervals, 0, 180) == 3
+    assert peak_overlap(intervals, 60, 180) == 2
+    assert peak_overlap(intervals, 150, 180) == 0
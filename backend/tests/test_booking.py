@@ -0,0 +1,255 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError, MissingGreenlet
+
+from app.api.endpoints.appointments import (
+    AppointmentStatusUpdate, AppointmentUpdate, expand_occurrences, update_appointment, update_appointment_status
+)
+from app.core.booking import (
+    SlotTakenError, StaleVersionError, assign_bays, free_bay_query, insert_appointment, insert_appointments, move_appointment
+)
+from app.models.models import Appointment, AppointmentStatus
+from app.services.service_catalog import CatalogService, ServiceCatalog
+
+
+def _at(hour):
+    return datetime(2099, 3, 2, hour, tzinfo=timezone.utc)
+
+
+def test_free_bay_query_checks_each_bay():
+    sql = str(free_bay_query(1, _at(10), _at(11)).compile(dialect=postgresql.dialect()))
+    # Bays come from the shop row, not from a cached capacity
+    assert "(SELECT coalesce(shops.capacity" in sql and "WHERE shops.id = " in sql
+    # The candidate bay must not be shadowed by the appointments' own column
+    assert "appointments_1.bay = bays.bay" in sql
+    assert "tstzrange(appointments_1.start_time, appointments_1.end_time" in sql
+
+
+@pytest.mark.asyncio
+async def test_insert_appointment_no_free_bay():
+    db = AsyncMock()
+    db.scalar.return_value = None
+
+    with pytest.raises(SlotTakenError):
+        await insert_appointment(db, 1, 1, 1, _at(10), _at(11))
+    assert db.scalar.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_insert_appointment_one_round_trip():
+    db = AsyncMock()
+    booked = Appointment(id=7, bay=1)
+    db.scalar.return_value = booked
+
+    assert await insert_appointment(db, 1, 1, 1, _at(10), _at(11)) is booked
+    # The row comes back from RETURNING, not from a SELECT afterwards
+    assert db.scalar.await_count == 1
+    db.get.assert_not_awaited()
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_insert_appointment_maps_exclusion_violation():
+    db = AsyncMock()
+    orig = MagicMock(sqlstate="23P01")
+    db.scalar.side_effect = IntegrityError("INSERT", {}, orig)
+
+    with pytest.raises(SlotTakenError):
+        await insert_appointment(db, 1, 1, 1, _at(10), _at(11))
+    db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_insert_appointment_other_integrity_errors_propagate():
+    db = AsyncMock()
+    db.scalar.side_effect = IntegrityError("INSERT", {}, MagicMock(sqlstate="23503"))
+
+    with pytest.raises(IntegrityError):
+        await insert_appointment(db, 1, 1, 1, _at(10), _at(11))
+
+
+@pytest.mark.asyncio
+async def test_insert_waitlist_entry_takes_no_bay():
+    db = AsyncMock()
+    db.add = MagicMock()
+
+    appt = await insert_appointment(db, 1, 1, 1, _at(10), _at(11), status=AppointmentStatus.WAITLIST)
+
+    db.add.assert_called_once_with(appt)
+    db.scalar.assert_not_awaited()
+
+
+def _appointment(**values):
+    values = {"id": 5, "shop_id": 1, "client_id": 1, "service_id": 1, "start_time": _at(10), "end_time": _at(11),
+              "bay": 1, "status": AppointmentStatus.NEW, "created_at": _at(9), "version": 1, **values}
+    return Appointment(**values)
+
+
+def _row(appt, **values):
+    mapping = {column: values.get(column.name, getattr(appt, column.name)) for column in Appointment.__table__.columns}
+    return MagicMock(_mapping=mapping, version=mapping[Appointment.__table__.c.version])
+
+
+def _results(*rows):
+    results = []
+    for row in rows:
+        result = MagicMock()
+        result.first.return_value = row
+        results.append(result)
+    return results
+
+
+@pytest.mark.asyncio
+async def test_move_appointment_no_free_bay():
+    appt = _appointment()
+    db = AsyncMock()
+    # The UPDATE matches nothing while the version is still the one we read
+    db.execute.side_effect = _results(None, _row(appt))
+
+    with pytest.raises(SlotTakenError):
+        await move_appointment(db, appt, start_time=_at(12), end_time=_at(13))
+    db.refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_move_appointment_stale_version():
+    appt = _appointment()
+    db = AsyncMock()
+    db.execute.side_effect = _results(None, _row(appt, version=2, status=AppointmentStatus.CONFIRMED))
+
+    with pytest.raises(StaleVersionError) as error:
+        await move_appointment(db, appt, 1, status=AppointmentStatus.DONE)
+    assert error.value.current is appt
+    assert (appt.version, appt.status) == (2, AppointmentStatus.CONFIRMED)
+
+
+@pytest.mark.asyncio
+async def test_move_appointment_loads_returned_row():
+    appt = _appointment()
+    db = AsyncMock()
+    db.execute.side_effect = _results(_row(appt, version=2, status=AppointmentStatus.CONFIRMED))
+
+    await move_appointment(db, appt, status=AppointmentStatus.CONFIRMED)
+    assert (appt.version, appt.status) == (2, AppointmentStatus.CONFIRMED)
+    # A status change within the calendar keeps the bay: no bay subquery
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "AND appointments.version = " in sql
+    assert "generate_series" not in sql
+    db.refresh.assert_not_awaited()
+
+
+def test_assign_bays_lowest_free_bay():
+    intervals = [(_at(10), _at(11)), (_at(10), _at(11)), (_at(10), _at(11)), (_at(11), _at(12))]
+    # Bay 1 is taken by an existing booking during the first three
+    taken = {0: {1}, 1: {1}, 2: {1}}
+    assert assign_bays(intervals, taken, 2) == [2, None, None, 1]
+
+
+def test_assign_bays_within_batch():
+    intervals = [(_at(10), _at(12)), (_at(11), _at(13)), (_at(12), _at(13))]
+    # The batch competes with itself; back-to-back intervals share a bay
+    assert assign_bays(intervals, {}, 1) == [1, None, 1]
+    assert assign_bays(intervals, {}, 2) == [1, 2, 1]
+
+
+def test_expand_occurrences_sorted():
+    first, second = datetime(2099, 3, 2, 10), datetime(2099, 3, 2, 12)
+    starts = expand_occurrences([second, first], 7, 2)
+    assert starts == [first, second, first + timedelta(days=7), second + timedelta(days=7)]
+
+
+def test_expand_occurrences_normalizes_offsets():
+    # 14:00+03:00 is 11:00 UTC, stored as naive UTC like the naive start
+    naive = datetime(2099, 3, 2, 10)
+    aware = datetime(2099, 3, 2, 14, tzinfo=timezone(timedelta(hours=3)))
+    assert expand_occurrences([aware, naive], 7, 1) == [naive, datetime(2099, 3, 2, 11)]
+
+
+@pytest.mark.asyncio
+async def test_insert_appointments_one_statement():
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [7, 8]
+    db.execute.return_value = result
+
+    rows = [{"start_time": _at(10), "bay": 1}, {"start_time": _at(11), "bay": 1}]
+    assert await insert_appointments(db, rows) == [7, 8]
+    assert db.execute.await_count == 1
+    assert db.execute.await_args.args[1] == rows
+
+
+@pytest.mark.asyncio
+async def test_insert_appointments_overlap_violation():
+    db = AsyncMock()
+    db.execute.side_effect = IntegrityError("INSERT", {}, MagicMock(sqlstate="23P01"))
+
+    with pytest.raises(SlotTakenError):
+        await insert_appointments(db, [{"start_time": _at(10), "bay": 1}])
+    db.rollback.assert_awaited_once()
+
+
+class _ExpiringUser:
+    """Like a session-loaded user: attributes can no longer load after a rollback."""
+    def __init__(self, db, shop_id):
+        self._shop_id = shop_id
+        self._expired = False
+
+        async def rollback():
+            self._expired = True
+        db.rollback.side_effect = rollback
+
+    @property
+    def shop_id(self):
+        if self._expired:
+            raise MissingGreenlet("greenlet_spawn has not been called")
+        return self._shop_id
+
+
+@pytest.mark.asyncio
+async def test_update_appointment_overlap_violation_is_409(default_schedule, monkeypatch):
+    async def fake_service(db, service_id):
+        return CatalogService(service_id, "Oil", 60, 1500.0)
+    monkeypatch.setattr(ServiceCatalog, "get", fake_service)
+
+    appt = _appointment()
+    loaded, conflicts = MagicMock(), MagicMock()
+    loaded.scalar_one_or_none.return_value = appt
+    conflicts.all.return_value = []
+    db = AsyncMock()
+    # SELECT, the UPDATE losing the race to a concurrent move, the conflict query
+    db.execute.side_effect = [
+        loaded, IntegrityError("UPDATE", {}, MagicMock(sqlstate="23P01")), conflicts
+    ]
+    user = _ExpiringUser(db, shop_id=1)
+
+    with pytest.raises(HTTPException) as error:
+        await update_appointment(5, AppointmentUpdate(start_time=_at(12), version=1), db, user)
+    assert error.value.status_code == 409
+    assert error.value.detail["message"] == "Slot already taken"
+    db.rollback.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_status_update_without_free_bay_offers_alternatives(default_schedule):
+    # Back from the waitlist into a full calendar
+    appt = _appointment(status=AppointmentStatus.WAITLIST)
+    loaded, conflicts = MagicMock(), MagicMock()
+    loaded.scalar_one_or_none.return_value = appt
+    conflicts.all.return_value = [(_at(10), _at(11))]
+    db = AsyncMock()
+    db.execute.side_effect = [
+        loaded, IntegrityError("UPDATE", {}, MagicMock(sqlstate="23P01")), conflicts
+    ]
+    user = MagicMock(shop_id=1)
+
+    with pytest.raises(HTTPException) as error:
+        await update_appointment_status(
+            5, AppointmentStatusUpdate(status=AppointmentStatus.NEW, version=1), db, user
+        )
+    assert error.value.status_code == 409
+    # Same shape as the other booking conflicts
+    assert error.value.detail["message"] == "Slot already taken"
+    assert error.value.detail["alternatives"]
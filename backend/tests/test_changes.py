@@ -0,0 +1,14 @@
+import pytest
+
+from app.core.changes import format_cursor, parse_cursor
+
+
+def test_cursor_round_trip():
+    assert format_cursor(884) == "884.0"
+    assert parse_cursor(format_cursor(884, 25)) == (884, 25)
+
+
+@pytest.mark.parametrize("cursor", ["", "884", "884.x", "1.2.3", "-1.0"])
+def test_parse_rejects_foreign_cursors(cursor):
+    with pytest.raises(ValueError):
+        parse_cursor(cursor)
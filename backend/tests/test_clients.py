@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.clients import ResolvedClient, normalize_phone, search_clients_query, upsert_client
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+7 (999) 123-45-67", "79991234567"),
+    ("8 999 123 45 67", "79991234567"),
+    ("79991234567", "79991234567"),
+    ("+44 20 7946 0958", "442079460958"),
+    ("unknown", None),
+    ("", None),
+    (None, None),
+    ("+1234567890123456", None),
+])
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+def _db(row):
+    db = AsyncMock()
+    result = MagicMock()
+    result.one.return_value = row
+    db.execute.return_value = result
+    return db
+
+
+def _sql(db):
+    return str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_upsert_by_phone_is_one_statement():
+    db = _db((7, "Ivan", False))
+    assert await upsert_client(db, "Ivan", "79991234567") == ResolvedClient(7, "Ivan", False)
+    assert db.execute.await_count == 1
+    sql = _sql(db)
+    assert "ON CONFLICT (phone) DO UPDATE" in sql
+    assert "RETURNING clients.id, clients.full_name, xmax = 0 AS created" in sql
+
+
+@pytest.mark.asyncio
+async def test_upsert_by_telegram_id():
+    db = _db((8, "Ivan", True))
+    assert (await upsert_client(db, "Ivan", telegram_id=42)).created
+    assert "ON CONFLICT (telegram_id) DO UPDATE" in _sql(db)
+
+
+@pytest.mark.asyncio
+async def test_upsert_contact_claims_telegram_client():
+    db = _db((9, "Ivan", False))
+    await upsert_client(db, "Ivan", "79991234567", 42)
+    assert db.execute.await_count == 1
+    sql = _sql(db)
+    # A Telegram-only client takes the phone, otherwise the phone's client is linked
+    assert sql.startswith("WITH claimed AS \n(UPDATE clients SET phone=")
+    assert "ON CONFLICT (phone) DO UPDATE SET telegram_id = excluded.telegram_id" in sql
+
+
+def _search_sql(query):
+    return str(search_clients_query(query).compile(dialect=postgresql.dialect()))
+
+
+def test_search_by_phone_prefix_uses_normalized_phones():
+    sql = _search_sql("8 (999) 12")
+    # Prefix LIKE only, served by the text_pattern_ops index in phone order
+    assert "clients.phone LIKE %(phone_1)s OR clients.phone LIKE %(phone_2)s" in sql
+    assert sql.endswith("ORDER BY clients.phone, clients.id")
+    params = search_clients_query("8 (999) 12").compile(dialect=postgresql.dialect()).params
+    assert sorted(params.values()) == ["799912%", "899912%"]
+
+
+def test_search_by_name_is_ranked_by_word_similarity():
+    stmt = search_clients_query(" Toyota 5_% ")
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "clients.full_name ILIKE" in sql and "clients.vehicle_info ILIKE" in sql
+    assert "<%" in sql
+    assert "ORDER BY greatest(word_similarity(" in sql
+    # LIKE wildcards typed by the user are matched literally
+    assert "%Toyota 5\\_\\%%" in stmt.compile(dialect=postgresql.dialect()).params.values()
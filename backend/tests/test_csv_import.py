@@ -0,0 +1,57 @@
+import io
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core import csv_import
+from app.core.csv_import import CSVImportError, _batches, import_csv, parse_row
+
+
+def test_parse_client_row_normalizes_phone():
+    row = {"full_name": " Ivan ", "phone": "8 (999) 123-45-67", "vehicle_info": ""}
+    assert parse_row("clients", 2, row) == (2, "Ivan", "79991234567", None)
+    assert parse_row("clients", 3, {"full_name": "Ivan", "phone": "unknown"}) is None
+
+
+def test_parse_service_row():
+    assert parse_row("services", 2, {"name": "Oil", "duration_minutes": "45", "base_price": "1500"}) == (
+        2, "Oil", 45, 1500.0
+    )
+    assert parse_row("services", 3, {"name": "Oil", "duration_minutes": "x", "base_price": "1"}) is None
+    assert parse_row("services", 4, {"name": "Oil", "duration_minutes": "0", "base_price": "1"}) is None
+
+
+def test_parse_appointment_row():
+    row = {"phone": "79991234567", "service": "Oil", "start_time": "2020-01-10T09:00:00", "status": ""}
+    # Naive times are UTC, past appointments without a status are done
+    assert parse_row("appointments", 2, row) == (
+        2, "79991234567", "Oil", datetime(2020, 1, 10, 9, tzinfo=timezone.utc), None, "DONE"
+    )
+    row.update(start_time="2099-01-10T09:00:00+03:00", status="cancelled")
+    assert parse_row("appointments", 3, row)[-1] == "CANCELLED"
+    assert parse_row("appointments", 4, {**row, "status": "LOST"}) is None
+    assert parse_row("appointments", 5, {**row, "end_time": "2099-01-10T08:00:00+03:00"}) is None
+
+
+def test_batches_are_bounded(monkeypatch):
+    monkeypatch.setattr(csv_import, "IMPORT_BATCH_SIZE", 2)
+    rows = [{"full_name": "A", "phone": "7999000000%d" % i} for i in range(4)] + [{"full_name": "B", "phone": ""}]
+    batches = list(_batches("clients", rows))
+    assert [(len(batch), read) for batch, read in batches] == [(2, 2), (2, 2), (0, 1)]
+    # Line numbers count the header row
+    assert batches[0][0][0][0] == 2
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_missing_columns():
+    db = AsyncMock()
+    with pytest.raises(CSVImportError, match="phone"):
+        await import_csv(db, "clients", io.StringIO("full_name\nIvan\n"))
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_appointments_need_a_shop():
+    with pytest.raises(CSVImportError):
+        await import_csv(AsyncMock(), "appointments", io.StringIO("phone,service,start_time\n"))
@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.endpoints.exports import _csv_cell
+from app.core.config import settings
+
+
+def test_csv_cells_never_start_a_formula():
+    assert _csv_cell("=HYPERLINK(\"http://x\")") == "'=HYPERLINK(\"http://x\")"
+    assert _csv_cell("+7 999 000-00-00") == "'+7 999 000-00-00"
+    assert _csv_cell("@SUM(A1)") == "'@SUM(A1)"
+    assert _csv_cell("\t=1") == "'\t=1"
+    assert _csv_cell("Иван -") == "Иван -"
+    # Numbers are not text a spreadsheet parses
+    assert _csv_cell(-1500.0) == -1500.0
+
+
+@pytest.mark.asyncio
+async def test_export_requires_auth(client: AsyncClient):
+    response = await client.get(f"{settings.API_V1_STR}/exports/appointments")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_export_appointments_csv(client: AsyncClient, normal_user_token: str):
+    response = await client.get(
+        f"{settings.API_V1_STR}/exports/appointments",
+        params={"format": "csv", "date_from": "2026-01-01T00:00:00Z", "status": "NEW"},
+        headers={"Authorization": f"Bearer {normal_user_token}"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="appointments.csv"'
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert "client_name" in reader.fieldnames
+    assert all(row["status"] == "NEW" for row in reader)
+
+
+@pytest.mark.asyncio
+async def test_export_clients_ndjson(client: AsyncClient, normal_user_token: str):
+    response = await client.get(
+        f"{settings.API_V1_STR}/exports/clients",
+        headers={"Authorization": f"Bearer {normal_user_token}"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    clients = [json.loads(line) for line in response.text.splitlines()]
+    assert clients
+    assert set(clients[0]) == {"id", "full_name", "phone", "telegram_id", "vehicle_info"}
+    assert [c["id"] for c in clients] == sorted(c["id"] for c in clients)
@@ -0,0 +1,60 @@
+import asyncio
+import secrets
+
+import pytest
+
+from app.core.config import settings
+from app.services import idempotency
+from app.services.idempotency import (
+    IdempotencyInProgressError, IdempotencyKeyReusedError, IdempotencyStore, request_fingerprint
+)
+
+
+@pytest.fixture
+def scope(redis, monkeypatch):
+    monkeypatch.setattr(idempotency, "_release_script", None)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 1)
+    return f"test:{secrets.token_hex(8)}"
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint({"a": 1, "b": 2}) == request_fingerprint({"b": 2, "a": 1})
+    assert request_fingerprint({"a": 1}) != request_fingerprint({"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_replay_returns_stored_response(scope):
+    lease, stored = await IdempotencyStore.begin(scope, "f1")
+    assert lease and stored is None
+    await IdempotencyStore.complete(scope, lease, 200, {"id": 7})
+
+    assert await IdempotencyStore.begin(scope, "f1") == (None, {"fingerprint": "f1", "status_code": 200, "body": {"id": 7}})
+    with pytest.raises(IdempotencyKeyReusedError):
+        await IdempotencyStore.begin(scope, "f2")
+
+
+@pytest.mark.asyncio
+async def test_duplicate_waits_for_first_request(scope):
+    lease, _ = await IdempotencyStore.begin(scope, "f1")
+
+    async def finish():
+        await asyncio.sleep(0.1)
+        await IdempotencyStore.complete(scope, lease, 200, {"id": 7})
+
+    duplicate, _ = await asyncio.gather(IdempotencyStore.begin(scope, "f1"), finish())
+    assert duplicate[1]["body"] == {"id": 7}
+
+
+@pytest.mark.asyncio
+async def test_release_lets_retry_run(scope):
+    lease, _ = await IdempotencyStore.begin(scope, "f1")
+    with pytest.raises(IdempotencyInProgressError):
+        await IdempotencyStore.begin(scope, "f1")
+
+    await IdempotencyStore.release(scope, lease)
+    retry, stored = await IdempotencyStore.begin(scope, "f1")
+    assert retry and retry != lease and stored is None
+    # A stale lease no longer owns the key
+    await IdempotencyStore.release(scope, lease)
+    with pytest.raises(IdempotencyInProgressError):
+        await IdempotencyStore.begin(scope, "f1")
@@ -0,0 +1,78 @@
+import secrets
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.exceptions import ConnectionError
+from sqlalchemy.dialects import postgresql
+
+from app.models.models import OutboxEvent
+from app.services.outbox import OutboxRelay, add_event
+from app.services.redis_service import RedisService
+
+
+def _db(*events):
+    db = AsyncMock()
+    db.add = MagicMock()
+    result = MagicMock()
+    result.all.return_value = list(events)
+    db.execute.return_value = result
+    return db
+
+
+def _event(id, channel, payload, change_xid=100):
+    return MagicMock(id=id, channel=channel, payload=payload, change_xid=change_xid)
+
+
+def test_add_event_queues_in_session():
+    db = _db()
+    add_event(db, "NEW_APPOINTMENT", {"id": 7})
+    event = db.add.call_args.args[0]
+    assert isinstance(event, OutboxEvent)
+    assert event.channel == "appointments_updates"
+    assert event.payload == {"type": "NEW_APPOINTMENT", "data": {"id": 7}}
+
+
+@pytest.mark.asyncio
+async def test_relay_batch_publishes_then_deletes(redis):
+    channel = f"test_outbox:{secrets.token_hex(4)}"
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(channel)
+    await pubsub.get_message(timeout=1)  # subscribe confirmation
+
+    db = _db(_event(1, channel, {"type": "A"}), _event(2, channel, {"type": "B"}, 101))
+    assert await OutboxRelay.relay_batch(db) == 2
+
+    received = []
+    while len(received) < 2:
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+        assert message is not None
+        received.append(message["data"])
+    # With the change cursor of each event's transaction
+    assert received == ['{"type": "A", "cursor": "100.0"}', '{"type": "B", "cursor": "101.0"}']
+    # SELECT ... FOR UPDATE SKIP LOCKED, then DELETE, in one transaction
+    select_sql = str(db.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in select_sql
+    assert db.execute.await_count == 2
+    db.commit.assert_awaited_once()
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_relay_batch_keeps_events_when_redis_fails(monkeypatch):
+    broken = MagicMock()
+    broken.pipeline.side_effect = ConnectionError("redis down")
+    monkeypatch.setattr(RedisService, "_pool", broken)
+
+    db = _db(_event(1, "appointments_updates", {"type": "A"}))
+    with pytest.raises(ConnectionError):
+        await OutboxRelay.relay_batch(db)
+    assert db.execute.await_count == 1
+    db.rollback.assert_awaited_once()
+    db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_relay_batch_empty_outbox():
+    db = _db()
+    assert await OutboxRelay.relay_batch(db) == 0
+    db.commit.assert_not_awaited()
@@ -0,0 +1,33 @@
+import asyncpg
+import pytest
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.slots import busy_intervals_query
+
+
+@pytest.mark.asyncio
+async def test_day_query_uses_active_appointments_index():
+    stmt = busy_intervals_query(1, datetime(2026, 2, 20), datetime(2026, 2, 21))
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            # Small test tables would be scanned sequentially anyway
+            await conn.execute(text("SET enable_seqscan = off"))
+            plan = "\n".join((await conn.execute(text(f"EXPLAIN {sql}"))).scalars().all())
+    except (OSError, DBAPIError, asyncpg.PostgresError):
+        pytest.skip("database not available")
+    finally:
+        await engine.dispose()
+
+    # The partial index predicate only matches literal statuses
+    assert "NOT IN ('CANCELLED', 'WAITLIST')" in str(sql)
+    assert "ix_appointments_shop_start_active" in plan
+    assert "Seq Scan" not in plan
@@ -0,0 +1,86 @@
+import random
+from unittest.mock import AsyncMock
+
+import pytest
+from datetime import datetime, timezone
+
+from app.core.booking import SlotTakenError, booking_guard
+from app.core.config import settings
+from app.services import range_lock
+from app.services.range_lock import RangeLock, RangeLockedError
+
+
+def _at(hour, minute=0):
+    return datetime(2099, 3, 2, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def shop_id(redis, monkeypatch):
+    monkeypatch.setattr(range_lock, "_acquire_script", None)
+    # A fresh shop per test; its key expires with the ranges
+    return -random.randint(1, 10 ** 9)
+
+
+@pytest.mark.asyncio
+async def test_overlapping_ranges_conflict(shop_id):
+    lease = await RangeLock.acquire(shop_id, _at(10), _at(11))
+    assert lease
+
+    assert await RangeLock.acquire(shop_id, _at(10, 30), _at(11, 30)) is None
+    assert await RangeLock.acquire(shop_id, _at(9, 30), _at(10, 1)) is None
+    # Touching ranges do not overlap
+    assert await RangeLock.acquire(shop_id, _at(11), _at(12))
+    assert await RangeLock.acquire(shop_id, _at(9), _at(10))
+
+
+@pytest.mark.asyncio
+async def test_overlapping_ranges_up_to_limit(shop_id):
+    # Three bays: three overlapping bookings may be in flight at once
+    assert await RangeLock.acquire(shop_id, _at(10), _at(11), limit=3)
+    assert await RangeLock.acquire(shop_id, _at(10, 30), _at(11, 30), limit=3)
+    assert await RangeLock.acquire(shop_id, _at(10, 45), _at(12), limit=3)
+    assert await RangeLock.acquire(shop_id, _at(10, 50), _at(11), limit=3) is None
+    # Past the first range only two overlap
+    assert await RangeLock.acquire(shop_id, _at(11), _at(12), limit=3)
+
+
+@pytest.mark.asyncio
+async def test_booking_guard_admits_one_booking_per_bay(shop_id, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_RANGE_LOCK", True)
+    db = AsyncMock()
+    db.scalar.return_value = 2
+
+    async with booking_guard(db, shop_id, _at(10), _at(11)):
+        async with booking_guard(db, shop_id, _at(10), _at(11)):
+            with pytest.raises(SlotTakenError):
+                async with booking_guard(db, shop_id, _at(10, 30), _at(11)):
+                    pass
+    assert await RangeLock.acquire(shop_id, _at(10), _at(11))
+
+
+@pytest.mark.asyncio
+async def test_release_is_token_checked(shop_id):
+    lease = await RangeLock.acquire(shop_id, _at(10), _at(11))
+    assert await RangeLock.release(shop_id, lease)
+    assert not await RangeLock.release(shop_id, lease)
+
+    # A new holder of the same range is not released by the stale lease
+    newer = await RangeLock.acquire(shop_id, _at(10), _at(11))
+    assert not await RangeLock.release(shop_id, lease)
+    assert await RangeLock.acquire(shop_id, _at(10), _at(11)) is None
+    assert await RangeLock.release(shop_id, newer)
+
+
+@pytest.mark.asyncio
+async def test_expired_ranges_are_ignored(shop_id):
+    assert await RangeLock.acquire(shop_id, _at(10), _at(11), ttl_seconds=0)
+    assert await RangeLock.acquire(shop_id, _at(10), _at(11))
+
+
+@pytest.mark.asyncio
+async def test_hold_releases_on_exit(shop_id):
+    async with RangeLock.hold(shop_id, _at(10), _at(11)):
+        with pytest.raises(RangeLockedError):
+            async with RangeLock.hold(shop_id, _at(10, 30), _at(12)):
+                pass
+    assert await RangeLock.acquire(shop_id, _at(10, 30), _at(12))
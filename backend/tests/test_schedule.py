@@ -0,0 +1,64 @@
+import asyncio
+from datetime import date, time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core import schedule as shop_schedule
+from app.core.availability import interval_mask, starts_in_mask
+from app.core.schedule import DEFAULT_SCHEDULE, compile_schedule, get_shop_schedule, invalidate_shop_schedule
+from app.models.models import ShopBreak, ShopScheduleException, ShopWorkingHours
+
+
+def test_default_schedule_is_nine_to_six():
+    assert DEFAULT_SCHEDULE.day_mask(date(2026, 2, 20)) == interval_mask(540, 1080)
+
+
+def test_breaks_and_exceptions():
+    hours = [ShopWorkingHours(weekday=wd, open_time=time(8, 0), close_time=time(20, 0)) for wd in range(5)]
+    breaks = [ShopBreak(weekday=None, start_time=time(13, 0), end_time=time(14, 0))]
+    exceptions = [
+        ShopScheduleException(day=date(2026, 2, 23), open_time=None, close_time=None),
+        ShopScheduleException(day=date(2026, 2, 24), open_time=time(10, 0), close_time=time(15, 0)),
+    ]
+    schedule = compile_schedule(hours, breaks, exceptions)
+
+    friday = schedule.day_mask(date(2026, 2, 20))
+    assert friday == interval_mask(480, 780) | interval_mask(840, 1200)
+    # Weekend has no working hours
+    assert schedule.day_mask(date(2026, 2, 21)) == 0
+    # Holiday and a short day that still keeps the lunch break
+    assert schedule.day_mask(date(2026, 2, 23)) == 0
+    assert schedule.day_mask(date(2026, 2, 24)) == interval_mask(600, 780) | interval_mask(840, 900)
+
+    starts = starts_in_mask(friday, 60)
+    assert 720 in starts        # 12:00-13:00 fits before lunch
+    assert 750 not in starts    # 12:30 would overlap lunch
+    assert 840 in starts        # 14:00 right after lunch
+    assert starts[-1] == 1140   # 19:00-20:00
+
+
+@pytest.mark.asyncio
+async def test_schedule_edits_reach_listeners(redis, monkeypatch):
+    monkeypatch.setattr(shop_schedule, "_compiled", {})
+    db = AsyncMock()
+    db.scalar.return_value = 2
+    db.execute.return_value = MagicMock()
+    db.execute.return_value.scalars.return_value.all.return_value = []
+    listener = asyncio.create_task(shop_schedule.listen_shop_schedules())
+    try:
+        await asyncio.sleep(0.1)
+        await get_shop_schedule(1, db)
+        await get_shop_schedule(2, db)
+        assert set(shop_schedule._compiled) == {1, 2}
+
+        # Another process edited the hours of shop 1
+        version = await redis.incr(shop_schedule.VERSION_KEY)
+        await redis.publish(shop_schedule.CHANNEL, f"1:{version}")
+        await asyncio.sleep(0.1)
+        assert set(shop_schedule._compiled) == {2}
+
+        await invalidate_shop_schedule(2)
+        assert shop_schedule._compiled == {}
+    finally:
+        listener.cancel()
@@ -0,0 +1,59 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.models import Service
+from app.services.redis_service import RedisService
+from app.services.service_catalog import VERSION_KEY, ServiceCatalog
+
+
+@pytest.fixture
+def db(redis, monkeypatch):
+    monkeypatch.setattr(ServiceCatalog, "_catalog", None)
+
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [
+        Service(id=1, name="Oil change", duration_minutes=30, base_price=1500.0),
+        Service(id=2, name="Diagnostics", duration_minutes=60, base_price=2000.0),
+    ]
+    db.execute.return_value = result
+    return db
+
+
+@pytest.mark.asyncio
+async def test_catalog_is_read_through(db):
+    assert (await ServiceCatalog.get(db, 2)).name == "Diagnostics"
+    assert await ServiceCatalog.get(db, 3) is None
+    assert [s.id for s in await ServiceCatalog.all(db)] == [1, 2]
+    assert db.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_drop_only_older_copies(db):
+    await ServiceCatalog.all(db)
+    version = ServiceCatalog._catalog[0]
+
+    ServiceCatalog.drop(version)
+    assert ServiceCatalog._catalog is not None
+    ServiceCatalog.drop(version + 1)
+    assert ServiceCatalog._catalog is None
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_listeners(db):
+    listener = asyncio.create_task(ServiceCatalog.listen())
+    try:
+        await asyncio.sleep(0.1)
+        await ServiceCatalog.all(db)
+        assert ServiceCatalog._catalog is not None
+
+        # Another process edited a service
+        redis = RedisService.get_redis()
+        version = await redis.incr(VERSION_KEY)
+        await redis.publish("service_catalog", str(version))
+        await asyncio.sleep(0.1)
+        assert ServiceCatalog._catalog is None
+    finally:
+        listener.cancel()
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    gate = asyncio.Event()
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return [(540, 600)]
+
+    tasks = [asyncio.create_task(flight.do((1, "2026-02-20"), query)) for _ in range(10)]
+    await asyncio.sleep(0)
+    assert flight.stats()["waiting"] == {str((1, "2026-02-20")): 9}
+
+    gate.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert all(r == [(540, 600)] for r in results)
+    stats = flight.stats()
+    assert stats["coalesced_total"] == 9
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == {}
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(
+        *(flight.do("key", failing) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    # The failed call is not remembered
+    async def ok():
+        return 1
+    assert await flight.do("key", ok) == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    leader = asyncio.create_task(flight.do("key", query))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", query))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    assert await follower == 2
+    assert calls == 2
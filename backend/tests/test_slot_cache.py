@@ -0,0 +1,130 @@
+import random
+
+import pytest
+from datetime import date, datetime, time, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.slots import free_bays, get_cached_available_slots
+from app.services import slot_cache
+from app.services.slot_cache import SlotCache
+from app.services.slot_holds import SlotHolds
+from app.core.schedule import compile_schedule
+
+
+pytestmark = pytest.mark.usefixtures("default_schedule")
+
+
+@pytest.fixture
+def shop_id(redis, monkeypatch):
+    monkeypatch.setattr(slot_cache, "_set_script", None)
+    monkeypatch.setattr(SlotCache, "hits", 0)
+    monkeypatch.setattr(SlotCache, "misses", 0)
+    # A fresh shop per test; its keys expire with the cache TTL
+    return -random.randint(1, 10 ** 9)
+
+
+def _db(*rows):
+    db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.all.return_value = list(rows)
+    db.execute.return_value = mock_result
+    return db
+
+
+async def _hold(redis, shop_id, day, start, end):
+    # A live hold, as SlotHolds stores it (times are UTC milliseconds)
+    start_ms = int(start.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    end_ms = int(end.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    member = f"{start_ms}:{end_ms}:{2 ** 62}:token"
+    await redis.zadd(SlotHolds._key(shop_id, day), {member: end_ms})
+    return f"{day}:{member}"
+
+
+@pytest.mark.asyncio
+async def test_cached_slots_skip_db_on_hit(shop_id):
+    db = _db()
+    target_date = date(2026, 2, 20)
+
+    first = await get_cached_available_slots(shop_id, 60, target_date, db)
+    second = await get_cached_available_slots(shop_id, 60, target_date, db)
+
+    assert first == second
+    assert first[0] == datetime.combine(target_date, time(9, 0))
+    assert db.execute.await_count == 1
+    assert SlotCache.stats()["hits"] == 1
+    assert SlotCache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_every_duration_of_the_day(shop_id):
+    target_date = date(2026, 2, 20)
+    generation = await SlotCache.generation(shop_id, target_date)
+    await SlotCache.set(shop_id, target_date, 30, [540], [], generation)
+    await SlotCache.set(shop_id, target_date, 60, [540], [], generation)
+    other_generation = await SlotCache.generation(shop_id, date(2026, 2, 21))
+    await SlotCache.set(shop_id, date(2026, 2, 21), 60, [540], [(600, 660)], other_generation)
+
+    await SlotCache.invalidate(shop_id, datetime.combine(target_date, time(10, 0)))
+
+    assert await SlotCache.get(shop_id, target_date, 30) is None
+    assert await SlotCache.get(shop_id, target_date, 60) is None
+    assert await SlotCache.get(shop_id, date(2026, 2, 21), 60) == ([540], [(600, 660)])
+
+
+@pytest.mark.asyncio
+async def test_write_after_invalidation_is_dropped(shop_id):
+    target_date = date(2026, 2, 20)
+    # A reader took the generation and queried the day, then a booking
+    # committed and invalidated before the reader wrote its result
+    generation = await SlotCache.generation(shop_id, target_date)
+    await SlotCache.invalidate(shop_id, target_date)
+    assert not await SlotCache.set(shop_id, target_date, 60, [540], [], generation)
+    assert await SlotCache.get(shop_id, target_date, 60) is None
+
+    generation = await SlotCache.generation(shop_id, target_date)
+    await SlotCache.invalidate_shop(shop_id)
+    assert not await SlotCache.set(shop_id, target_date, 60, [540], [], generation)
+
+    generation = await SlotCache.generation(shop_id, target_date)
+    assert await SlotCache.set(shop_id, target_date, 60, [540], [], generation)
+    assert await SlotCache.get(shop_id, target_date, 60) == ([540], [])
+
+
+@pytest.mark.asyncio
+async def test_cached_slots_exclude_holds(shop_id, redis):
+    db = _db()
+    target_date = date(2099, 2, 20)
+    hold_id = await _hold(redis, shop_id, target_date, datetime(2099, 2, 20, 10), datetime(2099, 2, 20, 11))
+
+    slots = await get_cached_available_slots(shop_id, 60, target_date, db)
+    assert datetime.combine(target_date, time(9, 30)) not in slots
+    assert datetime.combine(target_date, time(10, 30)) not in slots
+    assert datetime.combine(target_date, time(9, 0)) in slots
+    assert datetime.combine(target_date, time(11, 0)) in slots
+
+    # The holder itself still sees its slot
+    own = await get_cached_available_slots(shop_id, 60, target_date, db, ignore_hold_id=hold_id)
+    assert datetime.combine(target_date, time(10, 0)) in own
+
+
+@pytest.mark.asyncio
+async def test_holds_stack_on_cached_bookings(shop_id, redis, monkeypatch):
+    two_bays = compile_schedule([], [], [], capacity=2)
+    async def fake_schedule(shop_id, db):
+        return two_bays
+    monkeypatch.setattr("app.core.slots.get_shop_schedule", fake_schedule)
+    # One bay booked 10:00-11:00
+    db = _db((datetime(2099, 2, 20, 10), datetime(2099, 2, 20, 11)))
+    target_date = date(2099, 2, 20)
+    assert datetime.combine(target_date, time(10, 0)) in await get_cached_available_slots(shop_id, 60, target_date, db)
+
+    # The other bay held 10:00-11:00
+    await _hold(redis, shop_id, target_date, datetime(2099, 2, 20, 10), datetime(2099, 2, 20, 11))
+
+    slots = await get_cached_available_slots(shop_id, 60, target_date, db)
+    assert datetime.combine(target_date, time(10, 0)) not in slots
+    assert datetime.combine(target_date, time(11, 0)) in slots
+    assert await free_bays(shop_id, datetime(2099, 2, 20, 10, 30), 60, db) == 1
+    assert await free_bays(shop_id, datetime(2099, 2, 20, 11), 60, db) == 2
+    # Bookings came from the cache every time after the first query
+    assert db.execute.await_count == 1
@@ -0,0 +1,111 @@
+import random
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from app.api.endpoints import slots
+from app.core.config import settings
+from app.services import range_lock
+from app.services.redis_service import RedisService
+from app.services import slot_holds
+from app.services.service_catalog import CatalogService
+from app.services.slot_holds import HoldLimitError, SlotHeldError, SlotHolds
+
+
+def _at(hour, minute=0):
+    return datetime(2099, 3, 2, hour, minute)
+
+
+@pytest.fixture
+def shop_id(redis, monkeypatch):
+    monkeypatch.setattr(range_lock, "_acquire_script", None)
+    monkeypatch.setattr(slot_holds, "_claim_script", None)
+    return -random.randint(1, 10 ** 9)
+
+
+@pytest.mark.asyncio
+async def test_hold_is_listed_until_released(shop_id):
+    hold_id = await SlotHolds.hold(shop_id, _at(10), _at(11), owner=shop_id)
+    assert hold_id.startswith("2099-03-02:")
+
+    utc = lambda dt: dt.replace(tzinfo=timezone.utc)
+    assert await SlotHolds.held(shop_id, date(2099, 3, 2)) == [(utc(_at(10)), utc(_at(11)))]
+    assert await SlotHolds.held(shop_id, date(2099, 3, 2), ignore_hold_id=hold_id) == []
+    assert await SlotHolds.held(shop_id, date(2099, 3, 3)) == []
+
+    # Only its owner can use or release it
+    assert await SlotHolds.owns(hold_id, owner=shop_id)
+    assert not await SlotHolds.owns(hold_id, owner=shop_id - 1)
+    assert not await SlotHolds.release(shop_id, hold_id, owner=shop_id - 1)
+    assert await SlotHolds.release(shop_id, hold_id, owner=shop_id)
+    assert not await SlotHolds.owns(hold_id, owner=shop_id)
+    assert await SlotHolds.held(shop_id, date(2099, 3, 2)) == []
+    assert not await SlotHolds.release(shop_id, hold_id, owner=shop_id)
+    assert not await SlotHolds.release(shop_id, "garbage", owner=shop_id)
+
+
+@pytest.mark.asyncio
+async def test_overlapping_holds_limited_by_capacity(shop_id):
+    assert await SlotHolds.hold(shop_id, _at(10), _at(11), owner=shop_id)
+    with pytest.raises(SlotHeldError):
+        await SlotHolds.hold(shop_id, _at(10, 30), _at(11, 30), owner=shop_id - 1)
+    assert await SlotHolds.hold(shop_id, _at(10, 30), _at(11, 30), owner=shop_id - 1, free_bays=2)
+    with pytest.raises(SlotHeldError):
+        await SlotHolds.hold(shop_id, _at(10, 45), _at(11), owner=shop_id - 2, free_bays=2)
+    # Every bay booked
+    with pytest.raises(SlotHeldError):
+        await SlotHolds.hold(shop_id, _at(13), _at(14), owner=shop_id - 2, free_bays=0)
+    assert await SlotHolds.hold(shop_id, _at(11, 30), _at(12), owner=shop_id - 2)
+
+
+@pytest.mark.asyncio
+async def test_live_holds_per_owner_are_capped(shop_id, monkeypatch):
+    monkeypatch.setattr(settings, "SLOT_HOLDS_PER_USER", 2)
+    owner = shop_id
+    first = await SlotHolds.hold(shop_id, _at(10), _at(11), owner)
+    # A refused hold does not use up the allowance
+    with pytest.raises(SlotHeldError):
+        await SlotHolds.hold(shop_id, _at(10), _at(11), owner)
+    assert await SlotHolds.hold(shop_id, _at(12), _at(13), owner)
+    with pytest.raises(HoldLimitError):
+        await SlotHolds.hold(shop_id, _at(14), _at(15), owner)
+
+    assert await SlotHolds.release(shop_id, first, owner)
+    assert await SlotHolds.hold(shop_id, _at(14), _at(15), owner)
+
+
+@pytest.mark.asyncio
+async def test_hold_without_redis_places_no_hold(monkeypatch):
+    class BrokenRedis:
+        def register_script(self, script):
+            async def run(**kwargs):
+                raise ConnectionError("down")
+            return run
+    monkeypatch.setattr(RedisService, "_pool", BrokenRedis())
+    monkeypatch.setattr(slot_holds, "_claim_script", None)
+    assert await SlotHolds.hold(1, _at(10), _at(11), owner=1) is None
+
+
+@pytest.mark.asyncio
+async def test_refused_hold_is_not_offered_as_alternative(monkeypatch):
+    async def service(db, service_id):
+        return CatalogService(id=service_id, name="Wash", duration_minutes=60, base_price=10.0)
+    async def available(shop_id, duration, day, db):
+        return [_at(9), _at(10), _at(11)]
+    async def bays(*args):
+        return 1
+    async def refuse(*args, **kwargs):
+        raise SlotHeldError()
+    monkeypatch.setattr(slots.ServiceCatalog, "get", service)
+    monkeypatch.setattr(slots, "get_cached_available_slots", available)
+    monkeypatch.setattr(slots, "free_bays", bays)
+    monkeypatch.setattr(SlotHolds, "hold", refuse)
+
+    hold = slots.SlotHoldCreate(shop_id=1, service_id=1, start_time=_at(10))
+    with pytest.raises(HTTPException) as exc:
+        await slots.hold_slot(hold, db=None, telegram_id=42)
+
+    assert exc.value.status_code == 409
+    assert exc.value.detail["alternatives"] == [_at(9).isoformat(), _at(11).isoformat()]
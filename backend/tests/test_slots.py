@@ -1,8 +1,23 @@
 import pytest
 from datetime import date, datetime, time, timedelta
 from unittest.mock import AsyncMock, MagicMock
-from app.core.slots import get_available_slots, WORK_START, WORK_END
+from app.core.slots import (
+    alternative_slots, get_available_slots, get_available_slots_by_duration, get_available_slots_range,
+    get_next_available_slots, nearest_slots, WORK_START, WORK_END
+)
 from app.models.models import Appointment
+from app.core.schedule import DEFAULT_SCHEDULE
+
+
+pytestmark = pytest.mark.usefixtures("default_schedule")
+
+
+@pytest.fixture(autouse=True)
+def no_holds(monkeypatch):
+    async def fake_held(shop_id, day, ignore_hold_id=None):
+        return []
+    monkeypatch.setattr("app.core.slots.SlotHolds.held", fake_held)
+
 
 @pytest.mark.asyncio
 async def test_get_available_slots_empty_day():
@@ -10,7 +25,7 @@ async def test_get_available_slots_empty_day():
     db = AsyncMock()
     # Mock result of execute
     mock_result = MagicMock()
-    mock_result.scalars().all.return_value = []
+    mock_result.all.return_value = []
     db.execute.return_value = mock_result
     
     shop_id = 1
@@ -44,7 +59,7 @@ async def test_get_available_slots_with_appointment():
     )
     
     mock_result = MagicMock()
-    mock_result.scalars().all.return_value = [appt]
+    mock_result.all.return_value = [(appt.start_time, appt.end_time)]
     db.execute.return_value = mock_result
     
     duration = 60
@@ -75,8 +90,144 @@ async def test_get_available_slots_full_day_blocked():
     )
     
     mock_result = MagicMock()
-    mock_result.scalars().all.return_value = [appt]
+    mock_result.all.return_value = [(appt.start_time, appt.end_time)]
     db.execute.return_value = mock_result
     
     slots = await get_available_slots(1, 60, target_date, db)
     assert len(slots) == 0
+
+@pytest.mark.asyncio
+async def test_get_available_slots_range_single_query():
+    db = AsyncMock()
+    first_day = date(2026, 2, 20)
+    second_day = date(2026, 2, 21)
+
+    # Second day is fully booked, first day has one appointment 10:00 - 11:00
+    appts = [
+        Appointment(
+            shop_id=1,
+            start_time=datetime.combine(first_day, time(10, 0)),
+            end_time=datetime.combine(first_day, time(11, 0)),
+            status='confirmed'
+        ),
+        Appointment(
+            shop_id=1,
+            start_time=datetime.combine(second_day, WORK_START),
+            end_time=datetime.combine(second_day, WORK_END),
+            status='confirmed'
+        ),
+    ]
+
+    mock_result = MagicMock()
+    mock_result.all.return_value = [(a.start_time, a.end_time) for a in appts]
+    db.execute.return_value = mock_result
+
+    days = await get_available_slots_range(1, 60, first_day, date(2026, 2, 22), db)
+
+    assert db.execute.await_count == 1
+    assert list(days) == [first_day, second_day, date(2026, 2, 22)]
+    assert datetime.combine(first_day, time(10, 0)) not in days[first_day]
+    assert datetime.combine(first_day, time(11, 0)) in days[first_day]
+    assert days[second_day] == []
+    assert len(days[date(2026, 2, 22)]) == 17
+
+@pytest.mark.asyncio
+async def test_get_available_slots_range_limit():
+    db = AsyncMock()
+    with pytest.raises(ValueError):
+        await get_available_slots_range(1, 60, date(2026, 2, 1), date(2026, 4, 30), db)
+
+@pytest.mark.asyncio
+async def test_get_available_slots_by_duration_shares_gaps():
+    db = AsyncMock()
+    target_date = date(2026, 2, 20)
+
+    # Existing appointment: 10:00 - 17:00, leaving 9:00-10:00 and 17:00-18:00
+    appt = Appointment(
+        shop_id=1,
+        start_time=datetime.combine(target_date, time(10, 0)),
+        end_time=datetime.combine(target_date, time(17, 0)),
+        status='confirmed'
+    )
+
+    mock_result = MagicMock()
+    mock_result.all.return_value = [(appt.start_time, appt.end_time)]
+    db.execute.return_value = mock_result
+
+    by_duration = await get_available_slots_by_duration(1, [30, 60, 90, 60], target_date, db)
+
+    assert db.execute.await_count == 1
+    assert list(by_duration) == [30, 60, 90]
+    assert by_duration[90] == []
+    for duration, slots in by_duration.items():
+        assert slots == await get_available_slots(1, duration, target_date, db)
+
+@pytest.mark.asyncio
+async def test_get_next_available_slots_same_day():
+    db = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.all.return_value = []
+    db.execute.return_value = mock_result
+
+    after = datetime(2099, 3, 2, 10, 15)
+    slots = await get_next_available_slots(1, 60, db, after=after, limit=2)
+
+    assert slots == [datetime(2099, 3, 2, 10, 30), datetime(2099, 3, 2, 11, 0)]
+    assert db.execute.await_count == 1
+
+@pytest.mark.asyncio
+async def test_get_next_available_slots_grows_windows():
+    db = AsyncMock()
+    first_day = date(2099, 3, 2)
+
+    # The first five days are fully booked
+    booked = [
+        (datetime.combine(first_day + timedelta(days=i), WORK_START),
+         datetime.combine(first_day + timedelta(days=i), WORK_END))
+        for i in range(5)
+    ]
+    mock_result = MagicMock()
+    mock_result.all.return_value = booked
+    db.execute.return_value = mock_result
+
+    slots = await get_next_available_slots(1, 60, db, after=datetime.combine(first_day, time(8)), limit=3)
+
+    sixth_day = first_day + timedelta(days=5)
+    assert slots == [datetime.combine(sixth_day, time(9, m)) for m in (0, 30)] + [
+        datetime.combine(sixth_day, time(10))
+    ]
+    # Windows of 2 and 4 days cover the first six days
+    assert db.execute.await_count == 2
+
+    db.execute.reset_mock()
+    assert await get_next_available_slots(1, 60, db, after=datetime.combine(first_day, time(8)), horizon_days=3) == []
+    assert db.execute.await_count == 2
+
+@pytest.mark.asyncio
+async def test_get_next_available_slots_limits():
+    db = AsyncMock()
+    with pytest.raises(ValueError):
+        await get_next_available_slots(1, 60, db, limit=0)
+    with pytest.raises(ValueError):
+        await get_next_available_slots(1, 60, db, horizon_days=1000)
+
+def test_nearest_slots_around_request():
+    day = date(2099, 3, 2)
+    at = lambda h, m=0: datetime.combine(day, time(h, m))
+    slots = [at(9), at(9, 30), at(12), at(15), at(16)]
+
+    assert nearest_slots(slots, at(11), 3) == [at(9), at(9, 30), at(12)]
+    # Ties go to the earlier slot
+    assert nearest_slots(slots, at(10, 45), 1) == [at(9, 30)]
+    assert nearest_slots(slots, at(17), 2) == [at(15), at(16)]
+    assert nearest_slots([], at(10), 3) == []
+
+def test_alternative_slots_from_loaded_intervals():
+    day = date(2099, 3, 2)
+    at = lambda h, m=0: datetime.combine(day, time(h, m))
+    # Busy 9:00-12:00 and 13:00-18:00
+    busy = [(at(9), at(12)), (at(13), at(18))]
+
+    assert alternative_slots(busy, at(10), 60, DEFAULT_SCHEDULE) == [at(12)]
+    assert alternative_slots(busy, at(10), 30, DEFAULT_SCHEDULE) == [at(12), at(12, 30)]
+    assert alternative_slots(busy, at(10), 90, DEFAULT_SCHEDULE) == []
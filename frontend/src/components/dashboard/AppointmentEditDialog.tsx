@@ -35,6 +35,7 @@ export default function AppointmentEditDialog({ appointment, isOpen, onClose }:
             id: appointment.id,
             service_id: serviceId,
             start_time: new Date(startTime).toISOString(),
+            version: appointment.version,
         }, {
             onSuccess: () => onClose(),
         });
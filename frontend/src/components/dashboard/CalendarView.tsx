@@ -2,13 +2,14 @@ import { Calendar, dateFnsLocalizer } from 'react-big-calendar'
 import { format } from 'date-fns'
 import { parse } from 'date-fns'
 import { startOfWeek } from 'date-fns'
+import { addDays } from 'date-fns'
 import { getDay } from 'date-fns'
 import { enUS } from 'date-fns/locale/en-US'
 import { ru } from 'date-fns/locale/ru'
 import 'react-big-calendar/lib/css/react-big-calendar.css'
 import { useMemo, useState } from 'react'
 import 'react-big-calendar/lib/css/react-big-calendar.css'
-import { useAppointments } from '@/hooks/useAppointments'
+import { useCalendarFeed } from '@/hooks/useAppointments'
 import AppointmentEditDialog from './AppointmentEditDialog'
 import { Appointment } from '@/hooks/useAppointments'
 
@@ -26,7 +27,12 @@ const localizer = dateFnsLocalizer({
 })
 
 export default function CalendarView() {
-    const { data: appointments = [] } = useAppointments()
+    // Only the visible range is loaded
+    const [range, setRange] = useState(() => {
+        const from = startOfWeek(new Date())
+        return { from, to: addDays(from, 7) }
+    })
+    const { data: appointments = [] } = useCalendarFeed(range.from, range.to)
     const [selectedAppointment, setSelectedAppointment] = useState<Appointment | null>(null);
     const [isEditDialogOpen, setIsEditDialogOpen] = useState(false);
 
@@ -38,13 +44,21 @@ export default function CalendarView() {
             })
             .map(appt => ({
                 id: appt.id,
-                title: `Заказ #${appt.id}`,
+                title: `${appt.client_name} · ${appt.service_name}`,
                 start: new Date(appt.start_time),
                 end: new Date(appt.end_time),
                 resource: appt
             }))
     }, [appointments])
 
+    const handleRangeChange = (visible: Date[] | { start: Date; end: Date }) => {
+        if (Array.isArray(visible)) {
+            setRange({ from: visible[0], to: addDays(visible[visible.length - 1], 1) })
+        } else {
+            setRange({ from: visible.start, to: addDays(visible.end, 1) })
+        }
+    }
+
     const handleSelectEvent = (event: any) => {
         setSelectedAppointment(event.resource);
         setIsEditDialogOpen(true);
@@ -63,6 +77,7 @@ export default function CalendarView() {
                     views={['month', 'week', 'day']}
                     culture="ru"
                     onSelectEvent={handleSelectEvent}
+                    onRangeChange={handleRangeChange}
                     messages={{
                         next: "След",
                         previous: "Пред",
@@ -1,14 +1,15 @@
 import { useMemo, useState, DragEvent } from 'react';
-import { useAppointments, Appointment } from '@/hooks/useAppointments';
+import { useCalendarFeed, Appointment, CalendarEntry } from '@/hooks/useAppointments';
 import { Card, CardContent } from '@/components/ui/card';
-import { format } from 'date-fns';
-import { Edit } from 'lucide-react';
+import { Button } from '@/components/ui/button';
+import { addDays, format, startOfDay, subDays } from 'date-fns';
+import { ChevronLeft, ChevronRight, Edit } from 'lucide-react';
 import AppointmentEditDialog from './AppointmentEditDialog';
-import { useQueryClient } from "@tanstack/react-query";
-import { useWebSocket } from "@/contexts/WebSocketContext";
-import { useEffect } from "react";
 import { useUpdateAppointmentStatus } from '@/hooks/useUpdateAppointmentStatus';
 
+// The calendar feed serves at most 93 days per request
+const WINDOW_DAYS = 91;
+
 const COLUMNS = [
     { id: 'waitlist', title: 'Лист ожидания' },
     { id: 'new', title: 'Новая' },
@@ -18,7 +19,7 @@ const COLUMNS = [
 ];
 
 function DraggableCard({ appointment, onEdit, onDragStart }: {
-    appointment: Appointment,
+    appointment: CalendarEntry,
     onEdit: (appt: Appointment) => void,
     onDragStart: (e: DragEvent, appt: Appointment) => void,
 }) {
@@ -42,8 +43,9 @@ function DraggableCard({ appointment, onEdit, onDragStart }: {
                             <Edit size={14} className="text-muted-foreground" />
                         </button>
                     </div>
+                    <div className="text-sm">{appointment.client_name}</div>
                     <div className="text-xs text-muted-foreground">
-                        {format(new Date(appointment.start_time), 'HH:mm')}
+                        {format(new Date(appointment.start_time), 'dd.MM HH:mm')} · {appointment.service_name}
                     </div>
                 </CardContent>
             </Card>
@@ -54,7 +56,7 @@ function DraggableCard({ appointment, onEdit, onDragStart }: {
 function DroppableColumn({ id, title, appointments, onEdit, onDragStart, onDrop, isOver }: {
     id: string,
     title: string,
-    appointments: Appointment[],
+    appointments: CalendarEntry[],
     onEdit: (appt: Appointment) => void,
     onDragStart: (e: DragEvent, appt: Appointment) => void,
     onDrop: (e: DragEvent, columnId: string) => void,
@@ -96,9 +98,10 @@ function DroppableColumn({ id, title, appointments, onEdit, onDragStart, onDrop,
 }
 
 export default function KanbanBoard() {
-    const { data: appointments = [] } = useAppointments();
-    const queryClient = useQueryClient();
-    const { lastMessage } = useWebSocket();
+    // Last week and the next twelve weeks; the arrows page by the same window
+    const [from, setFrom] = useState(() => startOfDay(subDays(new Date(), 7)));
+    const range = useMemo(() => ({ from, to: addDays(from, WINDOW_DAYS) }), [from]);
+    const { data: appointments = [] } = useCalendarFeed(range.from, range.to);
     const updateStatusMutation = useUpdateAppointmentStatus();
 
     const [selectedAppointment, setSelectedAppointment] = useState<Appointment | null>(null);
@@ -106,17 +109,9 @@ export default function KanbanBoard() {
     const [dragOverColumn, setDragOverColumn] = useState<string | null>(null);
     const [draggedAppointment, setDraggedAppointment] = useState<Appointment | null>(null);
 
-    // Listen for real-time updates
-    useEffect(() => {
-        if (lastMessage) {
-            console.log("WS Update received:", lastMessage);
-            queryClient.invalidateQueries({ queryKey: ["appointments"] });
-        }
-    }, [lastMessage, queryClient]);
-
     // Group appointments by status
     const groupedAppointments = useMemo(() => {
-        const groups: Record<string, Appointment[]> = {
+        const groups: Record<string, CalendarEntry[]> = {
             waitlist: [],
             new: [],
             confirmed: [],
@@ -149,10 +144,14 @@ export default function KanbanBoard() {
         if (draggedAppointment.status.toUpperCase() !== newStatus) {
             console.log(`Moving ${draggedAppointment.id} to ${newStatus}`);
             updateStatusMutation.mutate(
-                { id: draggedAppointment.id, status: newStatus },
+                { id: draggedAppointment.id, status: newStatus, version: draggedAppointment.version },
                 {
-                    onError: (error) => {
+                    onError: (error: any) => {
                         console.error('Failed to update status:', error);
+                        if (error?.response?.status === 409) {
+                            alert('Запись уже изменил другой сотрудник. Доска обновлена.');
+                            return;
+                        }
                         alert('Не удалось обновить статус. Проверьте права доступа.');
                     }
                 }
@@ -168,6 +167,17 @@ export default function KanbanBoard() {
 
     return (
         <>
+            <div className="flex items-center justify-end gap-2 mb-4">
+                <Button variant="outline" size="icon" onClick={() => setFrom(subDays(from, WINDOW_DAYS))}>
+                    <ChevronLeft className="h-4 w-4" />
+                </Button>
+                <span className="text-xs text-muted-foreground">
+                    Показаны записи с {format(range.from, 'dd.MM.yyyy')} по {format(subDays(range.to, 1), 'dd.MM.yyyy')}
+                </span>
+                <Button variant="outline" size="icon" onClick={() => setFrom(addDays(from, WINDOW_DAYS))}>
+                    <ChevronRight className="h-4 w-4" />
+                </Button>
+            </div>
             <div
                 className="grid grid-cols-1 md:grid-cols-5 gap-6"
                 onDragOver={(e) => {
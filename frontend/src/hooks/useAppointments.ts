@@ -1,5 +1,7 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useEffect } from "react";
+import { QueryClient, useQuery, useQueryClient } from "@tanstack/react-query";
 import { api } from "@/lib/api";
+import { useWebSocket } from "@/contexts/WebSocketContext";
 
 export interface Appointment {
     id: number;
@@ -9,27 +11,134 @@ export interface Appointment {
     start_time: string;
     end_time: string;
     status: "new" | "confirmed" | "in_progress" | "done" | "cancelled";
+    version: number;
 }
 
-export function useAppointments() {
-    return useQuery({
-        queryKey: ["appointments"],
-        queryFn: async () => {
-            const { data } = await api.get<Appointment[]>("/appointments/");
-            return data;
-        },
-    });
+export interface CalendarEntry extends Appointment {
+    bay: number;
+    client_name: string;
+    client_phone: string | null;
+    service_name: string;
+    service_duration_minutes: number;
+    service_price: number;
+}
+
+export interface AppointmentChange extends CalendarEntry {
+    // Tombstone: the appointment was cancelled
+    deleted: boolean;
+}
+
+interface AppointmentChanges {
+    changes: AppointmentChange[];
+    cursor: string;
+    has_more: boolean;
 }
 
-export function useUpdateAppointmentStatus() {
+interface CalendarFeed {
+    entries: CalendarEntry[];
+    // Change cursor the entries are up to date with
+    cursor: string;
+}
+
+// Change cursors are "<xid>.<id>" positions in change order
+function compareCursors(a: string, b: string) {
+    const [aXid, aId] = a.split(".").map(Number);
+    const [bXid, bId] = b.split(".").map(Number);
+    return aXid !== bXid ? aXid - bXid : aId - bId;
+}
+
+const CHANGES_RETRY_MS = 1000;
+const CHANGES_RETRIES = 5;
+
+// Appointments of a window (at most 93 days) joined with client and service,
+// kept up to date from the changes the WebSocket events announce
+export function useCalendarFeed(from: Date, to: Date) {
+    const dateFrom = from.toISOString();
+    const dateTo = to.toISOString();
+    const queryKey = ["appointments", "calendar", dateFrom, dateTo];
     const queryClient = useQueryClient();
+    const { lastMessage } = useWebSocket();
 
-    return useMutation({
-        mutationFn: async ({ id, status }: { id: number; status: string }) => {
-            return api.patch(`/appointments/${id}/status`, { status });
-        },
-        onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ["appointments"] });
+    const query = useQuery({
+        queryKey,
+        queryFn: async (): Promise<CalendarFeed> => {
+            const response = await api.get<CalendarEntry[]>("/appointments/calendar", {
+                params: { date_from: dateFrom, date_to: dateTo },
+            });
+            return { entries: response.data, cursor: response.headers["x-change-cursor"] };
         },
     });
+
+    useEffect(() => {
+        const eventCursor: string | undefined = lastMessage?.cursor;
+        if (!eventCursor) return;
+        let stopped = false;
+        let timer: ReturnType<typeof setTimeout>;
+
+        const sync = async (attempt: number) => {
+            const feed = queryClient.getQueryData<CalendarFeed>(queryKey);
+            // Not loaded yet, or the event's changes are already applied
+            if (!feed || compareCursors(eventCursor, feed.cursor) < 0) return;
+
+            const changes: AppointmentChange[] = [];
+            let cursor = feed.cursor;
+            let hasMore = true;
+            while (hasMore) {
+                const { data } = await api.get<AppointmentChanges>("/appointments/changes", {
+                    params: { since: cursor },
+                });
+                changes.push(...data.changes);
+                cursor = data.cursor;
+                hasMore = data.has_more;
+            }
+            if (stopped) return;
+
+            const byId = new Map(feed.entries.map((entry) => [entry.id, entry]));
+            for (const entry of changes) {
+                const start = new Date(entry.start_time);
+                if (start >= from && start < to) {
+                    byId.set(entry.id, entry);
+                } else {
+                    byId.delete(entry.id);
+                }
+            }
+            const entries = [...byId.values()].sort(
+                (a, b) => a.start_time.localeCompare(b.start_time) || a.id - b.id
+            );
+            queryClient.setQueryData<CalendarFeed>(queryKey, { entries, cursor });
+
+            // An older transaction still running holds the event's changes back
+            if (compareCursors(eventCursor, cursor) >= 0 && attempt < CHANGES_RETRIES) {
+                timer = setTimeout(() => sync(attempt + 1), CHANGES_RETRY_MS);
+            }
+        };
+
+        sync(0).catch(() => queryClient.invalidateQueries({ queryKey }));
+        return () => {
+            stopped = true;
+            clearTimeout(timer);
+        };
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [lastMessage]);
+
+    return { ...query, data: query.data?.entries };
+}
+
+// Applies an appointment the API returned to every loaded calendar window,
+// keeping the joined client and service fields. Refetching the windows
+// instead would throw the delta sync away; the change event still follows
+// and brings anything this cannot know (e.g. a new service name).
+export function mergeIntoCalendarFeeds(queryClient: QueryClient, appointment: Appointment) {
+    const start = new Date(appointment.start_time);
+    const feeds = queryClient.getQueriesData<CalendarFeed>({ queryKey: ["appointments", "calendar"] });
+    for (const [queryKey, feed] of feeds) {
+        if (!feed) continue;
+        const [, , dateFrom, dateTo] = queryKey as string[];
+        const inWindow = start >= new Date(dateFrom) && start < new Date(dateTo);
+        const entries = feed.entries.flatMap((entry) => {
+            if (entry.id !== appointment.id) return [entry];
+            return inWindow ? [{ ...entry, ...appointment }] : [];
+        });
+        queryClient.setQueryData<CalendarFeed>(queryKey, { ...feed, entries });
+    }
 }
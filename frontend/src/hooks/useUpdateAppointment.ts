@@ -1,10 +1,12 @@
 import { useMutation, useQueryClient } from "@tanstack/react-query";
 import { api } from "@/lib/api";
+import { Appointment, mergeIntoCalendarFeeds } from "@/hooks/useAppointments";
 
 interface UpdateAppointmentData {
     id: number;
     service_id?: number;
     start_time?: string;
+    version?: number;
 }
 
 export function useUpdateAppointment() {
@@ -12,11 +14,18 @@ export function useUpdateAppointment() {
 
     return useMutation({
         mutationFn: async ({ id, ...data }: UpdateAppointmentData) => {
-            const response = await api.patch(`/appointments/${id}`, data);
+            const response = await api.patch<Appointment>(`/appointments/${id}`, data);
             return response.data;
         },
-        onSuccess: () => {
-            queryClient.invalidateQueries({ queryKey: ["appointments"] });
+        onSuccess: (appointment) => {
+            mergeIntoCalendarFeeds(queryClient, appointment);
+        },
+        onError: (error: any) => {
+            // A 409 means someone else changed it first: show their version
+            const current = error?.response?.data?.detail?.current;
+            if (current) {
+                mergeIntoCalendarFeeds(queryClient, current);
+            }
         },
     });
 }
@@ -1,20 +1,26 @@
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { api } from '@/lib/api';
+import { Appointment, mergeIntoCalendarFeeds } from '@/hooks/useAppointments';
 
 export function useUpdateAppointmentStatus() {
     const queryClient = useQueryClient();
 
     return useMutation({
-        mutationFn: async ({ id, status }: { id: number; status: string }) => {
-            const response = await api.patch(`/appointments/${id}/status`, { status });
+        mutationFn: async ({ id, status, version }: { id: number; status: string; version?: number }) => {
+            const response = await api.patch<Appointment>(`/appointments/${id}/status`, { status, version });
             return response.data;
         },
-        onSuccess: () => {
-            // Invalidate and refetch appointments to sync UI
-            queryClient.invalidateQueries({ queryKey: ['appointments'] });
+        onSuccess: (appointment) => {
+            // Update the board in place; the change event syncs the rest
+            mergeIntoCalendarFeeds(queryClient, appointment);
         },
-        onError: (error) => {
+        onError: (error: any) => {
             console.error('Failed to update appointment status:', error);
+            // A 409 means someone else changed it first: show their version
+            const current = error?.response?.data?.detail?.current;
+            if (current) {
+                mergeIntoCalendarFeeds(queryClient, current);
+            }
         },
     });
 }
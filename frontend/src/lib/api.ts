@@ -12,6 +12,11 @@ api.interceptors.request.use((config) => {
     if (token && config.headers) {
         config.headers["Authorization"] = `Bearer ${token}`;
     }
+    // Inside Telegram: signed customer identity, checked by the API (slot holds)
+    const initData = (window as any).Telegram?.WebApp?.initData;
+    if (initData && config.headers) {
+        config.headers["X-Telegram-Init-Data"] = initData;
+    }
     return config;
 });
 
@@ -20,7 +25,8 @@ api.interceptors.response.use(
     (error) => {
         if (error.response?.status === 401) {
             // If session expired, redirect to login
-            if (!window.location.pathname.includes('/login')) {
+            // WebApp customers have no dashboard session to go back to
+            if (!window.location.pathname.includes('/login') && !window.location.pathname.startsWith('/webapp')) {
                 localStorage.removeItem('token');
                 window.location.href = '/login';
             }
@@ -1,24 +1,37 @@
 
 import { useQuery } from '@tanstack/react-query';
 import { api } from '@/lib/api';
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { Search } from 'lucide-react';
 
 interface Client {
     id: number;
     full_name: string;
-    phone: string;
-    telegram_id: number;
+    phone: string | null;
+    telegram_id: number | null;
     vehicle_info?: string;
 }
 
+// Shorter queries cannot use the search indexes
+const MIN_SEARCH_LENGTH = 3;
+const SEARCH_DEBOUNCE_MS = 300;
+
 export default function ClientsPage() {
     const [search, setSearch] = useState('');
+    const [term, setTerm] = useState('');
+
+    useEffect(() => {
+        const timer = setTimeout(() => setTerm(search.trim()), SEARCH_DEBOUNCE_MS);
+        return () => clearTimeout(timer);
+    }, [search]);
 
+    const searching = term.length >= MIN_SEARCH_LENGTH;
     const { data: clients = [], isLoading, isError, error } = useQuery({
-        queryKey: ['clients'],
+        queryKey: searching ? ['clients', 'search', term] : ['clients'],
         queryFn: async () => {
-            const response = await api.get<Client[]>('/clients/');
+            const response = searching
+                ? await api.get<Client[]>('/clients/search', { params: { q: term, limit: 100 } })
+                : await api.get<Client[]>('/clients/');
             return response.data;
         }
     });
@@ -31,9 +44,10 @@ export default function ClientsPage() {
         );
     }
 
-    const filteredClients = clients.filter(client =>
-        client.full_name.toLowerCase().includes(search.toLowerCase()) ||
-        client.phone.includes(search)
+    // Search results come ranked from the server
+    const filteredClients = searching ? clients : clients.filter(client =>
+        client.full_name.toLowerCase().includes(term.toLowerCase()) ||
+        (client.phone ?? '').includes(term)
     );
 
     return (
@@ -43,7 +57,7 @@ export default function ClientsPage() {
                 <Search className="absolute left-3 top-2.5 h-4 w-4 text-muted-foreground" />
                 <input
                     type="text"
-                    placeholder="Поиск по имени или телефону..."
+                    placeholder="Поиск по имени, телефону или авто..."
                     value={search}
                     onChange={(e) => setSearch(e.target.value)}
                     className="pl-9 pr-4 py-2 border border-border rounded-xl w-full bg-card text-foreground placeholder:text-muted-foreground focus:outline-none focus:ring-2 focus:ring-primary transition-all duration-200"
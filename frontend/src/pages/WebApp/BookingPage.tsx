@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { api } from "@/lib/api";
@@ -123,6 +123,8 @@ export default function BookingPage() {
     });
     const [availableSlots, setAvailableSlots] = useState<string[]>([]);
     const [selectedTime, setSelectedTime] = useState<string>('');
+    // A ref, so the MainButton handler registered earlier sees the latest hold
+    const holdId = useRef<string | null>(null);
     const [slotsLoading, setSlotsLoading] = useState(false);
     const [showCalendar, setShowCalendar] = useState(false);
 
@@ -195,6 +197,7 @@ export default function BookingPage() {
         if (selectedService && selectedDate) {
             setSlotsLoading(true);
             setSelectedTime('');
+            holdId.current = null;
             const dateStr = format(selectedDate, 'yyyy-MM-dd');
 
             api.get('/slots/available', {
@@ -213,6 +216,33 @@ export default function BookingPage() {
         }
     }, [selectedService, selectedDate]);
 
+    // Hold the chosen time while the customer confirms, so nobody else takes it
+    const handleSelectTime = (slot: string) => {
+        if (!selectedService) return;
+        if (holdId.current) {
+            api.delete('/slots/hold', { params: { shop_id: 1, hold_id: holdId.current } }).catch(() => { });
+            holdId.current = null;
+        }
+        setSelectedTime(slot);
+
+        api.post('/slots/hold', {
+            shop_id: 1, // Default for MVP
+            service_id: selectedService.id,
+            start_time: slot,
+            appointment_id: appointmentId ? Number(appointmentId) : null
+        })
+            .then(res => { holdId.current = res.data.hold_id; })
+            .catch(err => {
+                if (err.response?.status === 409) {
+                    // Taken in the meantime
+                    setSelectedTime('');
+                    setAvailableSlots(prev => prev.filter(s => s !== slot));
+                } else {
+                    console.error("Failed to hold slot", err);
+                }
+            });
+    };
+
     const handleSubmit = (isWaitlist: boolean = false) => {
         if (!selectedService || (!selectedTime && !isWaitlist)) return;
 
@@ -220,7 +250,8 @@ export default function BookingPage() {
             service_id: selectedService.id,
             date: isWaitlist ? format(selectedDate, 'yyyy-MM-dd') : selectedTime,
             appointment_id: appointmentId, // Include if editing
-            is_waitlist: isWaitlist
+            is_waitlist: isWaitlist,
+            hold_id: isWaitlist ? null : holdId.current
         };
 
         if (tg) {
@@ -338,7 +369,7 @@ export default function BookingPage() {
                                 return (
                                     <button
                                         key={slot}
-                                        onClick={() => setSelectedTime(slot)}
+                                        onClick={() => handleSelectTime(slot)}
                                         className={`h-10 rounded-lg flex items-center justify-center text-sm font-medium transition-all ${isSelected
                                             ? 'bg-primary text-primary-foreground shadow-md'
                                             : 'bg-accent/40 hover:bg-accent'